@@ -8,6 +8,7 @@
 -- ============================================
 -- CLEAN UP: DROP ALL EXISTING TABLES
 -- ============================================
+DROP TABLE IF EXISTS evaluation_drafts CASCADE;
 DROP TABLE IF EXISTS evaluation_scores CASCADE;
 DROP TABLE IF EXISTS evaluations CASCADE;
 DROP TABLE IF EXISTS form_criteria CASCADE;
@@ -134,6 +135,21 @@ CREATE TABLE IF NOT EXISTS evaluation_scores (
 CREATE INDEX IF NOT EXISTS idx_evaluation_scores_evaluation ON evaluation_scores(evaluation_id);
 CREATE INDEX IF NOT EXISTS idx_evaluation_scores_criterion ON evaluation_scores(criterion_id);
 
+-- 9. CREATE EVALUATION_DRAFTS TABLE (autosaved, not yet submitted evaluations)
+CREATE TABLE IF NOT EXISTS evaluation_drafts (
+    id BIGSERIAL PRIMARY KEY,
+    form_id BIGINT NOT NULL,
+    evaluator_id BIGINT NOT NULL,
+    evaluatee_id BIGINT NOT NULL,
+    team_id BIGINT,
+    scores JSONB NOT NULL DEFAULT '{}'::jsonb,  -- {"<criterion_id>": score}
+    comments TEXT,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    UNIQUE(form_id, evaluator_id, evaluatee_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_evaluation_drafts_evaluator ON evaluation_drafts(evaluator_id);
+
 -- ============================================
 -- INSERT SAMPLE DATA
 -- ============================================
@@ -225,8 +241,222 @@ BEGIN
         ALTER TABLE evaluation_scores ADD CONSTRAINT fk_evaluation_scores_criterion 
         FOREIGN KEY (criterion_id) REFERENCES form_criteria(id) ON DELETE CASCADE;
     END IF;
+
+    -- Evaluation Drafts
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'fk_evaluation_drafts_form') THEN
+        ALTER TABLE evaluation_drafts ADD CONSTRAINT fk_evaluation_drafts_form 
+        FOREIGN KEY (form_id) REFERENCES evaluation_forms(id) ON DELETE CASCADE;
+    END IF;
+
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'fk_evaluation_drafts_evaluator') THEN
+        ALTER TABLE evaluation_drafts ADD CONSTRAINT fk_evaluation_drafts_evaluator 
+        FOREIGN KEY (evaluator_id) REFERENCES users(id) ON DELETE CASCADE;
+    END IF;
+
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'fk_evaluation_drafts_evaluatee') THEN
+        ALTER TABLE evaluation_drafts ADD CONSTRAINT fk_evaluation_drafts_evaluatee 
+        FOREIGN KEY (evaluatee_id) REFERENCES users(id) ON DELETE CASCADE;
+    END IF;
+
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'fk_evaluation_drafts_team') THEN
+        ALTER TABLE evaluation_drafts ADD CONSTRAINT fk_evaluation_drafts_team 
+        FOREIGN KEY (team_id) REFERENCES teams(id) ON DELETE CASCADE;
+    END IF;
 END $$;
 
+-- ============================================
+-- FUNCTIONS (called through PostgREST rpc)
+-- ============================================
+
+-- Update an evaluation and its scores in one transaction.
+-- p_scores ([{"criterion_id": 1, "score": 8}, ...]) is the new score set:
+-- changed scores are upserted, unchanged ones are left alone and criteria
+-- missing from it are deleted. NULL leaves the scores untouched.
+-- Returns the evaluation with its scores, or NULL if it does not exist.
+CREATE OR REPLACE FUNCTION update_evaluation_scores(
+    p_evaluation_id BIGINT,
+    p_total_score INTEGER DEFAULT NULL,
+    p_comments TEXT DEFAULT NULL,
+    p_scores JSONB DEFAULT NULL
+) RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    updated evaluations%ROWTYPE;
+BEGIN
+    -- Also locks the row, so concurrent edits of one evaluation apply in turn
+    UPDATE evaluations
+    SET total_score = COALESCE(p_total_score, total_score),
+        comments = COALESCE(p_comments, comments)
+    WHERE id = p_evaluation_id
+    RETURNING * INTO updated;
+
+    IF NOT FOUND THEN
+        RETURN NULL;
+    END IF;
+
+    IF p_scores IS NOT NULL THEN
+        DELETE FROM evaluation_scores
+        WHERE evaluation_id = p_evaluation_id
+          AND criterion_id NOT IN (
+              SELECT (s->>'criterion_id')::BIGINT FROM jsonb_array_elements(p_scores) AS s
+          );
+
+        INSERT INTO evaluation_scores (evaluation_id, criterion_id, score)
+        SELECT p_evaluation_id, (s->>'criterion_id')::BIGINT, (s->>'score')::INTEGER
+        FROM jsonb_array_elements(p_scores) AS s
+        ON CONFLICT (evaluation_id, criterion_id) DO UPDATE
+        SET score = EXCLUDED.score
+        WHERE evaluation_scores.score IS DISTINCT FROM EXCLUDED.score;
+    END IF;
+
+    RETURN to_jsonb(updated) || jsonb_build_object(
+        'scores', COALESCE((
+            SELECT jsonb_agg(to_jsonb(es) ORDER BY es.id)
+            FROM evaluation_scores es
+            WHERE es.evaluation_id = p_evaluation_id
+        ), '[]'::jsonb)
+    );
+END;
+$$;
+
+-- Merge buffered draft autosaves (app/services/drafts.py) in one statement.
+-- p_drafts: [{"form_id": 1, "evaluator_id": 2, "evaluatee_id": 3,
+--   "team_id": 4, "comments": "...", "scores": {"<criterion_id>": 8},
+--   "cleared": ["<criterion_id>"], "updated_at": "..."}, ...]
+-- Scores are merged key by key into the stored draft and cleared criteria
+-- removed, so changes buffered by different workers combine instead of
+-- overwriting each other; a NULL team_id or comments keeps the stored value.
+-- Drafts whose evaluation has been submitted are not written, and are
+-- deleted if the submission committed while this ran.
+-- Returns the number of drafts written.
+CREATE OR REPLACE FUNCTION merge_evaluation_drafts(p_drafts JSONB) RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    written INTEGER;
+BEGIN
+    WITH input AS (
+        SELECT *
+        FROM jsonb_to_recordset(p_drafts) AS d(
+            form_id BIGINT, evaluator_id BIGINT, evaluatee_id BIGINT, team_id BIGINT,
+            comments TEXT, scores JSONB, cleared TEXT[], updated_at TIMESTAMPTZ
+        )
+    )
+    INSERT INTO evaluation_drafts AS stored
+        (form_id, evaluator_id, evaluatee_id, team_id, comments, scores, updated_at)
+    SELECT i.form_id, i.evaluator_id, i.evaluatee_id, i.team_id, i.comments,
+           COALESCE(i.scores, '{}'::jsonb), COALESCE(i.updated_at, NOW())
+    FROM input i
+    WHERE NOT EXISTS (
+        SELECT 1 FROM evaluations e
+        WHERE e.form_id = i.form_id AND e.evaluator_id = i.evaluator_id AND e.evaluatee_id = i.evaluatee_id
+    )
+    ON CONFLICT (form_id, evaluator_id, evaluatee_id) DO UPDATE
+    SET scores = (stored.scores || EXCLUDED.scores) - COALESCE((
+            SELECT i.cleared FROM input i
+            WHERE i.form_id = EXCLUDED.form_id
+              AND i.evaluator_id = EXCLUDED.evaluator_id
+              AND i.evaluatee_id = EXCLUDED.evaluatee_id
+        ), '{}'::TEXT[]),
+        team_id = COALESCE(EXCLUDED.team_id, stored.team_id),
+        comments = COALESCE(EXCLUDED.comments, stored.comments),
+        updated_at = GREATEST(EXCLUDED.updated_at, stored.updated_at);
+    GET DIAGNOSTICS written = ROW_COUNT;
+
+    -- A new statement sees submissions committed since the insert began
+    DELETE FROM evaluation_drafts d
+    USING evaluations e, jsonb_array_elements(p_drafts) AS p
+    WHERE d.form_id = (p->>'form_id')::BIGINT
+      AND d.evaluator_id = (p->>'evaluator_id')::BIGINT
+      AND d.evaluatee_id = (p->>'evaluatee_id')::BIGINT
+      AND e.form_id = d.form_id AND e.evaluator_id = d.evaluator_id AND e.evaluatee_id = d.evaluatee_id;
+
+    RETURN written;
+END;
+$$;
+
+-- Scores given per criterion of a form, counted in one grouped query
+-- (app/services/usage.py). Criteria without scores count 0.
+CREATE OR REPLACE FUNCTION criterion_usage_counts(p_form_id BIGINT)
+RETURNS TABLE (criterion_id BIGINT, usage_count BIGINT)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT c.id, COUNT(s.id)
+    FROM form_criteria c
+    LEFT JOIN evaluation_scores s ON s.criterion_id = c.id
+    WHERE c.form_id = p_form_id
+    GROUP BY c.id;
+$$;
+
+-- Tell API workers that team membership changed, so they drop the affected
+-- project from their in-process membership index (see app/services/membership.py).
+-- Notifications are delivered on commit, and duplicates within a transaction
+-- are collapsed.
+CREATE OR REPLACE FUNCTION notify_membership_changed() RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'teams' THEN
+        IF TG_OP <> 'INSERT' THEN
+            PERFORM pg_notify('membership_changed', 'project:' || OLD.project_id);
+        END IF;
+        IF TG_OP <> 'DELETE' THEN
+            PERFORM pg_notify('membership_changed', 'project:' || NEW.project_id);
+        END IF;
+    ELSE
+        IF TG_OP <> 'INSERT' THEN
+            PERFORM pg_notify('membership_changed', 'team:' || OLD.team_id);
+        END IF;
+        IF TG_OP <> 'DELETE' THEN
+            PERFORM pg_notify('membership_changed', 'team:' || NEW.team_id);
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS teams_notify_membership ON teams;
+CREATE TRIGGER teams_notify_membership
+AFTER INSERT OR UPDATE OF project_id OR DELETE ON teams
+FOR EACH ROW EXECUTE FUNCTION notify_membership_changed();
+
+DROP TRIGGER IF EXISTS team_members_notify_membership ON team_members;
+CREATE TRIGGER team_members_notify_membership
+AFTER INSERT OR UPDATE OR DELETE ON team_members
+FOR EACH ROW EXECUTE FUNCTION notify_membership_changed();
+
+-- Same channel for evaluation forms and their criteria: workers drop the
+-- form's compiled submission validator (see app/services/validators.py).
+CREATE OR REPLACE FUNCTION notify_form_changed() RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'evaluation_forms' THEN
+        PERFORM pg_notify('membership_changed', 'form:' || OLD.id);
+    ELSE
+        IF TG_OP <> 'INSERT' THEN
+            PERFORM pg_notify('membership_changed', 'form:' || OLD.form_id);
+        END IF;
+        IF TG_OP <> 'DELETE' THEN
+            PERFORM pg_notify('membership_changed', 'form:' || NEW.form_id);
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS evaluation_forms_notify_form ON evaluation_forms;
+CREATE TRIGGER evaluation_forms_notify_form
+AFTER UPDATE OF max_score OR DELETE ON evaluation_forms
+FOR EACH ROW EXECUTE FUNCTION notify_form_changed();
+
+DROP TRIGGER IF EXISTS form_criteria_notify_form ON form_criteria;
+CREATE TRIGGER form_criteria_notify_form
+AFTER INSERT OR UPDATE OR DELETE ON form_criteria
+FOR EACH ROW EXECUTE FUNCTION notify_form_changed();
+
 -- ============================================
 -- ENABLE ROW LEVEL SECURITY (Optional)
 -- ============================================
@@ -240,6 +470,7 @@ END $$;
 -- ALTER TABLE form_criteria ENABLE ROW LEVEL SECURITY;
 -- ALTER TABLE evaluations ENABLE ROW LEVEL SECURITY;
 -- ALTER TABLE evaluation_scores ENABLE ROW LEVEL SECURITY;
+-- ALTER TABLE evaluation_drafts ENABLE ROW LEVEL SECURITY;
 
 -- ============================================
 -- VERIFICATION QUERIES
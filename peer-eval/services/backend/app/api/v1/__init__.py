@@ -1,6 +1,6 @@
 """API v1 router - aggregates all v1 endpoints."""
 from fastapi import APIRouter
-from app.api.v1 import auth, users, projects, teams, forms, evaluations, reports
+from app.api.v1 import auth, users, projects, teams, forms, evaluations, reports, exports, admin
 
 api_router = APIRouter(prefix="/v1")
 
@@ -12,3 +12,5 @@ api_router.include_router(teams.router)
 api_router.include_router(forms.router)
 api_router.include_router(evaluations.router)
 api_router.include_router(reports.router)
+api_router.include_router(exports.router)
+api_router.include_router(admin.router)
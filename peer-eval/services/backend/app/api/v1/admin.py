@@ -0,0 +1,140 @@
+"""Admin-only operational routes (guarded by the X-Admin-Key header)."""
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import httpx
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import FileResponse
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.core.memtrace import TraceBusy, trace_allocations
+from app.core.profiling import PROFILE_FORMATS, profile_store
+from app.core.responses import FastJSONRoute
+from app.core.security import require_admin
+from app.services import analytics_export
+from app.services.jobs import JobQueueFull, report_jobs
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(require_admin)],
+    route_class=FastJSONRoute,
+)
+
+
+# Pydantic models
+class ScoresExportRequest(BaseModel):
+    project_id: Optional[int] = None
+    format: str = "parquet"
+    batch_size: int = 100_000
+
+
+class MemoryProfileRequest(BaseModel):
+    path: str
+    method: str = "GET"
+    params: Optional[Dict[str, Any]] = None
+    json_body: Optional[Any] = None
+    headers: Optional[Dict[str, str]] = None
+    top: int = 20
+
+
+@router.post("/exports/scores", status_code=status.HTTP_202_ACCEPTED)
+async def export_scores(export_request: ScoresExportRequest):
+    """Queue a columnar export of evaluation scores; poll it via /reports/jobs/{job_id}."""
+    if not analytics_export.pyarrow_available():
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Analytics export requires pyarrow to be installed"
+        )
+
+    if export_request.format not in analytics_export.EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported format '{export_request.format}'"
+        )
+
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    output_dir = Path(settings.ANALYTICS_EXPORT_DIR) / f"scores_{stamp}"
+
+    try:
+        job = report_jobs.submit(
+            "scores_export",
+            export_request.model_dump(),
+            analytics_export.export_scores,
+            str(output_dir),
+            export_request.project_id,
+            export_request.format,
+            export_request.batch_size,
+        )
+    except JobQueueFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Job queue is full: {str(e)}",
+            headers={"Retry-After": "30"}
+        )
+
+    return {
+        "job": job,
+        "output_dir": str(output_dir),
+        "status_url": f"/api/v1/reports/jobs/{job['id']}",
+        "message": "Scores export queued"
+    }
+
+
+@router.get("/profiles")
+async def list_profiles():
+    """Stored request profiles, newest first."""
+    return profile_store.list()
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, format: str = Query("collapsed")):
+    """Download a profile: ``collapsed`` (flame graph), ``text`` (call tree) or ``pstats``."""
+    path = profile_store.path(profile_id, format)
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Profile {profile_id} not found in format '{format}'"
+        )
+    return FileResponse(path, media_type=PROFILE_FORMATS[format][1], filename=path.name)
+
+
+@router.post("/memory-profile")
+async def memory_profile(profile_request: MemoryProfileRequest, request: Request):
+    """Run one API request in-process under tracemalloc.
+
+    Reports the request's status and timing, the peak and retained traced
+    memory, and the top allocation sites near the peak.
+    """
+    if not profile_request.path.startswith("/api/") or profile_request.path.startswith("/api/v1/admin"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Path must be a non-admin API path, e.g. /api/v1/reports/project/1"
+        )
+
+    transport = httpx.ASGITransport(app=request.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://memory-profile") as client:
+            with trace_allocations(top=profile_request.top) as trace:
+                response = await client.request(
+                    profile_request.method.upper(),
+                    profile_request.path,
+                    params=profile_request.params,
+                    json=profile_request.json_body,
+                    headers=profile_request.headers,
+                )
+                response_bytes = len(response.content)
+    except TraceBusy as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+
+    return {
+        "request": {"method": profile_request.method.upper(), "path": profile_request.path},
+        "status_code": response.status_code,
+        "response_bytes": response_bytes,
+        **trace,
+    }
@@ -4,8 +4,17 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, EmailStr
 from app.db import get_db
 from app.core.supabase import supabase
+from app.core.responses import FastJSONRoute
+from app.core.passwords import passwords
+from app.core.security import (
+    TOKEN_TYPE,
+    create_access_token,
+    get_bearer_token,
+    get_current_user as current_user,
+    revoke_access_token,
+)
 
-router = APIRouter(prefix="/auth", tags=["authentication"])
+router = APIRouter(prefix="/auth", tags=["authentication"], route_class=FastJSONRoute)
 
 
 # Pydantic models for request/response
@@ -32,9 +41,9 @@ class UserResponse(BaseModel):
 class LoginResponse(BaseModel):
     user: dict
     message: str
-    # TODO: Add access_token field when JWT is implemented
-    # access_token: str
-    # token_type: str = "bearer"
+    access_token: str
+    token_type: str = TOKEN_TYPE
+    expires_in: int
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
@@ -50,10 +59,9 @@ async def register(user_data: UserRegister):
             )
         
         # Create user in database
-        # TODO: Hash the password with bcrypt before storing
         new_user = {
             "email": user_data.email,
-            "password_hash": user_data.password,  # TODO: Hash this!
+            "password_hash": await passwords.hash(user_data.password),
             "name": user_data.name,
             "role": user_data.role
         }
@@ -99,20 +107,19 @@ async def login(credentials: UserLogin):
         
         user = result.data[0]
         
-        # Verify password
-        # TODO: Use bcrypt to verify hashed password
-        # For now, comparing plain text (INSECURE - fix this!)
-        if user.get("password_hash") != credentials.password:
+        # Verify password (bcrypt, off the event loop)
+        valid, new_hash = await passwords.verify(credentials.password, user.get("password_hash"))
+        if not valid:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid email or password"
             )
         
-        # TODO: Generate JWT token here
-        # from datetime import datetime, timedelta
-        # import jwt
-        # token_data = {"sub": user["email"], "exp": datetime.utcnow() + timedelta(hours=24)}
-        # access_token = jwt.encode(token_data, SECRET_KEY, algorithm="HS256")
+        # Upgrade plaintext or different-cost hashes now that we know the password
+        if new_hash:
+            supabase.table("users").update({"password_hash": new_hash}).eq("id", user["id"]).execute()
+        
+        access_token, expires_in = create_access_token(user)
         
         return {
             "user": {
@@ -121,9 +128,10 @@ async def login(credentials: UserLogin):
                 "name": user["name"],
                 "role": user["role"]
             },
-            "message": "Login successful"
-            # "access_token": access_token,
-            # "token_type": "bearer"
+            "message": "Login successful",
+            "access_token": access_token,
+            "token_type": TOKEN_TYPE,
+            "expires_in": expires_in,
         }
         
     except HTTPException:
@@ -136,15 +144,9 @@ async def login(credentials: UserLogin):
 
 
 @router.post("/logout")
-async def logout():
-    """Logout user."""
-    # For stateless JWT authentication, logout is handled client-side
-    # by deleting the token. Server doesn't need to do anything.
-    # If you want to implement token blacklisting, add that logic here.
-    
-    # TODO: Implement token blacklisting if needed
-    # - Store revoked tokens in Redis or database
-    # - Check token against blacklist on each request
+async def logout(token: str = Depends(get_bearer_token)):
+    """Logout user by revoking the bearer token until it expires."""
+    revoke_access_token(token)
     
     return {
         "message": "Logout successful. Please delete your token on the client side.",
@@ -153,17 +155,10 @@ async def logout():
 
 
 @router.get("/me")
-async def get_current_user(user_id: int):
-    """Get current authenticated user by ID."""
-    # TODO: Replace user_id parameter with JWT token verification
-    # This should extract user_id from the JWT token, not accept it as a parameter
-    # Example:
-    # def get_current_user(token: str = Depends(oauth2_scheme)):
-    #     payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-    #     user_id = payload.get("sub")
-    
+async def get_current_user(token_user: dict = Depends(current_user)):
+    """Get the user the bearer token was issued to."""
     try:
-        result = supabase.table("users").select("id, email, name, role, created_at").eq("id", user_id).execute()
+        result = supabase.table("users").select("id, email, name, role, created_at").eq("id", token_user["id"]).execute()
         
         if not result.data:
             raise HTTPException(
@@ -2,11 +2,19 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from app.db import get_db
+from app.db.mutations import delete_one
 from app.core.supabase import supabase
+from app.core.responses import FastJSONRoute
+from app.services.drafts import draft_buffer
+from app.services.events import event_hub
+from app.services.membership import team_membership
+from app.services.snapshots import report_snapshots
+from app.services.usage import usage_counters
+from app.services.validators import form_validators
 
-router = APIRouter(prefix="/evaluations", tags=["evaluations"])
+router = APIRouter(prefix="/evaluations", tags=["evaluations"], route_class=FastJSONRoute)
 
 
 # Pydantic models
@@ -31,6 +39,17 @@ class EvaluationUpdate(BaseModel):
     scores: Optional[List[EvaluationScore]] = None
 
 
+class DraftScore(BaseModel):
+    criterion_id: int
+    score: Optional[int] = None  # None clears the criterion
+
+
+class DraftUpdate(BaseModel):
+    team_id: Optional[int] = None
+    scores: List[DraftScore] = []
+    comments: Optional[str] = None
+
+
 @router.get("/")
 async def list_evaluations(
     form_id: Optional[int] = None,
@@ -102,56 +121,32 @@ async def list_evaluations(
 async def submit_evaluation(evaluation_data: EvaluationSubmit):
     """Submit a new peer evaluation."""
     try:
-        # Validate form exists
-        form = supabase.table("evaluation_forms").select("*").eq("id", evaluation_data.form_id).execute()
-        
-        if not form.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Evaluation form not found"
-            )
+        # Validate form exists and the scores against it (cached, no query on a hit)
+        score_pairs = [(score.criterion_id, score.score) for score in evaluation_data.scores]
+        _check_scores(evaluation_data.form_id, score_pairs, evaluation_data.total_score)
         
-        # Validate team exists
-        team = supabase.table("teams").select("*").eq("id", evaluation_data.team_id).execute()
+        # Validate team exists and both users are members (in-process index)
+        members = team_membership.members(evaluation_data.team_id)
         
-        if not team.data:
+        if members is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Team not found"
             )
         
-        # Validate evaluator exists and is a team member
-        evaluator = supabase.table("users").select("id").eq("id", evaluation_data.evaluator_id).execute()
-        
-        if not evaluator.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Evaluator not found"
-            )
-        
-        evaluator_member = supabase.table("team_members").select("*").eq("team_id", evaluation_data.team_id).eq("user_id", evaluation_data.evaluator_id).execute()
-        
-        if not evaluator_member.data:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Evaluator is not a member of this team"
-            )
-        
-        # Validate evaluatee exists and is a team member
-        evaluatee = supabase.table("users").select("id").eq("id", evaluation_data.evaluatee_id).execute()
-        
-        if not evaluatee.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Evaluatee not found"
-            )
-        
-        evaluatee_member = supabase.table("team_members").select("*").eq("team_id", evaluation_data.team_id).eq("user_id", evaluation_data.evaluatee_id).execute()
-        
-        if not evaluatee_member.data:
+        for role, user_id in (("Evaluator", evaluation_data.evaluator_id), ("Evaluatee", evaluation_data.evaluatee_id)):
+            if user_id in members or team_membership.recheck(evaluation_data.team_id, user_id):
+                continue
+            # Members always exist; only a failed check needs to tell 404 from 400
+            user = supabase.table("users").select("id").eq("id", user_id).execute()
+            if not user.data:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"{role} not found"
+                )
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Evaluatee is not a member of this team"
+                detail=f"{role} is not a member of this team"
             )
         
         # Prevent self-evaluation
@@ -170,17 +165,6 @@ async def submit_evaluation(evaluation_data: EvaluationSubmit):
                 detail="You have already evaluated this team member for this form"
             )
         
-        # Validate all criteria belong to the form
-        form_criteria = supabase.table("form_criteria").select("id").eq("form_id", evaluation_data.form_id).execute()
-        valid_criterion_ids = [c["id"] for c in form_criteria.data] if form_criteria.data else []
-        
-        for score in evaluation_data.scores:
-            if score.criterion_id not in valid_criterion_ids:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Criterion {score.criterion_id} does not belong to this form"
-                )
-        
         # Create evaluation
         new_evaluation = {
             "form_id": evaluation_data.form_id,
@@ -204,18 +188,35 @@ async def submit_evaluation(evaluation_data: EvaluationSubmit):
         
         # Create scores
         scores_data = []
-        for score in evaluation_data.scores:
-            score_entry = {
-                "evaluation_id": evaluation_id,
-                "criterion_id": score.criterion_id,
-                "score": score.score
-            }
-            score_result = supabase.table("evaluation_scores").insert(score_entry).execute()
-            if score_result.data:
-                scores_data.append(score_result.data[0])
+        try:
+            for score in evaluation_data.scores:
+                score_entry = {
+                    "evaluation_id": evaluation_id,
+                    "criterion_id": score.criterion_id,
+                    "score": score.score
+                }
+                score_result = supabase.table("evaluation_scores").insert(score_entry).execute()
+                if score_result.data:
+                    scores_data.append(score_result.data[0])
+        except Exception as e:
+            # Don't leave a half-written evaluation blocking resubmission
+            supabase.table("evaluations").delete().eq("id", evaluation_id).execute()
+            if getattr(e, "code", None) != "23503":
+                raise
+            # A criterion went away after this worker cached the validator
+            _stale_validator(evaluation_data.form_id, score_pairs, evaluation_data.total_score)
         
         created_evaluation["scores"] = scores_data
         
+        draft_buffer.discard(evaluation_data.form_id, evaluation_data.evaluator_id, evaluation_data.evaluatee_id)
+        usage_counters.evaluation_added(evaluation_data.form_id, [score["criterion_id"] for score in scores_data])
+        report_snapshots.invalidate_for("teams", evaluation_data.team_id)
+        
+        # Notify live progress subscribers
+        project_id = team_membership.project_of(evaluation_data.team_id)
+        event_hub.remember_team(evaluation_data.team_id, project_id)
+        event_hub.publish(project_id, "submit_evaluation", _event_payload(created_evaluation), delta=1)
+        
         return {
             "evaluation": created_evaluation,
             "message": "Evaluation submitted successfully"
@@ -230,6 +231,122 @@ async def submit_evaluation(evaluation_data: EvaluationSubmit):
         )
 
 
+@router.patch("/drafts/{form_id}/{evaluator_id}/{evaluatee_id}")
+async def save_draft(form_id: int, evaluator_id: int, evaluatee_id: int, draft_data: DraftUpdate):
+    """Autosave part of an evaluation draft.
+    
+    Only the given scores (and comments, if set) change. The change is
+    buffered and written to the database in the next batch. It is checked
+    first against the cached form validator and, with ``team_id``, the
+    membership index, so that nothing is acknowledged that the batch would
+    drop; without ``team_id`` the two users are looked up.
+    """
+    if evaluator_id == evaluatee_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cannot evaluate yourself"
+        )
+    try:
+        validator = form_validators.get(form_id)
+        
+        if validator is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Evaluation form not found"
+            )
+        
+        error = validator.partial_error((score.criterion_id, score.score) for score in draft_data.scores)
+        if error:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=error
+            )
+        
+        if draft_data.team_id is not None:
+            members = team_membership.members(draft_data.team_id)
+            
+            if members is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Team not found"
+                )
+            
+            if any(
+                user_id not in members and not team_membership.recheck(draft_data.team_id, user_id)
+                for user_id in (evaluator_id, evaluatee_id)
+            ):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Evaluator and evaluatee must both be members of this team"
+                )
+        else:
+            users = supabase.table("users").select("id").in_("id", [evaluator_id, evaluatee_id]).execute()
+            
+            if len(users.data or []) < 2:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Evaluator or evaluatee not found"
+                )
+        
+        draft = draft_buffer.save(
+            form_id,
+            evaluator_id,
+            evaluatee_id,
+            {score.criterion_id: score.score for score in draft_data.scores},
+            comments=draft_data.comments,
+            team_id=draft_data.team_id,
+        )
+        return {
+            "draft": draft,
+            "message": "Draft saved"
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to save draft: {str(e)}"
+        )
+
+
+@router.get("/drafts/{form_id}/{evaluator_id}/{evaluatee_id}")
+async def get_draft(form_id: int, evaluator_id: int, evaluatee_id: int):
+    """Get an evaluation draft, including changes not yet written."""
+    try:
+        draft = draft_buffer.get(form_id, evaluator_id, evaluatee_id)
+        
+        if draft is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Draft not found"
+            )
+        
+        return draft
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve draft: {str(e)}"
+        )
+
+
+@router.delete("/drafts/{form_id}/{evaluator_id}/{evaluatee_id}")
+async def delete_draft(form_id: int, evaluator_id: int, evaluatee_id: int):
+    """Discard an evaluation draft."""
+    try:
+        draft_buffer.discard(form_id, evaluator_id, evaluatee_id)
+        return {"message": "Draft discarded"}
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to discard draft: {str(e)}"
+        )
+
+
 @router.get("/{evaluation_id}")
 async def get_evaluation(evaluation_id: int):
     """Get detailed evaluation by ID."""
@@ -289,55 +406,64 @@ async def get_evaluation(evaluation_id: int):
 
 @router.put("/{evaluation_id}")
 async def update_evaluation(evaluation_id: int, evaluation_data: EvaluationUpdate):
-    """Update an existing evaluation."""
+    """Update an existing evaluation.
+    
+    The evaluation and its scores are updated in one transaction
+    (``update_evaluation_scores``): only changed scores are written and
+    criteria left out of ``scores`` are removed. New scores or a new total
+    are validated like a submission; ``total_score`` defaults to the sum of
+    new scores.
+    """
     try:
-        # Check if evaluation exists
-        existing = supabase.table("evaluations").select("*").eq("id", evaluation_id).execute()
-        
-        if not existing.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Evaluation not found"
-            )
-        
-        # Build update dict
-        update_data = {}
-        if evaluation_data.total_score is not None:
-            update_data["total_score"] = evaluation_data.total_score
-        if evaluation_data.comments is not None:
-            update_data["comments"] = evaluation_data.comments
-        
-        # Update evaluation if there are changes
-        if update_data:
-            result = supabase.table("evaluations").update(update_data).eq("id", evaluation_id).execute()
+        scores = None
+        total_score = evaluation_data.total_score
+        if evaluation_data.scores is not None or total_score is not None:
+            existing = supabase.table("evaluations").select("id, form_id").eq("id", evaluation_id).execute()
             
-            if not result.data:
+            if not existing.data:
                 raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="Failed to update evaluation"
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Evaluation not found"
                 )
-        
-        # Update scores if provided
-        if evaluation_data.scores is not None:
-            # Delete existing scores
-            supabase.table("evaluation_scores").delete().eq("evaluation_id", evaluation_id).execute()
             
-            # Insert new scores
-            for score in evaluation_data.scores:
-                score_entry = {
-                    "evaluation_id": evaluation_id,
-                    "criterion_id": score.criterion_id,
-                    "score": score.score
-                }
-                supabase.table("evaluation_scores").insert(score_entry).execute()
+            form_id = existing.data[0]["form_id"]
+            if evaluation_data.scores is not None:
+                score_pairs = [(score.criterion_id, score.score) for score in evaluation_data.scores]
+                if total_score is None:
+                    total_score = sum(score for _, score in score_pairs)
+                scores = [{"criterion_id": criterion_id, "score": score} for criterion_id, score in score_pairs]
+            else:
+                stored = supabase.table("evaluation_scores").select("criterion_id, score").eq("evaluation_id", evaluation_id).execute()
+                score_pairs = [(score["criterion_id"], score["score"]) for score in stored.data or []]
+            _check_scores(form_id, score_pairs, total_score)
+        
+        try:
+            result = supabase.rpc("update_evaluation_scores", {
+                "p_evaluation_id": evaluation_id,
+                "p_total_score": total_score,
+                "p_comments": evaluation_data.comments,
+                "p_scores": scores,
+            }).execute()
+        except Exception as e:
+            # The function rolled back; a criterion went away after the validator was cached
+            if scores is None or getattr(e, "code", None) != "23503":
+                raise
+            _stale_validator(form_id, score_pairs, total_score)
+        
+        evaluation = result.data
+        if not evaluation:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Evaluation not found"
+            )
         
-        # Get updated evaluation
-        updated = supabase.table("evaluations").select("*").eq("id", evaluation_id).execute()
-        evaluation = updated.data[0] if updated.data else {}
+        if scores is not None:
+            usage_counters.forget_form(evaluation["form_id"], keep_form=True)
+        report_snapshots.invalidate_for("teams", evaluation["team_id"])
         
-        # Get scores
-        scores = supabase.table("evaluation_scores").select("*").eq("evaluation_id", evaluation_id).execute()
-        evaluation["scores"] = scores.data if scores.data else []
+        # Notify live progress subscribers
+        project_id = event_hub.project_for_team(evaluation["team_id"])
+        event_hub.publish(project_id, "update_evaluation", _event_payload(evaluation))
         
         return {
             "evaluation": evaluation,
@@ -357,21 +483,19 @@ async def update_evaluation(evaluation_id: int, evaluation_data: EvaluationUpdat
 async def delete_evaluation(evaluation_id: int):
     """Delete an evaluation."""
     try:
-        # Check if evaluation exists
-        existing = supabase.table("evaluations").select("*").eq("id", evaluation_id).execute()
+        # Delete evaluation (cascade will handle scores)
+        deleted = delete_one("evaluations", "Evaluation not found", id=evaluation_id)
         
-        if not existing.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Evaluation not found"
-            )
+        usage_counters.evaluation_removed(deleted["form_id"])
+        report_snapshots.invalidate_for("teams", deleted["team_id"])
         
-        # Delete evaluation (cascade will handle scores)
-        result = supabase.table("evaluations").delete().eq("id", evaluation_id).execute()
+        # Notify live progress subscribers
+        project_id = event_hub.project_for_team(deleted["team_id"])
+        event_hub.publish(project_id, "delete_evaluation", _event_payload(deleted), delta=-1)
         
         return {
             "message": f"Evaluation {evaluation_id} deleted successfully",
-            "deleted_evaluation": existing.data[0]
+            "deleted_evaluation": deleted
         }
         
     except HTTPException:
@@ -381,3 +505,44 @@ async def delete_evaluation(evaluation_id: int):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to delete evaluation: {str(e)}"
         )
+
+
+# Helper function for live progress events
+def _check_scores(form_id: int, scores: List[Tuple[int, int]], total_score: int) -> None:
+    """Raise 404 if the form does not exist, 400 if the scores do not fit it."""
+    validator = form_validators.get(form_id)
+    
+    if validator is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Evaluation form not found"
+        )
+    
+    error = validator.error(scores, total_score)
+    if error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=error
+        )
+
+
+def _stale_validator(form_id: int, scores: List[Tuple[int, int]], total_score: int) -> None:
+    """After a score was refused by its foreign key: re-validate against the form as it is now."""
+    form_validators.invalidate(form_id)
+    _check_scores(form_id, scores, total_score)
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="The evaluation form changed while saving; please retry"
+    )
+
+
+def _event_payload(evaluation: dict) -> dict:
+    """Select the fields of an evaluation that are broadcast to subscribers."""
+    return {
+        "evaluation_id": evaluation.get("id"),
+        "form_id": evaluation.get("form_id"),
+        "team_id": evaluation.get("team_id"),
+        "evaluator_id": evaluation.get("evaluator_id"),
+        "evaluatee_id": evaluation.get("evaluatee_id"),
+        "submitted_at": evaluation.get("submitted_at"),
+    }
@@ -0,0 +1,172 @@
+"""Streaming export routes (NDJSON / CSV) for LMS integration."""
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Dict, Optional
+
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import text
+
+from app.core.supabase import supabase
+from app.core.responses import FastJSONRoute
+from app.db import engine
+
+router = APIRouter(prefix="/exports", tags=["exports"], route_class=FastJSONRoute)
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Rows are fetched from a server-side cursor in batches of this size and
+# written to the client in chunks of roughly CHUNK_BYTES.
+FETCH_SIZE = 1000
+CHUNK_BYTES = 64 * 1024
+
+CSV_COLUMNS = [
+    "id", "project_id", "form_id", "form_title", "team_id", "team_name",
+    "evaluator_id", "evaluator_name", "evaluator_email",
+    "evaluatee_id", "evaluatee_name", "evaluatee_email",
+    "total_score", "comments", "submitted_at", "scores",
+]
+
+EXPORT_QUERY = """
+    SELECT e.id, t.project_id, e.form_id, f.title AS form_title,
+           e.team_id, t.name AS team_name,
+           e.evaluator_id, ev.name AS evaluator_name, ev.email AS evaluator_email,
+           e.evaluatee_id, ee.name AS evaluatee_name, ee.email AS evaluatee_email,
+           e.total_score, e.comments, e.submitted_at,
+           COALESCE((
+               SELECT json_agg(json_build_object(
+                          'criterion_id', s.criterion_id,
+                          'criterion', c.text,
+                          'max_points', c.max_points,
+                          'score', s.score
+                      ) ORDER BY c.order_index)
+               FROM evaluation_scores s
+               JOIN form_criteria c ON c.id = s.criterion_id
+               WHERE s.evaluation_id = e.id
+           ), '[]'::json) AS scores
+    FROM evaluations e
+    LEFT JOIN evaluation_forms f ON f.id = e.form_id
+    LEFT JOIN teams t ON t.id = e.team_id
+    LEFT JOIN users ev ON ev.id = e.evaluator_id
+    LEFT JOIN users ee ON ee.id = e.evaluatee_id
+    {where}
+    ORDER BY e.submitted_at DESC
+"""
+
+
+@router.get("/evaluations")
+async def export_evaluations(
+    form_id: Optional[int] = None,
+    team_id: Optional[int] = None,
+    evaluator_id: Optional[int] = None,
+    evaluatee_id: Optional[int] = None,
+    format: str = "ndjson"
+):
+    """Stream evaluations (with scores) as NDJSON or CSV, filtered like list_evaluations."""
+    _check_format(format)
+
+    filters = {}
+    # Apply filters if provided
+    if form_id:
+        filters["form_id"] = form_id
+    if team_id:
+        filters["team_id"] = team_id
+    if evaluator_id:
+        filters["evaluator_id"] = evaluator_id
+    if evaluatee_id:
+        filters["evaluatee_id"] = evaluatee_id
+
+    return _export_response(filters, format, "evaluations")
+
+
+@router.get("/project/{project_id}")
+async def export_project(project_id: int, format: str = "ndjson"):
+    """Stream every evaluation of a project's teams as NDJSON or CSV."""
+    _check_format(format)
+
+    try:
+        # Verify project exists before starting the stream
+        project = supabase.table("projects").select("id").eq("id", project_id).execute()
+
+        if not project.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Project not found"
+            )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to export project: {str(e)}"
+        )
+
+    return _export_response({"project_id": project_id}, format, f"project_{project_id}_evaluations")
+
+
+# Helper functions
+def _check_format(format: str) -> None:
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported export format '{format}'. Use one of: {', '.join(EXPORT_FORMATS)}"
+        )
+
+
+def _export_response(filters: Dict[str, int], format: str, filename: str) -> StreamingResponse:
+    if engine is None:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Streaming exports require a Postgres database (ASYNC_DATABASE_URL)"
+        )
+    return StreamingResponse(
+        _encode(_stream_rows(filters), format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'},
+    )
+
+
+async def _stream_rows(filters: Dict[str, int]) -> AsyncIterator[Dict[str, Any]]:
+    """Yield export rows one at a time from a server-side cursor."""
+    columns = {"project_id": "t.project_id"}
+    where = " AND ".join(f"{columns.get(name, 'e.' + name)} = :{name}" for name in filters)
+    query = text(EXPORT_QUERY.format(where=f"WHERE {where}" if where else ""))
+
+    async with engine.connect() as conn:
+        result = await conn.stream(query, filters, execution_options={"yield_per": FETCH_SIZE})
+        async for row in result.mappings():
+            yield dict(row)
+
+
+async def _encode(rows: AsyncIterator[Dict[str, Any]], format: str) -> AsyncIterator[bytes]:
+    """Serialize rows and group them into chunks of roughly CHUNK_BYTES."""
+    buffer = io.StringIO()
+    writer = None
+    if format == "csv":
+        writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+
+    async for row in rows:
+        scores = row.get("scores")
+        if isinstance(scores, str):
+            scores = json.loads(scores)
+        if writer is not None:
+            row["scores"] = json.dumps(scores)
+            writer.writerow(row)
+        else:
+            row["scores"] = scores
+            buffer.write(json.dumps(row, default=str))
+            buffer.write("\n")
+
+        if buffer.tell() >= CHUNK_BYTES:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
@@ -4,9 +4,14 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import List, Optional
 from app.db import get_db
+from app.db.mutations import delete_one, update_one
 from app.core.supabase import supabase
+from app.core.responses import FastJSONRoute
+from app.services.snapshots import report_snapshots
+from app.services.usage import count_where, exists_where, usage_counters
+from app.services.validators import form_validators
 
-router = APIRouter(prefix="/forms", tags=["forms"])
+router = APIRouter(prefix="/forms", tags=["forms"], route_class=FastJSONRoute)
 
 
 # Pydantic models
@@ -135,6 +140,9 @@ async def create_form(form_data: FormCreate):
         
         created_form["criteria"] = criteria_data
         
+        if report_snapshots.has_project(form_data.project_id):
+            report_snapshots.invalidate_project(form_data.project_id)
+        
         return {
             "form": created_form,
             "message": f"Evaluation form created successfully with {len(criteria_data)} criteria"
@@ -172,9 +180,11 @@ async def get_form(form_id: int):
         criteria = supabase.table("form_criteria").select("*").eq("form_id", form_id).order("order_index").execute()
         form["criteria"] = criteria.data if criteria.data else []
         
-        # Get usage statistics
-        evaluations = supabase.table("evaluations").select("id").eq("form_id", form_id).execute()
-        form["usage_count"] = len(evaluations.data) if evaluations.data else 0
+        # Get usage statistics (cached counts, not rows)
+        form["usage_count"] = usage_counters.form_usage(form_id)
+        criteria_usage = usage_counters.criteria_usage(form_id, [criterion["id"] for criterion in form["criteria"]])
+        for criterion in form["criteria"]:
+            criterion["usage_count"] = criteria_usage[criterion["id"]]
         
         return {
             "form": form,
@@ -194,15 +204,6 @@ async def get_form(form_id: int):
 async def update_form(form_id: int, form_data: FormUpdate):
     """Update evaluation form details (not criteria)."""
     try:
-        # Check if form exists
-        existing = supabase.table("evaluation_forms").select("*").eq("id", form_id).execute()
-        
-        if not existing.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Evaluation form not found"
-            )
-        
         # Build update dict
         update_data = {}
         if form_data.title is not None:
@@ -219,16 +220,12 @@ async def update_form(form_id: int, form_data: FormUpdate):
             )
         
         # Update form
-        result = supabase.table("evaluation_forms").update(update_data).eq("id", form_id).execute()
+        updated_form = update_one("evaluation_forms", update_data, "Evaluation form not found", id=form_id)
         
-        if not result.data:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to update form"
-            )
+        report_snapshots.invalidate_for("forms", form_id)
+        form_validators.invalidate(form_id)
         
         # Get updated form with criteria
-        updated_form = result.data[0]
         criteria = supabase.table("form_criteria").select("*").eq("form_id", form_id).order("order_index").execute()
         updated_form["criteria"] = criteria.data if criteria.data else []
         
@@ -250,30 +247,24 @@ async def update_form(form_id: int, form_data: FormUpdate):
 async def delete_form(form_id: int):
     """Delete an evaluation form and all its criteria."""
     try:
-        # Check if form exists
-        existing = supabase.table("evaluation_forms").select("*").eq("id", form_id).execute()
-        
-        if not existing.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Evaluation form not found"
-            )
-        
-        # Check if form is being used in evaluations
-        evaluations = supabase.table("evaluations").select("id").eq("form_id", form_id).execute()
-        
-        if evaluations.data:
+        # Check if form is being used in evaluations (counted only when it is)
+        if exists_where("evaluations", form_id=form_id):
+            count = count_where("evaluations", form_id=form_id)
+            usage_counters.set_form(form_id, count)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Cannot delete form. It is being used in {len(evaluations.data)} evaluation(s)"
+                detail=f"Cannot delete form. It is being used in {count} evaluation(s)"
             )
         
         # Delete form (cascade will handle criteria)
-        result = supabase.table("evaluation_forms").delete().eq("id", form_id).execute()
+        deleted = delete_one("evaluation_forms", "Evaluation form not found", id=form_id)
+        report_snapshots.invalidate_for("forms", form_id)
+        form_validators.invalidate(form_id)
+        usage_counters.forget_form(form_id)
         
         return {
             "message": f"Evaluation form {form_id} deleted successfully",
-            "deleted_form": existing.data[0]
+            "deleted_form": deleted
         }
         
     except HTTPException:
@@ -314,6 +305,9 @@ async def add_criterion(form_id: int, criterion_data: FormCriterion):
                 detail="Failed to add criterion"
             )
         
+        report_snapshots.invalidate_for("forms", form_id)
+        form_validators.invalidate(form_id)
+        
         return {
             "criterion": result.data[0],
             "message": "Criterion added successfully"
@@ -332,15 +326,6 @@ async def add_criterion(form_id: int, criterion_data: FormCriterion):
 async def update_criterion(form_id: int, criterion_id: int, criterion_data: CriterionUpdate):
     """Update a specific criterion."""
     try:
-        # Verify criterion exists and belongs to form
-        existing = supabase.table("form_criteria").select("*").eq("id", criterion_id).eq("form_id", form_id).execute()
-        
-        if not existing.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Criterion not found or does not belong to this form"
-            )
-        
         # Build update dict
         update_data = {}
         if criterion_data.text is not None:
@@ -356,17 +341,17 @@ async def update_criterion(form_id: int, criterion_id: int, criterion_data: Crit
                 detail="No fields provided for update"
             )
         
-        # Update criterion
-        result = supabase.table("form_criteria").update(update_data).eq("id", criterion_id).execute()
+        # Update criterion (only if it belongs to this form)
+        criterion = update_one(
+            "form_criteria", update_data, "Criterion not found or does not belong to this form",
+            id=criterion_id, form_id=form_id,
+        )
         
-        if not result.data:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to update criterion"
-            )
+        report_snapshots.invalidate_for("forms", form_id)
+        form_validators.invalidate(form_id)
         
         return {
-            "criterion": result.data[0],
+            "criterion": criterion,
             "message": "Criterion updated successfully"
         }
         
@@ -383,30 +368,27 @@ async def update_criterion(form_id: int, criterion_id: int, criterion_data: Crit
 async def delete_criterion(form_id: int, criterion_id: int):
     """Delete a criterion from a form."""
     try:
-        # Verify criterion exists and belongs to form
-        existing = supabase.table("form_criteria").select("*").eq("id", criterion_id).eq("form_id", form_id).execute()
-        
-        if not existing.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Criterion not found or does not belong to this form"
-            )
-        
-        # Check if criterion is being used in evaluation scores
-        scores = supabase.table("evaluation_scores").select("id").eq("criterion_id", criterion_id).execute()
-        
-        if scores.data:
+        # Check if criterion is being used in evaluation scores (counted only when it is)
+        if exists_where("evaluation_scores", criterion_id=criterion_id):
+            count = count_where("evaluation_scores", criterion_id=criterion_id)
+            usage_counters.set_criterion(criterion_id, form_id, count)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Cannot delete criterion. It is being used in {len(scores.data)} evaluation score(s)"
+                detail=f"Cannot delete criterion. It is being used in {count} evaluation score(s)"
             )
         
-        # Delete criterion
-        result = supabase.table("form_criteria").delete().eq("id", criterion_id).execute()
+        # Delete criterion (only if it belongs to this form)
+        deleted = delete_one(
+            "form_criteria", "Criterion not found or does not belong to this form",
+            id=criterion_id, form_id=form_id,
+        )
+        report_snapshots.invalidate_for("forms", form_id)
+        form_validators.invalidate(form_id)
+        usage_counters.forget_criterion(criterion_id)
         
         return {
             "message": f"Criterion {criterion_id} deleted successfully",
-            "deleted_criterion": existing.data[0]
+            "deleted_criterion": deleted
         }
         
     except HTTPException:
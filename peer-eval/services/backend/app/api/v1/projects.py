@@ -1,13 +1,22 @@
 """Project management routes."""
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from datetime import date
 from typing import Optional
 from app.db import get_db
+from app.db.mutations import delete_one, update_one
 from app.core.supabase import supabase
+from app.core.responses import FastJSONRoute
+from app.services.events import event_hub
+from app.services.jobs import JobQueueFull, report_jobs
+from app.services.membership import team_membership
+from app.services.snapshots import materialize_project, report_snapshots
+from app.services.usage import usage_counters
+from app.services.validators import form_validators
 
-router = APIRouter(prefix="/projects", tags=["projects"])
+router = APIRouter(prefix="/projects", tags=["projects"], route_class=FastJSONRoute)
 
 
 # Pydantic models
@@ -165,19 +174,40 @@ async def get_project(project_id: int):
         )
 
 
-@router.put("/{project_id}")
-async def update_project(project_id: int, project_data: ProjectUpdate):
-    """Update project details."""
+@router.get("/{project_id}/events")
+async def stream_project_events(project_id: int):
+    """Stream live submission progress for a project as Server-Sent Events."""
     try:
-        # Check if project exists
-        existing = supabase.table("projects").select("*").eq("id", project_id).execute()
+        project = supabase.table("projects").select("id").eq("id", project_id).execute()
         
-        if not existing.data:
+        if not project.data:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Project not found"
             )
         
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to open event stream: {str(e)}"
+        )
+    
+    return StreamingResponse(
+        event_hub.subscribe(project_id),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+@router.put("/{project_id}")
+async def update_project(project_id: int, project_data: ProjectUpdate):
+    """Update project details."""
+    try:
         # Build update dict (only include provided fields)
         update_data = {}
         if project_data.title is not None:
@@ -198,16 +228,18 @@ async def update_project(project_id: int, project_data: ProjectUpdate):
             )
         
         # Update project
-        result = supabase.table("projects").update(update_data).eq("id", project_id).execute()
+        project = update_one("projects", update_data, "Project not found", id=project_id)
         
-        if not result.data:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to update project"
-            )
+        # Freeze reports once a project is closed; drop them if it is reopened
+        report_snapshots.invalidate_project(project_id)
+        if project.get("status") != "active" and report_snapshots.enabled:
+            try:
+                report_jobs.submit("project_snapshot", {"project_id": project_id}, materialize_project, project_id)
+            except JobQueueFull:
+                pass  # reports are computed live until the next update
         
         return {
-            "project": result.data[0],
+            "project": project,
             "message": "Project updated successfully"
         }
         
@@ -224,21 +256,16 @@ async def update_project(project_id: int, project_data: ProjectUpdate):
 async def delete_project(project_id: int):
     """Delete a project."""
     try:
-        # Check if project exists
-        existing = supabase.table("projects").select("*").eq("id", project_id).execute()
-        
-        if not existing.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Project not found"
-            )
-        
         # Delete project (cascade will handle related records)
-        result = supabase.table("projects").delete().eq("id", project_id).execute()
+        deleted = delete_one("projects", "Project not found", id=project_id)
+        report_snapshots.invalidate_project(project_id)
+        usage_counters.clear()  # evaluations went with it by cascade
+        form_validators.clear()  # and its forms
+        team_membership.invalidate_project(project_id)  # and its teams
         
         return {
             "message": f"Project {project_id} deleted successfully",
-            "deleted_project": existing.data[0]
+            "deleted_project": deleted
         }
         
     except HTTPException:
@@ -3,15 +3,23 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db import get_db
 from app.core.supabase import supabase
+from app.core.responses import FastJSONRoute
+from app.services.jobs import JobQueueFull, report_jobs
+from app.services.snapshots import report_snapshots
 from collections import defaultdict
 
-router = APIRouter(prefix="/reports", tags=["reports"])
+router = APIRouter(prefix="/reports", tags=["reports"], route_class=FastJSONRoute)
 
 
 @router.get("/project/{project_id}")
 async def get_project_report(project_id: int):
     """Get comprehensive evaluation report for a project."""
     try:
+        # Closed projects are served from their frozen snapshot
+        snapshot = report_snapshots.read("projects", project_id)
+        if snapshot is not None:
+            return snapshot
+        
         # Verify project exists
         project = supabase.table("projects").select("*").eq("id", project_id).execute()
         
@@ -72,10 +80,68 @@ async def get_project_report(project_id: int):
         )
 
 
+@router.post("/project/{project_id}/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def enqueue_project_report(project_id: int):
+    """Queue a project report to be generated in the background."""
+    try:
+        # Verify project exists before queueing work
+        project = supabase.table("projects").select("id").eq("id", project_id).execute()
+        
+        if not project.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Project not found"
+            )
+        
+        job = report_jobs.submit("project_report", {"project_id": project_id}, get_project_report, project_id)
+        
+        return {
+            "job": job,
+            "status_url": f"/api/v1/reports/jobs/{job['id']}",
+            "message": "Project report queued"
+        }
+        
+    except JobQueueFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Report queue is full: {str(e)}",
+            headers={"Retry-After": "30"}
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to queue project report: {str(e)}"
+        )
+
+
+@router.get("/jobs/{job_id}")
+async def get_report_job(job_id: str):
+    """Get the status (and result, once finished) of a background report job."""
+    job = report_jobs.get(job_id)
+    
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Report job not found or expired"
+        )
+    
+    return {
+        "job": job,
+        "message": f"Report job {job['status']}"
+    }
+
+
 @router.get("/team/{team_id}")
 async def get_team_report(team_id: int):
     """Get detailed evaluation report for a specific team."""
     try:
+        # Teams of closed projects are served from their frozen snapshot
+        snapshot = report_snapshots.read("teams", team_id)
+        if snapshot is not None:
+            return snapshot
+        
         # Verify team exists
         team = supabase.table("teams").select("*").eq("id", team_id).execute()
         
@@ -105,6 +171,11 @@ async def get_team_report(team_id: int):
 async def get_user_report(user_id: int):
     """Get evaluation report for a specific user across all their teams."""
     try:
+        # Users whose teams are all closed are served from their frozen snapshot
+        snapshot = report_snapshots.read("users", user_id)
+        if snapshot is not None:
+            return snapshot
+        
         # Verify user exists
         user = supabase.table("users").select("*").eq("id", user_id).execute()
         
@@ -197,6 +268,11 @@ async def get_user_report(user_id: int):
 async def get_form_report(form_id: int):
     """Get statistical report for a specific evaluation form."""
     try:
+        # Forms of closed projects are served from their frozen snapshot
+        snapshot = report_snapshots.read("forms", form_id)
+        if snapshot is not None:
+            return snapshot
+        
         # Get form details
         form = supabase.table("evaluation_forms").select("*").eq("id", form_id).execute()
         
@@ -4,9 +4,14 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import List, Optional
 from app.db import get_db
+from app.db.mutations import delete_one, update_one
 from app.core.supabase import supabase
+from app.core.responses import FastJSONRoute
+from app.services.membership import team_membership
+from app.services.snapshots import report_snapshots
+from app.services.usage import usage_counters
 
-router = APIRouter(prefix="/teams", tags=["teams"])
+router = APIRouter(prefix="/teams", tags=["teams"], route_class=FastJSONRoute)
 
 
 # Pydantic models
@@ -133,6 +138,12 @@ async def create_team(team_data: TeamCreate):
                 team_members.append(user.data[0])
         
         created_team["members"] = team_members
+        team_membership.team_created(team_id, team_data.project_id, [member["user_id"] for member in members])
+        
+        # A new team or new memberships make existing report snapshots stale
+        if report_snapshots.has_project(team_data.project_id):
+            report_snapshots.invalidate_project(team_data.project_id)
+        report_snapshots.discard("users", team_data.member_ids)
         
         return {
             "team": created_team,
@@ -195,25 +206,18 @@ async def get_team(team_id: int):
 async def update_team(team_id: int, team_data: TeamUpdate):
     """Update team details and/or members."""
     try:
-        # Check if team exists
-        existing = supabase.table("teams").select("*").eq("id", team_id).execute()
-        
-        if not existing.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Team not found"
-            )
-        
-        # Update team name if provided
+        # Update team name if provided (this also tells whether the team exists)
         if team_data.name is not None:
-            update_data = {"name": team_data.name}
-            result = supabase.table("teams").update(update_data).eq("id", team_id).execute()
+            team = update_one("teams", {"name": team_data.name}, "Team not found", id=team_id)
+        else:
+            existing = supabase.table("teams").select("*").eq("id", team_id).execute()
             
-            if not result.data:
+            if not existing.data:
                 raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="Failed to update team"
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Team not found"
                 )
+            team = existing.data[0]
         
         # Update members if provided
         if team_data.member_ids is not None:
@@ -243,10 +247,11 @@ async def update_team(team_id: int, team_data: TeamUpdate):
                     "user_id": user_id
                 }
                 supabase.table("team_members").insert(member_data).execute()
+            
+            team_membership.replace(team_id, team_data.member_ids)
+            report_snapshots.discard("users", team_data.member_ids)
         
-        # Get updated team with members
-        updated_team = supabase.table("teams").select("*").eq("id", team_id).execute()
-        team = updated_team.data[0] if updated_team.data else {}
+        report_snapshots.invalidate_for("teams", team_id)
         
         # Get members
         members_data = supabase.table("team_members").select("*").eq("team_id", team_id).execute()
@@ -275,21 +280,15 @@ async def update_team(team_id: int, team_data: TeamUpdate):
 async def delete_team(team_id: int):
     """Delete a team and all its members."""
     try:
-        # Check if team exists
-        existing = supabase.table("teams").select("*").eq("id", team_id).execute()
-        
-        if not existing.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Team not found"
-            )
-        
         # Delete team (cascade will handle team_members)
-        result = supabase.table("teams").delete().eq("id", team_id).execute()
+        deleted = delete_one("teams", "Team not found", id=team_id)
+        team_membership.team_deleted(team_id)
+        report_snapshots.invalidate_for("teams", team_id)
+        usage_counters.clear()  # evaluations went with it by cascade
         
         return {
             "message": f"Team {team_id} deleted successfully",
-            "deleted_team": existing.data[0]
+            "deleted_team": deleted
         }
         
     except HTTPException:
@@ -305,10 +304,10 @@ async def delete_team(team_id: int):
 async def add_team_member(team_id: int, member_data: MemberAdd):
     """Add a single member to an existing team."""
     try:
-        # Verify team exists
-        team = supabase.table("teams").select("*").eq("id", team_id).execute()
+        # Verify team exists (in-process index)
+        members = team_membership.members(team_id)
         
-        if not team.data:
+        if members is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Team not found"
@@ -329,10 +328,8 @@ async def add_team_member(team_id: int, member_data: MemberAdd):
                 detail="User must be a student to join a team"
             )
         
-        # Check if already a member
-        existing_member = supabase.table("team_members").select("*").eq("team_id", team_id).eq("user_id", member_data.user_id).execute()
-        
-        if existing_member.data:
+        # Check if already a member (the unique constraint catches a member the index has not seen)
+        if member_data.user_id in members and team_membership.recheck(team_id, member_data.user_id):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="User is already a member of this team"
@@ -344,7 +341,16 @@ async def add_team_member(team_id: int, member_data: MemberAdd):
             "user_id": member_data.user_id
         }
         
-        result = supabase.table("team_members").insert(new_member).execute()
+        try:
+            result = supabase.table("team_members").insert(new_member).execute()
+        except Exception as e:
+            if getattr(e, "code", None) != "23505":  # UNIQUE(team_id, user_id)
+                raise
+            team_membership.add(team_id, [member_data.user_id])
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="User is already a member of this team"
+            )
         
         if not result.data:
             raise HTTPException(
@@ -352,6 +358,10 @@ async def add_team_member(team_id: int, member_data: MemberAdd):
                 detail="Failed to add member"
             )
         
+        team_membership.add(team_id, [member_data.user_id])
+        report_snapshots.invalidate_for("teams", team_id)
+        report_snapshots.discard("users", [member_data.user_id])
+        
         # Get user details
         user_details = supabase.table("users").select("id, name, email, role").eq("id", member_data.user_id).execute()
         
@@ -373,26 +383,12 @@ async def add_team_member(team_id: int, member_data: MemberAdd):
 async def remove_team_member(team_id: int, user_id: int):
     """Remove a member from a team."""
     try:
-        # Check if team exists
-        team = supabase.table("teams").select("*").eq("id", team_id).execute()
-        
-        if not team.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Team not found"
-            )
-        
-        # Check if user is a member
-        member = supabase.table("team_members").select("*").eq("team_id", team_id).eq("user_id", user_id).execute()
-        
-        if not member.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User is not a member of this team"
-            )
-        
-        # Remove member
-        result = supabase.table("team_members").delete().eq("team_id", team_id).eq("user_id", user_id).execute()
+        # Remove member (no such team means no such membership either). The
+        # delete itself is the check: a stale index must not refuse a removal.
+        delete_one("team_members", "User is not a member of this team", team_id=team_id, user_id=user_id)
+        team_membership.remove(team_id, user_id)
+        report_snapshots.invalidate_for("teams", team_id)
+        report_snapshots.discard("users", [user_id])
         
         return {
             "message": f"User {user_id} removed from team {team_id} successfully"
@@ -3,9 +3,15 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, EmailStr
 from app.db import get_db
+from app.db.mutations import delete_one, update_one
 from app.core.supabase import supabase
+from app.core.responses import FastJSONRoute
+from app.core.passwords import passwords
+from app.services.membership import team_membership
+from app.services.snapshots import report_snapshots
+from app.services.usage import usage_counters
 
-router = APIRouter(prefix="/users", tags=["users"])
+router = APIRouter(prefix="/users", tags=["users"], route_class=FastJSONRoute)
 
 
 # Pydantic models for request/response
@@ -70,9 +76,9 @@ async def create_user(user: UserCreate):
             "role": user.role
         }
         
-        # Add password hash if provided (in production, hash this!)
+        # Add password hash if provided
         if user.password:
-            user_data["password_hash"] = user.password  # TODO: Hash this with bcrypt
+            user_data["password_hash"] = await passwords.hash(user.password)
         
         # Insert into Supabase
         response = supabase.table("users").insert(user_data).execute()
@@ -103,14 +109,13 @@ async def update_user(user_id: int, name: str = None, email: str = None, role: s
         if not update_data:
             raise HTTPException(status_code=400, detail="No fields to update")
         
-        response = supabase.table("users").update(update_data).eq("id", user_id).execute()
+        user = update_one("users", update_data, f"User {user_id} not found", id=user_id)
         
-        if not response.data:
-            raise HTTPException(status_code=404, detail=f"User {user_id} not found")
+        report_snapshots.discard("users", [user_id])
         
         return {
             "success": True,
-            "data": response.data[0],
+            "data": user,
             "message": "User updated successfully"
         }
     except HTTPException:
@@ -123,11 +128,16 @@ async def update_user(user_id: int, name: str = None, email: str = None, role: s
 async def delete_user(user_id: int):
     """Delete a user using Supabase."""
     try:
-        response = supabase.table("users").delete().eq("id", user_id).execute()
+        delete_one("users", f"User {user_id} not found", id=user_id)
+        report_snapshots.discard("users", [user_id])
+        team_membership.user_deleted(user_id)
+        usage_counters.clear()  # evaluations went with it by cascade
         
         return {
             "success": True,
             "message": f"User {user_id} deleted successfully"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,127 @@
+"""Command-line tools for the backend.
+
+Run from ``services/backend``::
+
+    python -m app.cli export-scores --output exports/term --format parquet
+    python -m app.cli generate --scale term --format sql --output seed/term.sql
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from dataclasses import replace
+
+
+def _export_scores(args: argparse.Namespace) -> int:
+    from app.services.analytics_export import AnalyticsExportError, export_scores
+
+    try:
+        summary = asyncio.run(export_scores(
+            args.output,
+            project_id=args.project_id,
+            format=args.format,
+            batch_size=args.batch_size,
+        ))
+    except AnalyticsExportError as e:
+        print(f"✗ {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+def _generate(args: argparse.Namespace) -> int:
+    from app.services import datagen
+
+    overrides = {
+        field: getattr(args, field)
+        for field in ("projects", "teams_per_project", "instructors", "forms_per_project", "late_fraction")
+        if getattr(args, field) is not None
+    }
+    if args.team_size:
+        overrides["team_size_min"], overrides["team_size_max"] = args.team_size
+    if args.criteria:
+        overrides["criteria_min"], overrides["criteria_max"] = args.criteria
+    dataset = datagen.SyntheticDataset(
+        replace(datagen.SCALES[args.scale], **overrides), args.seed, args.password_rounds,
+    )
+    print(json.dumps(dataset.summary(), indent=2), file=sys.stderr)
+
+    def progress(table: str, rows: int, seconds: float) -> None:
+        print(f"  {table:<18} {rows:>10,} rows  {seconds:6.2f} s", file=sys.stderr, flush=True)
+
+    started = time.perf_counter()
+    if args.format == "copy":
+        from app.core.config import settings
+
+        dsn = args.output or settings.DATABASE_URL
+        if not dsn:
+            print("✗ --output (a database URL) or DATABASE_URL is required for --format copy", file=sys.stderr)
+            return 1
+        asyncio.run(datagen.copy_to_database(
+            dataset, dsn, truncate=args.truncate, batch_size=args.batch_size, progress=progress,
+        ))
+    elif not args.output:
+        print(f"✗ --output is required for --format {args.format}", file=sys.stderr)
+        return 1
+    elif args.format == "csv":
+        datagen.write_csv(dataset, args.output, progress=progress)
+    elif args.format == "sql":
+        datagen.write_sql(dataset, args.output, truncate=args.truncate, progress=progress)
+    else:
+        datagen.write_json(dataset, args.output, progress=progress)
+    print(f"Generated in {time.perf_counter() - started:.1f} s", file=sys.stderr)
+    return 0
+
+
+def _int_range(value: str):
+    low, _, high = value.partition("-")
+    try:
+        bounds = int(low), int(high or low)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected N or MIN-MAX, got '{value}'")
+    if not 1 <= bounds[0] <= bounds[1]:
+        raise argparse.ArgumentTypeError(f"expected 1 <= MIN <= MAX, got '{value}'")
+    return bounds
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Peer Evaluation backend tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export-scores", help="export evaluation scores to Parquet/Arrow files")
+    export.add_argument("--output", required=True, help="output directory (partitioned by project and form)")
+    export.add_argument("--project-id", type=int, help="only export this project")
+    export.add_argument("--format", choices=["parquet", "arrow"], default="parquet")
+    export.add_argument("--batch-size", type=int, default=100_000, help="rows per record batch")
+    export.set_defaults(handler=_export_scores)
+
+    generate = commands.add_parser("generate", help="generate a synthetic dataset for load and soak testing")
+    generate.add_argument("--scale", choices=["small", "course", "term"], default="course", help="size preset")
+    generate.add_argument("--seed", type=int, default=42, help="same seed and options give the same rows")
+    generate.add_argument("--format", choices=["csv", "sql", "json", "copy"], default="sql",
+                          help="csv directory, psql COPY script, MEMORY_SEED_FILE json, or COPY into a database")
+    generate.add_argument("--output", help="file or directory; for copy, the database URL (default DATABASE_URL)")
+    generate.add_argument("--projects", type=int)
+    generate.add_argument("--teams-per-project", type=int)
+    generate.add_argument("--team-size", type=_int_range, help="N or MIN-MAX members per team")
+    generate.add_argument("--criteria", type=_int_range, help="N or MIN-MAX criteria per form")
+    generate.add_argument("--forms-per-project", type=int)
+    generate.add_argument("--instructors", type=int)
+    generate.add_argument("--late-fraction", type=float, help="share of submissions after the deadline")
+    generate.add_argument("--password-rounds", type=int, default=12,
+                          help="bcrypt cost of the users' password hashes (match PASSWORD_HASH_ROUNDS)")
+    generate.add_argument("--truncate", action="store_true", help="empty the tables first (sql and copy)")
+    generate.add_argument("--batch-size", type=int, default=50_000, help="rows per COPY batch (copy)")
+    generate.set_defaults(handler=_generate)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""Admission control: per-user rate limits and a cap on concurrent reports.
+
+Requests under ``/api/`` are put into a route class:
+
+* ``auth`` - login and registration;
+* ``write`` - every other POST/PUT/PATCH/DELETE (evaluation submits, edits);
+* ``report`` - GET report and export routes, which are the expensive reads;
+* ``read`` - every other GET, including report job polling.
+
+Each (route class, caller) pair has a token bucket: ``RATE_LIMIT_<CLASS>_PER_MINUTE``
+sustained with bursts up to ``RATE_LIMIT_<CLASS>_BURST``. The caller is the
+user id from the bearer token, or the client address for anonymous requests.
+Login and registration are always anonymous, and a whole class behind campus
+NAT shares one address, so they get their own, much larger bucket instead of
+sharing the write bucket. Behind a reverse proxy, run uvicorn with
+``--proxy-headers --forwarded-allow-ips=<proxy>`` so the client address is
+taken from the proxy's trusted ``X-Forwarded-For``.
+Report requests additionally need one of ``REPORT_MAX_CONCURRENCY`` slots;
+they queue for up to ``REPORT_QUEUE_TIMEOUT_SECONDS`` (and at most
+``REPORT_MAX_QUEUED`` at a time) before being turned away. Writes never wait
+for report slots, so a burst of report polling cannot slow submissions down.
+
+Rejections are ``429 Too Many Requests`` with ``Retry-After``. State is per
+worker process.
+"""
+import asyncio
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.metrics import Counter, Gauge, registry
+from app.core.security import decode_access_token
+
+AUTH = "auth"
+WRITE = "write"
+REPORT = "report"
+READ = "read"
+
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+AUTH_PATHS = frozenset({"/api/v1/auth/login", "/api/v1/auth/register"})
+REPORT_PREFIXES = (
+    "/api/v1/reports/project/",
+    "/api/v1/reports/team/",
+    "/api/v1/reports/user/",
+    "/api/v1/reports/evaluation-form/",
+    "/api/v1/exports/",
+)
+
+admission_rejections_total = registry.register(Counter(
+    "admission_rejections_total", "Requests rejected with 429, by route class and reason.", ("route_class", "reason")))
+report_slots_in_use = registry.register(Gauge(
+    "report_slots_in_use", "Report requests currently holding a concurrency slot."))
+report_queue_length = registry.register(Gauge(
+    "report_queue_length", "Report requests waiting for a concurrency slot."))
+
+
+def route_class(scope: Scope) -> Optional[str]:
+    """``auth``/``write``/``report``/``read`` for API requests, ``None`` for everything else."""
+    path = scope["path"]
+    if not path.startswith("/api/") or path.startswith("/api/v1/admin"):
+        return None
+    method = scope["method"]
+    if method == "POST" and path.rstrip("/") in AUTH_PATHS:
+        return AUTH
+    if method in WRITE_METHODS:
+        return WRITE
+    if method == "GET" and path.startswith(REPORT_PREFIXES):
+        return REPORT
+    return READ
+
+
+@dataclass
+class Rate:
+    per_minute: float
+    burst: float
+
+    @property
+    def per_second(self) -> float:
+        return self.per_minute / 60
+
+
+class RateLimiter:
+    """Token buckets keyed by (route class, caller), refilled lazily."""
+
+    def __init__(self, rates: Dict[str, Rate], max_keys: int = 100_000):
+        self.rates = rates
+        self.max_keys = max_keys
+        # key -> (tokens, last refill time)
+        self._buckets: Dict[Tuple[str, str], Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._next_prune = 0.0
+
+    def acquire(self, klass: str, caller: str) -> float:
+        """Take one token; returns 0 on success, else seconds until one is available."""
+        rate = self.rates.get(klass)
+        if rate is None or rate.per_minute <= 0:
+            return 0.0
+        key = (klass, caller)
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (rate.burst, now))
+            tokens = min(rate.burst, tokens + (now - updated) * rate.per_second)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                wait = 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                wait = (1 - tokens) / rate.per_second
+            if len(self._buckets) > self.max_keys and now >= self._next_prune:
+                self._prune(now)
+        return wait
+
+    def _prune(self, now: float) -> None:
+        self._next_prune = now + 10
+        # Buckets that have refilled completely carry no state worth keeping.
+        full = [
+            key for key, (tokens, updated) in self._buckets.items()
+            if tokens + (now - updated) * self.rates[key[0]].per_second >= self.rates[key[0]].burst
+        ]
+        for key in full:
+            del self._buckets[key]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+class ConcurrencyGate:
+    """At most ``limit`` holders; waiters queue up to ``timeout`` seconds."""
+
+    def __init__(self, limit: int, max_queued: int, timeout: float):
+        self.limit = limit
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.waiting = 0
+
+    async def acquire(self) -> bool:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.limit)
+        if self._semaphore.locked():
+            if self.waiting >= self.max_queued:
+                return False
+            self.waiting += 1
+            report_queue_length.inc()
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.timeout)
+            except asyncio.TimeoutError:
+                return False
+            finally:
+                self.waiting -= 1
+                report_queue_length.dec()
+        else:
+            await self._semaphore.acquire()
+        report_slots_in_use.inc()
+        return True
+
+    def release(self) -> None:
+        report_slots_in_use.dec()
+        self._semaphore.release()
+
+
+def _caller(scope: Scope) -> str:
+    for name, value in scope.get("headers") or ():
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                try:
+                    return f"user:{decode_access_token(token)['sub']}"
+                except HTTPException:
+                    break  # invalid tokens are rejected by the route; limit by address
+            break
+    client = scope.get("client")
+    return f"ip:{client[0]}" if client else "ip:unknown"
+
+
+class AdmissionMiddleware:
+    """ASGI middleware shedding load with 429 + Retry-After."""
+
+    def __init__(self, app: ASGIApp, limiter: RateLimiter, report_gate: Optional[ConcurrencyGate] = None):
+        self.app = app
+        self.limiter = limiter
+        self.report_gate = report_gate
+
+    async def _reject(self, scope: Scope, receive: Receive, send: Send, klass: str, reason: str, retry_after: float) -> None:
+        admission_rejections_total.inc(klass, reason)
+        seconds = max(1, math.ceil(retry_after))
+        response = JSONResponse(
+            {"detail": f"Too many {klass} requests, retry in {seconds} s"},
+            status_code=429,
+            headers={"Retry-After": str(seconds)},
+        )
+        await response(scope, receive, send)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        klass = route_class(scope) if scope["type"] == "http" else None
+        if klass is None:
+            await self.app(scope, receive, send)
+            return
+
+        wait = self.limiter.acquire(klass, _caller(scope))
+        if wait > 0:
+            await self._reject(scope, receive, send, klass, "rate_limit", wait)
+            return
+
+        if klass != REPORT or self.report_gate is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await self.report_gate.acquire():
+            await self._reject(scope, receive, send, klass, "concurrency", self.report_gate.timeout)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.report_gate.release()
+
+
+__all__ = [
+    "AUTH",
+    "AdmissionMiddleware",
+    "ConcurrencyGate",
+    "READ",
+    "REPORT",
+    "Rate",
+    "RateLimiter",
+    "WRITE",
+    "route_class",
+]
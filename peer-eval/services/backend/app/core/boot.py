@@ -0,0 +1,77 @@
+"""Per-process boot ids, and whether the process behind one is still running.
+
+Report job files and draft journals record the process that wrote them, so a
+worker starting up can tell files orphaned by a dead process from those of a
+running sibling. A PID cannot do that: in a container the restarted worker
+usually gets the same PID (often 1) as the one that died.
+
+Instead every process gets a random ``BOOT_ID``, and in each directory it
+writes such files to it holds an ``flock`` on ``<BOOT_ID>.lock`` for as long
+as it runs (``hold``). The kernel releases the lock when the process exits,
+however it exits, so a lock that can be taken means its owner is gone
+(``running``). ``fcntl`` is POSIX-only; without it only the current process
+counts as running.
+"""
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+BOOT_ID = uuid.uuid4().hex
+
+_held: Dict[Path, int] = {}  # directory -> fd of our lock file
+_lock = threading.Lock()
+
+
+def _lock_path(directory: Path, boot_id: str) -> Path:
+    return directory / f"{boot_id}.lock"
+
+
+def hold(directory: Path) -> None:
+    """Mark this process as running in ``directory`` until it exits."""
+    if fcntl is None:
+        return
+    directory = Path(directory).resolve()
+    with _lock:
+        if directory in _held:
+            return
+        directory.mkdir(parents=True, exist_ok=True)
+        fd = os.open(_lock_path(directory, BOOT_ID), os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        _held[directory] = fd
+
+
+def running(directory: Path, boot_id: Optional[str]) -> bool:
+    """Whether the process with ``boot_id`` still holds its lock in ``directory``.
+
+    The lock file of a process found dead is removed.
+    """
+    if not boot_id:
+        return False
+    if boot_id == BOOT_ID:
+        return True
+    if fcntl is None or not boot_id.isalnum():
+        return False
+    path = _lock_path(Path(directory), boot_id)
+    try:
+        fd = os.open(path, os.O_RDWR)
+    except FileNotFoundError:
+        return False
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return True
+    else:
+        path.unlink(missing_ok=True)
+        return False
+    finally:
+        os.close(fd)
+
+
+__all__ = ["BOOT_ID", "hold", "running"]
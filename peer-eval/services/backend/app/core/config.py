@@ -3,10 +3,15 @@ try:
     from pydantic_settings import BaseSettings
 except ImportError:
     from pydantic import BaseSettings
+from pydantic import model_validator
 from functools import lru_cache
+from typing import Optional
 import os
 from pathlib import Path
 
+# Placeholder values that must never sign or authenticate anything.
+DEFAULT_KEYS = frozenset({"", "change-this-in-production"})
+
 
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
@@ -14,16 +19,103 @@ class Settings(BaseSettings):
     # Application
     ENV: str = "development"
     DEBUG: bool = True
-    SECRET_KEY: str = "change-this-in-production"
+    SECRET_KEY: str = "change-this-in-production"  # signs access tokens; required outside development
+    ADMIN_KEY: Optional[str] = None  # X-Admin-Key for /admin routes; unset = admin API disabled
+    
+    # Access tokens (JWT signed with SECRET_KEY)
+    JWT_ALGORITHM: str = "HS256"
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24
+    TOKEN_CACHE_SIZE: int = 4096  # verified tokens kept per worker (0 = no cache)
+    
+    # Password hashing (bcrypt in a process pool)
+    PASSWORD_HASH_ROUNDS: int = 12  # work factor; stored hashes are upgraded at login
+    PASSWORD_HASH_WORKERS: int = 2  # hashing processes per API worker
+    
+    # Data backend: "supabase" (PostgREST + Postgres) or "memory" (offline, in-process)
+    DATA_BACKEND: str = "supabase"
+    MEMORY_SEED_FILE: Optional[str] = None  # JSON {table: [rows]} loaded into the memory backend
+    
+    # Supabase (required when DATA_BACKEND=supabase)
+    SUPABASE_URL: Optional[str] = None
+    SUPABASE_ANON_KEY: Optional[str] = None
+    SUPABASE_SERVICE_ROLE_KEY: Optional[str] = None
+    
+    # Database (required when DATA_BACKEND=supabase)
+    DATABASE_URL: Optional[str] = None
+    ASYNC_DATABASE_URL: Optional[str] = None
+    
+    # Live progress stream (Server-Sent Events)
+    EVENT_STREAM_QUEUE_SIZE: int = 100
+    EVENT_STREAM_KEEPALIVE_SECONDS: float = 15.0
+    
+    # Background report jobs
+    REPORT_JOB_WORKERS: int = 2
+    REPORT_JOB_MAX_PENDING: int = 50
+    REPORT_JOB_RESULT_TTL_SECONDS: int = 3600
+    REPORT_JOBS_DIR: Optional[str] = None  # set to persist job status/results locally
+    
+    # Evaluation draft autosave (write-behind)
+    DRAFT_FLUSH_INTERVAL_SECONDS: float = 5.0
+    DRAFT_MAX_PENDING: int = 500  # flush early once this many drafts are buffered
+    DRAFT_JOURNAL_DIR: Optional[str] = ".draft_journal"  # unset = no journal, a crash loses one interval
+    DRAFT_JOURNAL_FSYNC: bool = False
     
-    # Supabase
-    SUPABASE_URL: str
-    SUPABASE_ANON_KEY: str
-    SUPABASE_SERVICE_ROLE_KEY: str
+    # Frozen report snapshots for closed projects
+    REPORT_SNAPSHOTS_ENABLED: bool = True
+    REPORT_SNAPSHOT_DIR: str = ".report_snapshots"
     
-    # Database
-    DATABASE_URL: str
-    ASYNC_DATABASE_URL: str
+    # Form/criterion usage counts (per worker; re-counted after the TTL)
+    USAGE_COUNT_TTL_SECONDS: int = 60
+    
+    # Compiled submission validators per form (per worker; invalidated by form/criterion writes,
+    # and by LISTEN/NOTIFY like the membership index)
+    FORM_VALIDATOR_CACHE_SIZE: int = 1024
+    FORM_VALIDATOR_TTL_SECONDS: int = 60
+    
+    # Team membership index (per worker; kept current by LISTEN/NOTIFY on the supabase backend)
+    MEMBERSHIP_INDEX_TTL_SECONDS: int = 300
+    
+    # Response encoding
+    FAST_JSON_RESPONSES: bool = False  # opt-in; orjson when installed, stdlib json otherwise
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024  # bytes
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    
+    # Analytics exports (Parquet / Arrow)
+    ANALYTICS_EXPORT_DIR: str = "exports"
+    
+    # Observability
+    METRICS_ENABLED: bool = True
+    LOG_LEVEL: str = "INFO"
+    QUERY_COUNT_HEADER: Optional[bool] = None  # X-DB-Query-Count; defaults to DEBUG
+    QUERY_COUNT_LOG_THRESHOLD: int = 25  # warn when a request issues more DB calls (0 = off)
+    SERVER_TIMING_ENABLED: bool = False  # Server-Timing header: db, compute, serialize
+    PROFILING_ENABLED: bool = True  # X-Profile: <ADMIN_KEY> profiles a single request
+    PROFILE_DIR: str = ".profiles"
+    PROFILE_MAX_COUNT: int = 100  # oldest profiles are deleted beyond this
+    PROFILE_SAMPLE_INTERVAL: float = 0.001  # seconds between stack samples
+    TRAFFIC_CAPTURE_PATH: Optional[str] = None  # JSONL of sanitized API requests for replay (off when unset)
+    TRAFFIC_CAPTURE_SAMPLE_RATE: float = 1.0
+    TRAFFIC_CAPTURE_MAX_BODY: int = 65536  # bytes; larger bodies are recorded by size only
+    
+    # Idempotency-Key replay for POST /evaluations/ and /teams/ (per worker)
+    IDEMPOTENCY_ENABLED: bool = True
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_MAX_ENTRIES: int = 10000
+    # Admission control (429 + Retry-After); per worker, keyed by user id or client address
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_AUTH_PER_MINUTE: int = 600  # login/register, per client address (a class behind NAT shares one)
+    RATE_LIMIT_AUTH_BURST: int = 300
+    RATE_LIMIT_WRITE_PER_MINUTE: int = 120  # 0 = unlimited
+    RATE_LIMIT_WRITE_BURST: int = 30
+    RATE_LIMIT_READ_PER_MINUTE: int = 600
+    RATE_LIMIT_READ_BURST: int = 120
+    RATE_LIMIT_REPORT_PER_MINUTE: int = 30
+    RATE_LIMIT_REPORT_BURST: int = 10
+    REPORT_MAX_CONCURRENCY: int = 4  # report/export requests running at once (0 = no cap)
+    REPORT_MAX_QUEUED: int = 50
+    REPORT_QUEUE_TIMEOUT_SECONDS: float = 5.0
     
     # CORS
     ALLOWED_ORIGINS: list[str] = [
@@ -31,6 +123,27 @@ class Settings(BaseSettings):
         "http://localhost:5173",  # Vite default
     ]
     
+    @model_validator(mode="after")
+    def _check_secret_key(self):
+        # Tokens signed with a known key can be forged with any user id and role.
+        if self.ENV != "development" and self.SECRET_KEY in DEFAULT_KEYS:
+            raise ValueError(f"SECRET_KEY must be set to a private value when ENV={self.ENV}")
+        return self
+    
+    @model_validator(mode="after")
+    def _check_backend(self):
+        if self.DATA_BACKEND not in ("supabase", "memory"):
+            raise ValueError(f"DATA_BACKEND must be 'supabase' or 'memory', got '{self.DATA_BACKEND}'")
+        if self.DATA_BACKEND == "supabase":
+            missing = [
+                name for name in ("SUPABASE_URL", "SUPABASE_ANON_KEY", "SUPABASE_SERVICE_ROLE_KEY",
+                                  "DATABASE_URL", "ASYNC_DATABASE_URL")
+                if not getattr(self, name)
+            ]
+            if missing:
+                raise ValueError(f"{', '.join(missing)} must be set when DATA_BACKEND=supabase")
+        return self
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -0,0 +1,206 @@
+"""``Idempotency-Key`` support for create endpoints.
+
+Clients on unreliable networks retry ``POST /evaluations/`` and
+``POST /teams/`` when a response is lost. A request carrying an
+``Idempotency-Key`` header is remembered together with its response; a retry
+with the same key gets the stored response back (marked with
+``Idempotent-Replayed: true``) without running validation or touching the
+database again.
+
+* Keys are scoped to the caller (the ``Authorization`` header, else the client
+  address) and the route, so different users cannot collide.
+* Reusing a key with a different request body is rejected with 422.
+* A retry that arrives while the first request is still running waits for it
+  (up to ``IN_FLIGHT_TIMEOUT`` seconds, then 409 with ``Retry-After``).
+* Only final outcomes are stored: 5xx, 429 and redirect responses are not, so
+  those can be retried for real.
+
+Entries live for ``IDEMPOTENCY_TTL_SECONDS``; at most
+``IDEMPOTENCY_MAX_ENTRIES`` are kept (oldest evicted first). The store is
+per worker process and is only touched from the event loop.
+"""
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import record_cache
+
+HEADER = b"idempotency-key"
+REPLAYED_HEADER = (b"idempotent-replayed", b"true")
+IDEMPOTENT_ROUTES = frozenset({
+    ("POST", "/api/v1/evaluations"),
+    ("POST", "/api/v1/teams"),
+})
+MAX_KEY_LENGTH = 255
+MAX_STORED_BODY = 1024 * 1024
+IN_FLIGHT_TIMEOUT = 10.0
+
+Key = Tuple[str, str, str, str]  # (caller, method, path, idempotency key)
+
+
+@dataclass
+class _Entry:
+    fingerprint: bytes
+    expires_at: float
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+    status: Optional[int] = None
+    headers: List[Tuple[bytes, bytes]] = field(default_factory=list)
+    body: bytes = b""
+
+
+class IdempotencyStore:
+    """Bounded TTL map of idempotency key -> stored response."""
+
+    def __init__(self, max_entries: int = 10_000, ttl: float = 86_400):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Key, _Entry]" = OrderedDict()
+
+    def get(self, key: Key) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        return entry
+
+    def begin(self, key: Key, fingerprint: bytes) -> _Entry:
+        """Register an in-flight request for ``key``."""
+        now = time.monotonic()
+        # Every entry has the same TTL, so the oldest ones expire first.
+        while self._entries:
+            oldest = next(iter(self._entries.values()))
+            if oldest.expires_at > now and len(self._entries) < self.max_entries:
+                break
+            self._entries.popitem(last=False)
+        entry = self._entries[key] = _Entry(fingerprint, now + self.ttl)
+        return entry
+
+    def abandon(self, key: Key, entry: _Entry) -> None:
+        """Forget an unfinished entry so the next retry runs the request again."""
+        if self._entries.get(key) is entry:
+            del self._entries[key]
+        entry.done.set()
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _caller(scope: Scope, headers: dict) -> str:
+    authorization = headers.get(b"authorization")
+    if authorization:
+        return "auth:" + hashlib.sha256(authorization).hexdigest()
+    client = scope.get("client")
+    return f"ip:{client[0]}" if client else "ip:unknown"
+
+
+def _error(status_code: int, detail: str, headers: Optional[dict] = None) -> JSONResponse:
+    return JSONResponse({"detail": detail}, status_code=status_code, headers=headers)
+
+
+class IdempotencyMiddleware:
+    """Replays stored responses for repeated ``Idempotency-Key`` requests."""
+
+    def __init__(self, app: ASGIApp, store: IdempotencyStore):
+        self.app = app
+        self.store = store
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or (scope["method"], scope["path"].rstrip("/")) not in IDEMPOTENT_ROUTES:
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        raw_key = headers.get(HEADER)
+        if raw_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not raw_key or len(raw_key) > MAX_KEY_LENGTH:
+            await _error(400, f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")(scope, receive, send)
+            return
+
+        # The body is needed up front to tell a retry from a reused key.
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                return  # client went away
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        body = b"".join(chunks)
+        fingerprint = hashlib.sha256(body).digest()
+        key = (_caller(scope, headers), scope["method"], scope["path"], raw_key.decode("latin-1"))
+
+        entry = self.store.get(key)
+        record_cache("idempotency", entry is not None)
+        if entry is not None:
+            await self._replay(entry, fingerprint, scope, receive, send)
+            return
+
+        entry = self.store.begin(key, fingerprint)
+        status_code, response_headers, response_chunks, size = 500, [], [], 0
+        body_sent = False
+
+        async def replay_receive() -> Message:
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        async def capture_send(message: Message) -> None:
+            nonlocal status_code, response_headers, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                response_headers = list(message.get("headers") or [])
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                size += len(chunk)
+                if size <= MAX_STORED_BODY:
+                    response_chunks.append(chunk)
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture_send)
+        except BaseException:
+            self.store.abandon(key, entry)
+            raise
+        # Redirects are not stored either: the redirected request carries the same key.
+        if status_code >= 500 or status_code == 429 or 300 <= status_code < 400 or size > MAX_STORED_BODY:
+            self.store.abandon(key, entry)
+            return
+        entry.status, entry.headers, entry.body = status_code, response_headers, b"".join(response_chunks)
+        entry.done.set()
+
+    async def _replay(self, entry: _Entry, fingerprint: bytes, scope: Scope, receive: Receive, send: Send) -> None:
+        if entry.fingerprint != fingerprint:
+            response = _error(422, "Idempotency-Key was already used with a different request body")
+            await response(scope, receive, send)
+            return
+        if entry.status is None:
+            try:
+                await asyncio.wait_for(entry.done.wait(), IN_FLIGHT_TIMEOUT)
+            except asyncio.TimeoutError:
+                pass
+            if entry.status is None:
+                # Still running, or it failed and was abandoned: let the client retry.
+                response = _error(409, "A request with this Idempotency-Key is in progress", {"Retry-After": "1"})
+                await response(scope, receive, send)
+                return
+        await send({
+            "type": "http.response.start",
+            "status": entry.status,
+            "headers": entry.headers + [REPLAYED_HEADER],
+        })
+        await send({"type": "http.response.body", "body": entry.body})
+
+
+__all__ = ["IdempotencyMiddleware", "IdempotencyStore", "IDEMPOTENT_ROUTES"]
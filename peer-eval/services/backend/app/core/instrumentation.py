@@ -0,0 +1,259 @@
+"""Per-request instrumentation of data-access calls.
+
+``InstrumentedClient`` wraps the Supabase client so every ``execute()`` is
+timed and attributed to the current request through a context variable.
+SQLAlchemy engines are hooked the same way with ``instrument_engine``.
+Consumers (metrics, debug headers) subscribe with ``add_db_call_listener``.
+
+``ServerTimingMiddleware`` reports the same counters, plus response
+serialization time, to browser devtools as a ``Server-Timing`` header.
+
+``QueryCountMiddleware`` guards against N+1 regressions: it can expose the
+per-request call count in a debug header and logs requests that exceed a
+threshold. ``app.testing`` builds a pytest fixture on the same counters.
+"""
+import logging
+import time
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger("app.queries")
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+QUERY_TIME_HEADER = "X-DB-Query-Time-Ms"
+SERVER_TIMING_HEADER = "Server-Timing"
+
+
+@dataclass
+class RequestStats:
+    """Timing and data-access counters for one request."""
+
+    method: str = ""
+    route: str = "background"
+    started: float = field(default_factory=time.perf_counter)
+    db_calls: int = 0
+    db_seconds: float = 0.0
+    serialize_seconds: float = 0.0
+    scope: Optional[Dict[str, Any]] = field(default=None, repr=False)
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+DbCallListener = Callable[[Optional[RequestStats], str, str, float], None]
+_db_call_listeners: List[DbCallListener] = []
+
+
+def add_db_call_listener(listener: DbCallListener) -> None:
+    """Register ``listener(stats, table, operation, seconds)`` for every DB call."""
+    if listener not in _db_call_listeners:
+        _db_call_listeners.append(listener)
+
+
+def remove_db_call_listener(listener: DbCallListener) -> None:
+    if listener in _db_call_listeners:
+        _db_call_listeners.remove(listener)
+
+
+def open_request_stats(scope: Scope) -> Tuple[RequestStats, Optional[Token]]:
+    """Return the stats for this request, creating them if no outer middleware did.
+
+    The token is ``None`` when the stats were reused and must not be reset.
+    """
+    stats = current_request.get()
+    if stats is not None:
+        return stats, None
+    stats = RequestStats(method=scope.get("method", ""), route="unmatched", scope=scope)
+    return stats, current_request.set(stats)
+
+
+def record_db_call(table: str, operation: str, seconds: float) -> None:
+    """Attribute one database round trip to the current request."""
+    stats = current_request.get()
+    if stats is not None:
+        stats.db_calls += 1
+        stats.db_seconds += seconds
+    for listener in _db_call_listeners:
+        listener(stats, table, operation, seconds)
+
+
+def record_serialize(seconds: float) -> None:
+    """Attribute response encoding time to the current request."""
+    stats = current_request.get()
+    if stats is not None:
+        stats.serialize_seconds += seconds
+
+
+class _InstrumentedQuery:
+    """Proxy around a PostgREST request builder that times ``execute()``."""
+
+    __slots__ = ("_builder", "_table", "_operation")
+
+    def __init__(self, builder: Any, table: str, operation: str = "select"):
+        self._builder = builder
+        self._table = table
+        self._operation = operation
+
+    def execute(self, *args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return self._builder.execute(*args, **kwargs)
+        finally:
+            record_db_call(self._table, self._operation, time.perf_counter() - started)
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            return attr
+
+        def chained(*args: Any, **kwargs: Any) -> Any:
+            result = attr(*args, **kwargs)
+            if hasattr(result, "execute"):
+                operation = name if name in ("select", "insert", "update", "upsert", "delete") else self._operation
+                return _InstrumentedQuery(result, self._table, operation)
+            return result
+
+        return chained
+
+
+class InstrumentedClient:
+    """Wraps a Supabase client so table and RPC calls are counted and timed."""
+
+    def __init__(self, client: Any):
+        self._client = client
+
+    def table(self, name: str) -> _InstrumentedQuery:
+        return _InstrumentedQuery(self._client.table(name), name)
+
+    def rpc(self, fn: str, params: Optional[dict] = None, *args: Any, **kwargs: Any) -> _InstrumentedQuery:
+        return _InstrumentedQuery(self._client.rpc(fn, params or {}, *args, **kwargs), f"rpc:{fn}", "rpc")
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+
+def instrument_engine(engine: Any) -> None:
+    """Count and time statements executed through a SQLAlchemy engine."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        operation = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else "sql"
+        record_db_call("sql", operation, time.perf_counter() - started)
+
+
+class QueryCountMiddleware:
+    """Expose and police the number of database calls made per request.
+
+    With ``expose_header`` the count (and total DB time) is sent in
+    ``X-DB-Query-Count`` / ``X-DB-Query-Time-Ms``. Requests issuing more than
+    ``log_threshold`` calls are logged as warnings (0 disables the log).
+    Streaming responses report the calls made before the headers were sent.
+    """
+
+    def __init__(self, app: ASGIApp, expose_header: bool = False, log_threshold: int = 0):
+        self.app = app
+        self.expose_header = expose_header
+        self.log_threshold = log_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats, token = open_request_stats(scope)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and self.expose_header:
+                headers = MutableHeaders(scope=message)
+                headers[QUERY_COUNT_HEADER] = str(stats.db_calls)
+                headers[QUERY_TIME_HEADER] = f"{stats.db_seconds * 1000:.1f}"
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if token is not None:
+                current_request.reset(token)
+            if self.log_threshold and stats.db_calls > self.log_threshold:
+                logger.warning(
+                    "%s %s issued %d database calls (%.1f ms); threshold is %d",
+                    scope["method"], scope["path"], stats.db_calls,
+                    stats.db_seconds * 1000, self.log_threshold,
+                )
+
+
+class ServerTimingMiddleware:
+    """Add a ``Server-Timing`` header splitting latency into phases.
+
+    ``db`` is time spent in database calls (with the call count as its
+    description and as ``db-calls``), ``serialize`` is JSON encoding and
+    ``compute`` is the rest of the handler (validation, Python aggregation).
+    Phases are measured up to the moment the response headers are sent, so
+    streamed bodies only report their setup.
+    """
+
+    def __init__(self, app: ASGIApp, timing_allow_origin: str = ""):
+        self.app = app
+        self.timing_allow_origin = timing_allow_origin
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats, token = open_request_stats(scope)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append(SERVER_TIMING_HEADER, server_timing(stats))
+                if self.timing_allow_origin:
+                    headers["Timing-Allow-Origin"] = self.timing_allow_origin
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if token is not None:
+                current_request.reset(token)
+
+
+def server_timing(stats: RequestStats) -> str:
+    """Format request phases as a Server-Timing header value (milliseconds)."""
+    total = (time.perf_counter() - stats.started) * 1000
+    db = stats.db_seconds * 1000
+    serialize = stats.serialize_seconds * 1000
+    compute = max(total - db - serialize, 0.0)
+    return (
+        f'db;dur={db:.1f};desc="{stats.db_calls} calls", '
+        f'db-calls;desc="{stats.db_calls}", '
+        f"compute;dur={compute:.1f}, "
+        f"serialize;dur={serialize:.1f}, "
+        f"total;dur={total:.1f}"
+    )
+
+
+__all__ = [
+    "InstrumentedClient",
+    "QUERY_COUNT_HEADER",
+    "QueryCountMiddleware",
+    "RequestStats",
+    "ServerTimingMiddleware",
+    "add_db_call_listener",
+    "current_request",
+    "instrument_engine",
+    "open_request_stats",
+    "record_db_call",
+    "record_serialize",
+    "remove_db_call_listener",
+]
@@ -0,0 +1,111 @@
+"""Allocation tracing with ``tracemalloc``.
+
+``trace_allocations`` wraps a block (sync or async code) and reports the
+peak traced memory, the memory still held at the end and the top allocation
+sites. A watcher thread snapshots the heap whenever traced memory reaches a
+new high, so the sites reflect what was live near the peak (e.g. a report
+being assembled) rather than only what survived the block. Used by the
+admin memory-profile endpoint and the benchmarks' peak-memory assertions.
+
+tracemalloc is process-wide: allocations made by concurrent requests on the
+same worker are included, and tracing slows Python down noticeably while on.
+"""
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+
+MB = 1024 * 1024
+
+_trace_lock = threading.Lock()
+
+
+class TraceBusy(Exception):
+    """Raised when another allocation trace is already running."""
+
+
+class _PeakWatcher:
+    """Keeps a snapshot taken close to the highest traced memory."""
+
+    def __init__(self, interval: float = 0.01, growth: float = 1.25):
+        self.interval = interval
+        self.growth = growth
+        self.snapshot = None
+        self._high = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="memtrace-peak", daemon=True)
+
+    def start(self) -> None:
+        self._high, _ = tracemalloc.get_traced_memory()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            current, _ = tracemalloc.get_traced_memory()
+            if current > self._high * self.growth + MB:
+                self.snapshot = tracemalloc.take_snapshot()
+                # The snapshot itself is allocated memory; measure after it.
+                self._high, _ = tracemalloc.get_traced_memory()
+
+
+def _site(stat: tracemalloc.StatisticDiff) -> Dict[str, Any]:
+    frame = stat.traceback[0]
+    return {
+        "file": frame.filename,
+        "line": frame.lineno,
+        "size_kb": round(stat.size_diff / 1024, 1),
+        "count": stat.count_diff,
+    }
+
+
+@contextmanager
+def trace_allocations(top: int = 20, frames: int = 1) -> Iterator[Dict[str, Any]]:
+    """Trace allocations inside the block; the yielded dict is filled on exit.
+
+    Keys: ``peak_mb`` (highest traced memory above the starting point),
+    ``retained_mb`` (still allocated at exit), ``seconds`` and ``top_sites``
+    (largest allocations by source line near the peak, relative to the start).
+    """
+    if not _trace_lock.acquire(blocking=False):
+        raise TraceBusy("An allocation trace is already running")
+
+    result: Dict[str, Any] = {}
+    already_tracing = tracemalloc.is_tracing()
+    try:
+        if not already_tracing:
+            tracemalloc.start(frames)
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        before = tracemalloc.take_snapshot()
+        watcher = _PeakWatcher()
+        watcher.start()
+        started = time.perf_counter()
+        try:
+            yield result
+        finally:
+            elapsed = time.perf_counter() - started
+            watcher.stop()
+            current, peak = tracemalloc.get_traced_memory()
+            after = watcher.snapshot or tracemalloc.take_snapshot()
+            filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+            stats: List[tracemalloc.StatisticDiff] = after.filter_traces(filters).compare_to(
+                before.filter_traces(filters), "lineno"
+            )
+            result.update({
+                "peak_mb": round((peak - baseline) / MB, 3),
+                "retained_mb": round((current - baseline) / MB, 3),
+                "seconds": round(elapsed, 4),
+                "top_sites": [_site(stat) for stat in stats[:top] if stat.size_diff > 0],
+            })
+    finally:
+        if not already_tracing:
+            tracemalloc.stop()
+        _trace_lock.release()
+
+
+__all__ = ["MB", "TraceBusy", "trace_allocations"]
@@ -0,0 +1,226 @@
+"""Prometheus-style metrics collected in-process.
+
+A small dependency-free registry (counters, gauges, histograms with labels)
+rendered in the Prometheus text exposition format at ``/metrics``. Values
+are per worker process; scrape each worker or aggregate in Prometheus.
+
+``MetricsMiddleware`` records per-route request counts, latency and
+in-flight requests, and opens a ``RequestStats`` context so data-access
+calls made by the handler are attributed to its route.
+"""
+import bisect
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.instrumentation import RequestStats, add_db_call_listener, current_request, open_request_stats
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [0.0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, series in sorted(self._values.items()):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {series[-1]}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests_total = registry.register(Counter(
+    "http_requests_total", "HTTP requests handled, by route and status.", ("method", "route", "status")))
+http_request_duration_seconds = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency in seconds.", ("method", "route")))
+http_requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled.", ("method",)))
+db_calls_total = registry.register(Counter(
+    "db_calls_total", "Database/PostgREST calls, by route, table and operation.", ("route", "table", "operation")))
+db_call_duration_seconds = registry.register(Histogram(
+    "db_call_duration_seconds", "Duration of individual database calls in seconds.", ("route",), DB_LATENCY_BUCKETS))
+db_calls_per_request = registry.register(Histogram(
+    "db_calls_per_request", "Database calls issued while handling one request.", ("method", "route"), COUNT_BUCKETS))
+cache_requests_total = registry.register(Counter(
+    "cache_requests_total", "Cache lookups, by cache and result (hit/miss).", ("cache", "result")))
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Count a cache lookup; hit ratio = hit / (hit + miss)."""
+    cache_requests_total.inc(cache, "hit" if hit else "miss")
+
+
+def _on_db_call(stats: Optional[RequestStats], table: str, operation: str, seconds: float) -> None:
+    if stats is None:
+        route = "background"
+    else:
+        if stats.scope is not None and stats.route == "unmatched":
+            stats.route = route_template(stats.scope)
+        route = stats.route
+    db_calls_total.inc(route, table, operation)
+    db_call_duration_seconds.observe(seconds, route)
+
+
+add_db_call_listener(_on_db_call)
+
+
+def route_template(scope: Scope) -> str:
+    """Low-cardinality route label: the matched path template, not the raw path."""
+    route = scope.get("route")
+    path = getattr(route, "path_format", None) or getattr(route, "path", None)
+    if not path:
+        return "unmatched"
+    # Newer FastAPI versions report the template relative to the included
+    # router; restore the (static) router prefixes from the raw request path.
+    raw = scope.get("path", "")
+    extra = raw.count("/") - path.count("/")
+    if extra > 0 and ":path}" not in path:
+        path = "/".join(raw.split("/")[:extra + 1]) + path
+    return path
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request metrics and DB attribution per route."""
+
+    def __init__(self, app: ASGIApp, exclude_paths: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.exclude_paths = set(exclude_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        # The route template is resolved lazily: routing fills scope["route"]
+        # before the handler runs, so DB calls can be attributed to it.
+        stats, token = open_request_stats(scope)
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc(method)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if token is not None:
+                current_request.reset(token)
+            http_requests_in_flight.dec(method)
+            route = stats.route = route_template(scope)
+            elapsed = time.perf_counter() - stats.started
+            http_requests_total.inc(method, route, str(status_code))
+            http_request_duration_seconds.observe(elapsed, method, route)
+            db_calls_per_request.observe(stats.db_calls, method, route)
+
+
+def render_metrics() -> str:
+    return registry.render()
+
+
+__all__ = [
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "MetricsMiddleware",
+    "record_cache",
+    "registry",
+    "render_metrics",
+]
@@ -0,0 +1,113 @@
+"""bcrypt password hashing off the event loop.
+
+A bcrypt hash at a sensible cost takes 100-400 ms of CPU. Running it in a
+request handler would stall every other request on the worker, so hashing
+and verification go to a small process pool (``PASSWORD_HASH_WORKERS``
+processes) and handlers await the result. The pool bounds how much CPU
+logins can take; excess logins queue instead of piling onto the loop.
+
+``PASSWORD_HASH_ROUNDS`` is the bcrypt work factor (each +1 doubles the
+cost). ``verify_password`` reports when a stored hash should be replaced:
+hashes made with a different cost, and legacy plaintext values left from
+before hashing was introduced. Login then stores the new hash, so cost
+changes roll out as users sign in.
+"""
+import asyncio
+import hmac
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+import bcrypt
+
+from app.core.config import settings
+
+BCRYPT_PREFIXES = ("$2a$", "$2b$", "$2y$")
+# bcrypt only uses the first 72 bytes of a password (newer releases raise instead).
+MAX_PASSWORD_BYTES = 72
+
+
+def _encode(password: str) -> bytes:
+    return password.encode("utf-8")[:MAX_PASSWORD_BYTES]
+
+
+def is_bcrypt_hash(stored: Optional[str]) -> bool:
+    return bool(stored) and stored.startswith(BCRYPT_PREFIXES)
+
+
+def hash_rounds(stored: str) -> int:
+    """Work factor of a bcrypt hash (``$2b$12$...`` -> 12)."""
+    return int(stored[4:6])
+
+
+def hash_password_sync(password: str, rounds: int, salt: Optional[bytes] = None) -> str:
+    """Hash in the calling thread; ``salt`` (from ``bcrypt.gensalt``) for reproducible fixtures."""
+    return bcrypt.hashpw(_encode(password), salt or bcrypt.gensalt(rounds)).decode("ascii")
+
+
+def _verify(password: str, stored: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    """Runs in a pool process: (matches, replacement hash or None)."""
+    if is_bcrypt_hash(stored):
+        if not bcrypt.checkpw(_encode(password), stored.encode("ascii")):
+            return False, None
+        if hash_rounds(stored) == rounds:
+            return True, None
+    elif not stored or not hmac.compare_digest(password.encode("utf-8"), stored.encode("utf-8")):
+        # Legacy rows stored the password itself.
+        return False, None
+    return True, hash_password_sync(password, rounds)
+
+
+class PasswordHasher:
+    """bcrypt hashing and verification on a bounded process pool."""
+
+    def __init__(self, rounds: int = 12, max_workers: int = 2):
+        self.rounds = rounds
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process that already runs threads is unsafe.
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+    async def _run(self, fn, *args):
+        if self._executor is None:
+            self.start()
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password_sync, password, self.rounds)
+
+    async def verify(self, password: str, stored: Optional[str]) -> Tuple[bool, Optional[str]]:
+        """``(matches, new_hash)``; ``new_hash`` is set when the stored value should be replaced."""
+        if not stored:
+            return False, None
+        return await self._run(_verify, password, stored, self.rounds)
+
+
+passwords = PasswordHasher(
+    rounds=settings.PASSWORD_HASH_ROUNDS,
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+)
+
+
+__all__ = [
+    "PasswordHasher",
+    "hash_password_sync",
+    "hash_rounds",
+    "is_bcrypt_hash",
+    "passwords",
+]
@@ -0,0 +1,231 @@
+"""On-demand profiling of single requests.
+
+A request is profiled only when it carries the ``X-Profile`` header with
+``ADMIN_KEY`` as its value; every other request pays a single header lookup.
+The key is accepted in a header only, never in the query string: URLs end up
+in proxy and access logs. Two profilers are available, chosen with
+``X-Profile-Mode``:
+
+``sample`` (default)
+    A background thread samples the event-loop thread's stack every
+    ``PROFILE_SAMPLE_INTERVAL`` seconds and writes collapsed stacks
+    (``frame;frame;frame count``), the input format of flamegraph.pl and
+    speedscope.
+
+``cprofile``
+    Deterministic ``cProfile`` run; stored as a ``.prof`` file (snakeviz,
+    ``pstats``) and a text call tree sorted by cumulative time.
+
+Profiles are written to ``PROFILE_DIR`` and fetched through the admin API;
+the response carries ``X-Profile-Id``. Only the newest ``PROFILE_MAX_COUNT``
+are kept. Both profilers observe the whole
+event-loop thread, so concurrent requests on the same worker show up too.
+"""
+import cProfile
+import io
+import json
+import logging
+import marshal
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.security import is_admin_key
+
+logger = logging.getLogger("app.profiling")
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_MODE_HEADER = b"x-profile-mode"
+PROFILE_MODES = ("sample", "cprofile")
+PROFILE_FORMATS = {
+    "collapsed": ("collapsed.txt", "text/plain"),
+    "text": ("txt", "text/plain"),
+    "pstats": ("prof", "application/octet-stream"),
+}
+
+
+class StackSampler:
+    """Samples one thread's stack on an interval into collapsed stack counts."""
+
+    def __init__(self, thread_id: int, interval: float = 0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack: List[str] = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.samples[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+class ProfileStore:
+    """Profiles on local disk: ``{id}.json`` metadata plus one file per format."""
+
+    def __init__(self, root: str, max_count: int = 100):
+        self.root = Path(root)
+        self.max_count = max_count
+
+    def path(self, profile_id: str, format: str) -> Optional[Path]:
+        if format not in PROFILE_FORMATS or not profile_id.isalnum():
+            return None
+        path = self.root / f"{profile_id}.{PROFILE_FORMATS[format][0]}"
+        return path if path.exists() else None
+
+    def save(self, meta: Dict[str, Any], files: Dict[str, bytes]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        for format, data in files.items():
+            (self.root / f"{meta['id']}.{PROFILE_FORMATS[format][0]}").write_bytes(data)
+        meta["formats"] = sorted(files)
+        (self.root / f"{meta['id']}.json").write_text(json.dumps(meta))
+        self._prune()
+
+    def _prune(self) -> None:
+        """Delete the oldest profiles beyond ``max_count``."""
+        saved = []
+        for path in self.root.glob("*.json"):
+            try:
+                saved.append((path.stat().st_mtime, path))
+            except OSError:
+                continue  # pruned by another worker
+        saved.sort(reverse=True)
+        for _, path in saved[self.max_count:]:
+            for file in self.root.glob(f"{path.stem}.*"):
+                file.unlink(missing_ok=True)
+
+    def list(self) -> List[Dict[str, Any]]:
+        if not self.root.exists():
+            return []
+        profiles = []
+        for path in self.root.glob("*.json"):
+            try:
+                profiles.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue
+        return sorted(profiles, key=lambda meta: meta["created_at"], reverse=True)
+
+
+class ProfilingMiddleware:
+    """Run a request under a profiler when asked to with the admin key."""
+
+    def __init__(self, app: ASGIApp, store: ProfileStore, sample_interval: float = 0.001):
+        self.app = app
+        self.store = store
+        self.sample_interval = sample_interval
+        self._busy = threading.Lock()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        mode = self._requested_mode(scope)
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+
+        # One profile at a time: profilers observe the whole thread.
+        if not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)["X-Profile-Id"] = profile_id
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            if mode == "cprofile":
+                profiler = cProfile.Profile()
+                profiler.enable()
+                try:
+                    await self.app(scope, receive, send_wrapper)
+                finally:
+                    profiler.disable()
+                files = _cprofile_files(profiler)
+            else:
+                sampler = StackSampler(threading.get_ident(), self.sample_interval)
+                sampler.start()
+                try:
+                    await self.app(scope, receive, send_wrapper)
+                finally:
+                    sampler.stop()
+                files = {"collapsed": sampler.collapsed().encode()}
+        finally:
+            self._busy.release()
+
+        meta = {
+            "id": profile_id,
+            "mode": mode,
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status_code,
+            "seconds": round(time.perf_counter() - started, 4),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        try:
+            self.store.save(meta, files)
+        except OSError as e:
+            logger.warning("Could not store profile %s: %s", profile_id, e)
+            return
+        logger.info("Profiled %s %s (%s) as %s", meta["method"], meta["path"], mode, profile_id)
+
+    @staticmethod
+    def _requested_mode(scope: Scope) -> Optional[str]:
+        key = mode = None
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                key = value.decode("latin-1")
+            elif name == PROFILE_MODE_HEADER:
+                mode = value.decode("latin-1")
+        if not is_admin_key(key):
+            return None
+        return mode if mode in PROFILE_MODES else "sample"
+
+
+def _cprofile_files(profiler: cProfile.Profile) -> Dict[str, bytes]:
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.sort_stats("cumulative").print_stats(60)
+    stats.print_callees(30)
+    # Same payload as Stats.dump_stats(), which only writes to a file name.
+    return {"text": stream.getvalue().encode(), "pstats": marshal.dumps(stats.stats)}
+
+
+profile_store = ProfileStore(settings.PROFILE_DIR, max_count=settings.PROFILE_MAX_COUNT)
+
+__all__ = ["PROFILE_FORMATS", "PROFILE_MODES", "ProfileStore", "ProfilingMiddleware", "StackSampler", "profile_store"]
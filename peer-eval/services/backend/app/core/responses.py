@@ -0,0 +1,90 @@
+"""Fast JSON responses.
+
+``FastJSONResponse`` renders with ``orjson`` when it is installed and falls
+back to the standard library otherwise. ``FastJSONRoute`` wraps each endpoint
+so that plain dict/list return values are rendered directly, skipping
+FastAPI's ``jsonable_encoder`` pass over the whole payload. Routes that
+declare a ``response_model`` keep FastAPI's normal validation path.
+
+Both are opt-in (``FAST_JSON_RESPONSES``); by default responses go through
+FastAPI's usual encoding.
+
+Encoding time is attributed to the current request for Server-Timing.
+"""
+import functools
+import inspect
+import json
+import time
+from typing import Any, Callable
+
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.responses import JSONResponse, Response
+from fastapi.routing import APIRoute
+
+from app.core.config import settings
+from app.core.instrumentation import record_serialize
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+class TimedJSONResponse(JSONResponse):
+    """Standard JSON response that records its encoding time."""
+
+    def render(self, content: Any) -> bytes:
+        started = time.perf_counter()
+        try:
+            return self.encode(content)
+        finally:
+            record_serialize(time.perf_counter() - started)
+
+    def encode(self, content: Any) -> bytes:
+        return super().render(content)
+
+
+class FastJSONResponse(TimedJSONResponse):
+    """JSON response rendered by orjson (or stdlib json as a fallback)."""
+
+    def encode(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def _render_directly(endpoint: Callable, status_code: int) -> Callable:
+    """Wrap an endpoint so dict/list results become a FastJSONResponse."""
+
+    @functools.wraps(endpoint)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        content = await endpoint(*args, **kwargs)
+        if isinstance(content, Response):
+            return content
+        return FastJSONResponse(content, status_code=status_code)
+
+    return wrapper
+
+
+class FastJSONRoute(APIRoute):
+    """API route that bypasses ``jsonable_encoder`` when fast JSON is enabled."""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs: Any):
+        response_model = kwargs.get("response_model")
+        if isinstance(response_model, DefaultPlaceholder):
+            response_model = response_model.value
+        if settings.FAST_JSON_RESPONSES and response_model is None and _returns_plain_data(endpoint):
+            endpoint = _render_directly(endpoint, kwargs.get("status_code") or 200)
+        super().__init__(path, endpoint, **kwargs)
+
+
+def _returns_plain_data(endpoint: Callable) -> bool:
+    """Only async endpoints without a return annotation are wrapped."""
+    if not inspect.iscoroutinefunction(endpoint):
+        return False
+    return inspect.signature(endpoint).return_annotation is inspect.Signature.empty
+
+
+default_response_class = FastJSONResponse if settings.FAST_JSON_RESPONSES else TimedJSONResponse
+
+__all__ = ["FastJSONResponse", "FastJSONRoute", "TimedJSONResponse", "default_response_class"]
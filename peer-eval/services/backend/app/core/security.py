@@ -0,0 +1,222 @@
+"""Security dependencies.
+
+Access tokens are HS256 JWTs signed with ``SECRET_KEY`` and carry the user's
+id, email, name and role, so verifying a request needs no database lookup.
+Verified claims are kept in a small LRU keyed by the token's SHA-256, which
+turns repeat verification into a dict lookup; revoked tokens (logout) go to
+an in-process denylist that forgets each entry once the token would have
+expired anyway. The denylist is per worker process.
+"""
+import hashlib
+import hmac
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import Depends, Header, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from jose import JWTError, jwt
+
+from app.core.config import DEFAULT_KEYS, settings
+from app.core.metrics import record_cache
+
+ADMIN_KEY_HEADER = "X-Admin-Key"
+TOKEN_TYPE = "bearer"
+
+
+def admin_key_configured() -> bool:
+    """Whether ``ADMIN_KEY`` is set to a usable value (not a placeholder, not ``SECRET_KEY``)."""
+    admin_key = settings.ADMIN_KEY or ""
+    return admin_key not in DEFAULT_KEYS and admin_key != settings.SECRET_KEY
+
+
+def is_admin_key(key: Optional[str]) -> bool:
+    """Constant-time comparison of a supplied key against ``ADMIN_KEY``."""
+    if not key or not admin_key_configured():
+        return False
+    return hmac.compare_digest(key.encode(), settings.ADMIN_KEY.encode())
+
+
+async def require_admin(x_admin_key: Optional[str] = Header(None, alias=ADMIN_KEY_HEADER)) -> None:
+    """Dependency guarding admin-only routes with the ``X-Admin-Key`` header."""
+    if not admin_key_configured():
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin API is disabled: ADMIN_KEY is not configured"
+        )
+    if not is_admin_key(x_admin_key):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin key required"
+        )
+
+
+class TokenCache:
+    """LRU of verified claims keyed by token hash."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: bytes) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            claims = self._entries.get(key)
+            if claims is not None:
+                self._entries.move_to_end(key)
+            return claims
+
+    def put(self, key: bytes, claims: Dict[str, Any]) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = claims
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, key: bytes) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class TokenDenylist:
+    """Revoked token ids (``jti``), each kept until its token's expiry."""
+
+    def __init__(self):
+        self._expiry: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._next_purge = 0.0
+
+    def revoke(self, jti: str, expires_at: float) -> None:
+        with self._lock:
+            self._expiry[jti] = expires_at
+            self._purge(time.time())
+
+    def is_revoked(self, jti: str) -> bool:
+        expires_at = self._expiry.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def _purge(self, now: float) -> None:
+        if now < self._next_purge:
+            return
+        self._next_purge = now + 60
+        for jti in [jti for jti, expires_at in self._expiry.items() if expires_at <= now]:
+            del self._expiry[jti]
+
+    def __len__(self) -> int:
+        return len(self._expiry)
+
+
+token_cache = TokenCache(settings.TOKEN_CACHE_SIZE)
+token_denylist = TokenDenylist()
+_bearer = HTTPBearer(auto_error=False)
+
+
+def _token_key(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def create_access_token(user: Dict[str, Any]) -> Tuple[str, int]:
+    """Signed token for ``user`` (a users row); returns the token and its lifetime in seconds."""
+    expires_in = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    now = int(time.time())
+    claims = {
+        "sub": str(user["id"]),
+        "email": user["email"],
+        "name": user["name"],
+        "role": user["role"],
+        "iat": now,
+        "exp": now + expires_in,
+        "jti": uuid.uuid4().hex,
+    }
+    return jwt.encode(claims, settings.SECRET_KEY, algorithm=settings.JWT_ALGORITHM), expires_in
+
+
+def decode_access_token(token: str) -> Dict[str, Any]:
+    """Verified claims of ``token``; raises 401 when invalid, expired or revoked."""
+    key = _token_key(token)
+    claims = token_cache.get(key)
+    record_cache("access_tokens", claims is not None)
+    if claims is None:
+        try:
+            claims = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+        except JWTError:
+            raise _unauthorized("Invalid or expired token")
+        token_cache.put(key, claims)
+    elif claims["exp"] <= time.time():
+        token_cache.discard(key)
+        raise _unauthorized("Invalid or expired token")
+    if token_denylist.is_revoked(claims["jti"]):
+        raise _unauthorized("Token has been revoked")
+    return claims
+
+
+def revoke_access_token(token: str) -> None:
+    """Deny ``token`` on this worker until it expires."""
+    claims = decode_access_token(token)
+    token_denylist.revoke(claims["jti"], claims["exp"])
+    token_cache.discard(_token_key(token))
+
+
+def _current_user(claims: Dict[str, Any]) -> Dict[str, Any]:
+    return {"id": int(claims["sub"]), "email": claims["email"], "name": claims["name"], "role": claims["role"]}
+
+
+async def get_current_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(_bearer),
+) -> Dict[str, Any]:
+    """Dependency returning ``{id, email, name, role}`` from the bearer token (no DB lookup)."""
+    if credentials is None:
+        raise _unauthorized("Not authenticated")
+    return _current_user(decode_access_token(credentials.credentials))
+
+
+async def get_optional_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(_bearer),
+) -> Optional[Dict[str, Any]]:
+    """Like ``get_current_user`` but ``None`` for anonymous requests."""
+    if credentials is None:
+        return None
+    return _current_user(decode_access_token(credentials.credentials))
+
+
+async def get_bearer_token(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(_bearer),
+) -> str:
+    """The raw bearer token, for endpoints that act on the token itself (logout)."""
+    if credentials is None:
+        raise _unauthorized("Not authenticated")
+    return credentials.credentials
+
+
+__all__ = [
+    "ADMIN_KEY_HEADER",
+    "DEFAULT_KEYS",
+    "TOKEN_TYPE",
+    "admin_key_configured",
+    "create_access_token",
+    "decode_access_token",
+    "get_bearer_token",
+    "get_current_user",
+    "get_optional_user",
+    "is_admin_key",
+    "require_admin",
+    "revoke_access_token",
+    "token_cache",
+    "token_denylist",
+]
@@ -1,7 +1,29 @@
-"""Supabase client initialization."""
-from supabase import create_client, Client
+"""Data client initialization.
+
+``supabase`` is the Supabase client, or the in-memory stand-in from
+``app.db.memory`` when ``DATA_BACKEND=memory``; both expose the same
+``table()`` / ``rpc()`` query-builder interface.
+"""
 from app.core.config import settings
+from app.core.instrumentation import InstrumentedClient
+
+
+def create_data_client():
+    """Build the client for the configured ``DATA_BACKEND``."""
+    if settings.DATA_BACKEND == "memory":
+        from app.db.memory import MemoryClient
+
+        client = MemoryClient()
+        if settings.MEMORY_SEED_FILE:
+            client.db.load_file(settings.MEMORY_SEED_FILE)
+        return client
+
+    from supabase import create_client
+
+    return create_client(settings.SUPABASE_URL, settings.SUPABASE_ANON_KEY)
+
 
-supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_ANON_KEY)
+# Wrapped so every query is counted and timed per request (see app.core.metrics)
+supabase = InstrumentedClient(create_data_client())
 
-__all__ = ["supabase"]
+__all__ = ["create_data_client", "supabase"]
@@ -0,0 +1,190 @@
+"""Sanitized traffic capture for load-test replay.
+
+``TrafficCaptureMiddleware`` appends one JSON line per API request to
+``TRAFFIC_CAPTURE_PATH``: arrival time, method, raw path and route template,
+query parameters, a sanitized JSON body, status, duration and response size.
+``benchmarks/replay.py`` plays a capture back against a running instance at
+a chosen speed to reproduce real request mixes (e.g. deadline-night bursts of
+evaluation submits and report polling).
+
+Sanitizing: request headers are never recorded; values under sensitive keys
+(passwords, tokens, secrets, keys, the old ``profile`` key parameter) are
+replaced by ``[redacted]``; other strings keep their length and punctuation
+but letters and digits are masked (``alice@uni.edu`` -> ``xxxxx@xxx.xxx``).
+Numbers, booleans, nulls, dates and enum-like fields (role, status, ...) are
+kept, so ids and scores still point at real rows and bodies still validate
+when replayed against the same dataset. Query parameters are sanitized the
+same way; as they arrive as strings, numeric and boolean values are kept.
+"""
+import json
+import logging
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, Optional, Sequence
+from urllib.parse import parse_qsl
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import route_template
+
+logger = logging.getLogger("app.traffic")
+
+REDACTED = "[redacted]"
+# ``profile`` carried the admin key as a query parameter; old clients may still send it.
+SENSITIVE_KEY = re.compile(r"pass|token|secret|key|auth|cookie|profile", re.IGNORECASE)
+KEEP_KEYS = frozenset({"role", "status", "format", "mode", "order", "sort"})
+_ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}([T ][\d:.]+(Z|[+-]\d{2}:?\d{2})?)?$")
+_LETTER = re.compile(r"[^\W\d_]")
+_DIGIT = re.compile(r"\d")
+_QUERY_SCALAR = re.compile(r"^(-?\d+(\.\d+)?|true|false|null)$", re.IGNORECASE)
+
+
+def mask_string(value: str) -> str:
+    return _DIGIT.sub("0", _LETTER.sub("x", value))
+
+
+def sanitize(value: Any, key: str = "") -> Any:
+    """Recursively redact sensitive keys and mask strings, keeping the shape."""
+    if key and SENSITIVE_KEY.search(key):
+        return REDACTED
+    if isinstance(value, dict):
+        return {k: sanitize(v, k) for k, v in value.items()}
+    if isinstance(value, list):
+        return [sanitize(item) for item in value]
+    if isinstance(value, str):
+        if key in KEEP_KEYS or _ISO_DATE.match(value):
+            return value
+        return mask_string(value)
+    return value
+
+
+def _query_params(scope: Scope) -> Dict[str, Any]:
+    params: Dict[str, Any] = {}
+    for name, value in parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True):
+        if not _QUERY_SCALAR.match(value) or SENSITIVE_KEY.search(name):
+            value = sanitize(value, name)
+        if name in params:
+            existing = params[name]
+            params[name] = (existing if isinstance(existing, list) else [existing]) + [value]
+        else:
+            params[name] = value
+    return params
+
+
+class TrafficLog:
+    """Thread-safe, line-buffered JSONL writer."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a", buffering=1)
+            self._file.write(line)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class TrafficCaptureMiddleware:
+    """ASGI middleware recording sanitized request traces for replay."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        log: TrafficLog,
+        sample_rate: float = 1.0,
+        max_body: int = 65536,
+        path_prefixes: Sequence[str] = ("/api/",),
+        exclude_prefixes: Sequence[str] = ("/api/v1/admin",),
+    ):
+        self.app = app
+        self.log = log
+        self.sample_rate = sample_rate
+        self.max_body = max_body
+        self.path_prefixes = tuple(path_prefixes)
+        self.exclude_prefixes = tuple(exclude_prefixes)
+
+    def _captured(self, scope: Scope) -> bool:
+        path = scope["path"]
+        return (
+            scope["type"] == "http"
+            and path.startswith(self.path_prefixes)
+            and not path.startswith(self.exclude_prefixes)
+            and (self.sample_rate >= 1 or random.random() < self.sample_rate)
+        )
+
+    def _body(self, chunks: list, size: int, content_type: str) -> Optional[Any]:
+        if not size:
+            return None
+        if size > self.max_body:
+            return {"_truncated_bytes": size}
+        raw = b"".join(chunks)
+        if "json" not in content_type:
+            return {"_bytes": size}
+        try:
+            return sanitize(json.loads(raw))
+        except ValueError:
+            return {"_invalid_json_bytes": size}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not self._captured(scope):
+            await self.app(scope, receive, send)
+            return
+
+        arrived = time.time()
+        started = time.perf_counter()
+        chunks: list = []
+        body_size = 0
+        status_code = 500
+        response_bytes = 0
+
+        async def receive_wrapper() -> Message:
+            nonlocal body_size
+            message = await receive()
+            if message["type"] == "http.request":
+                body = message.get("body", b"")
+                body_size += len(body)
+                if body_size <= self.max_body:
+                    chunks.append(body)
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_bytes
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            headers = dict(scope.get("headers") or [])
+            content_type = headers.get(b"content-type", b"").decode("latin-1")
+            try:
+                self.log.write({
+                    "ts": round(arrived, 6),
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": route_template(scope),
+                    "query": _query_params(scope),
+                    "body": self._body(chunks, body_size, content_type),
+                    "status": status_code,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                    "response_bytes": response_bytes,
+                })
+            except OSError as e:
+                logger.warning("Traffic capture write failed: %s", e)
+
+
+__all__ = ["TrafficCaptureMiddleware", "TrafficLog", "mask_string", "sanitize"]
@@ -0,0 +1,713 @@
+"""In-memory data backend that stands in for Supabase.
+
+``MemoryClient`` implements the subset of the supabase-py / PostgREST query
+builder the routers use (``table().select/insert/update/upsert/delete``,
+``eq/neq/gt/gte/lt/lte/in_/is_`` filters, ``order``, ``limit``, ``range``,
+``single``, ``count="exact"`` and ``rpc``) over plain dicts, so the whole API
+runs offline for benchmarks and CI (``DATA_BACKEND=memory``).
+
+The tables from ``docs/SETUP_DATABASE.sql`` are modelled with their
+defaults, NOT NULL columns, unique constraints, foreign keys with
+``ON DELETE CASCADE`` and the secondary indexes (used here as hash indexes
+for equality lookups). Violations raise ``APIError`` with the same
+PostgreSQL error codes PostgREST returns (23502, 23503, 23505). A bulk
+insert is one statement: every row is checked before any is stored.
+
+Like PostgREST, rows are returned as fresh JSON-style dicts: timestamps and
+dates are ISO strings, and callers may mutate the rows they receive.
+
+The SQL functions the API calls through ``rpc`` are mirrored in ``FUNCTIONS``;
+each runs under the database lock, so like the plpgsql original it is atomic.
+"""
+import json
+import threading
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+try:
+    from postgrest.exceptions import APIError
+except ImportError:  # supabase not installed: offline-only environment
+    class APIError(Exception):
+        def __init__(self, error: Dict[str, Any]) -> None:
+            self.message = error.get("message")
+            self.code = error.get("code")
+            self.hint = error.get("hint")
+            self.details = error.get("details")
+            Exception.__init__(self, str(error))
+
+
+@dataclass
+class TableSchema:
+    name: str
+    columns: Dict[str, str]  # column -> type: int | str | timestamp | date | json
+    required: Tuple[str, ...] = ()
+    defaults: Dict[str, Any] = field(default_factory=dict)
+    unique: Tuple[Tuple[str, ...], ...] = ()
+    foreign_keys: Dict[str, str] = field(default_factory=dict)  # column -> parent table (ON DELETE CASCADE)
+    indexes: Tuple[str, ...] = ()
+
+
+NOW = object()  # default placeholder for TIMESTAMPTZ DEFAULT NOW()
+
+SCHEMA: Dict[str, TableSchema] = {schema.name: schema for schema in (
+    TableSchema(
+        "users",
+        {"id": "int", "email": "str", "password_hash": "str", "name": "str", "role": "str",
+         "created_at": "timestamp", "updated_at": "timestamp"},
+        required=("email", "name", "role"),
+        defaults={"role": "student", "created_at": NOW, "updated_at": NOW},
+        unique=(("email",),),
+        indexes=("email", "role"),
+    ),
+    TableSchema(
+        "projects",
+        {"id": "int", "title": "str", "description": "str", "instructor_id": "int", "start_date": "date",
+         "end_date": "date", "status": "str", "created_at": "timestamp", "updated_at": "timestamp"},
+        required=("title", "instructor_id"),
+        defaults={"status": "active", "created_at": NOW, "updated_at": NOW},
+        foreign_keys={"instructor_id": "users"},
+        indexes=("instructor_id", "status"),
+    ),
+    TableSchema(
+        "teams",
+        {"id": "int", "project_id": "int", "name": "str", "created_at": "timestamp", "updated_at": "timestamp"},
+        required=("project_id", "name"),
+        defaults={"created_at": NOW, "updated_at": NOW},
+        foreign_keys={"project_id": "projects"},
+        indexes=("project_id",),
+    ),
+    TableSchema(
+        "team_members",
+        {"id": "int", "team_id": "int", "user_id": "int", "joined_at": "timestamp"},
+        required=("team_id", "user_id"),
+        defaults={"joined_at": NOW},
+        unique=(("team_id", "user_id"),),
+        foreign_keys={"team_id": "teams", "user_id": "users"},
+        indexes=("team_id", "user_id"),
+    ),
+    TableSchema(
+        "evaluation_forms",
+        {"id": "int", "project_id": "int", "title": "str", "description": "str", "max_score": "int",
+         "created_at": "timestamp", "updated_at": "timestamp"},
+        required=("project_id", "title"),
+        defaults={"max_score": 100, "created_at": NOW, "updated_at": NOW},
+        foreign_keys={"project_id": "projects"},
+        indexes=("project_id",),
+    ),
+    TableSchema(
+        "form_criteria",
+        {"id": "int", "form_id": "int", "text": "str", "max_points": "int", "order_index": "int",
+         "created_at": "timestamp"},
+        required=("form_id", "text", "max_points"),
+        defaults={"order_index": 0, "created_at": NOW},
+        foreign_keys={"form_id": "evaluation_forms"},
+        indexes=("form_id",),
+    ),
+    TableSchema(
+        "evaluations",
+        {"id": "int", "form_id": "int", "evaluator_id": "int", "evaluatee_id": "int", "team_id": "int",
+         "total_score": "int", "comments": "str", "submitted_at": "timestamp"},
+        required=("form_id", "evaluator_id", "evaluatee_id", "team_id"),
+        defaults={"submitted_at": NOW},
+        unique=(("form_id", "evaluator_id", "evaluatee_id"),),
+        foreign_keys={"form_id": "evaluation_forms", "evaluator_id": "users", "evaluatee_id": "users",
+                      "team_id": "teams"},
+        indexes=("form_id", "evaluator_id", "evaluatee_id", "team_id"),
+    ),
+    TableSchema(
+        "evaluation_scores",
+        {"id": "int", "evaluation_id": "int", "criterion_id": "int", "score": "int", "created_at": "timestamp"},
+        required=("evaluation_id", "criterion_id", "score"),
+        defaults={"created_at": NOW},
+        unique=(("evaluation_id", "criterion_id"),),
+        foreign_keys={"evaluation_id": "evaluations", "criterion_id": "form_criteria"},
+        indexes=("evaluation_id", "criterion_id"),
+    ),
+    TableSchema(
+        "evaluation_drafts",
+        {"id": "int", "form_id": "int", "evaluator_id": "int", "evaluatee_id": "int", "team_id": "int",
+         "scores": "json", "comments": "str", "updated_at": "timestamp"},
+        required=("form_id", "evaluator_id", "evaluatee_id", "scores"),
+        defaults={"scores": {}, "updated_at": NOW},
+        unique=(("form_id", "evaluator_id", "evaluatee_id"),),
+        foreign_keys={"form_id": "evaluation_forms", "evaluator_id": "users", "evaluatee_id": "users",
+                      "team_id": "teams"},
+        indexes=("evaluator_id",),
+    ),
+)}
+
+
+def _error(code: str, message: str, details: Optional[str] = None) -> APIError:
+    return APIError({"code": code, "message": message, "details": details, "hint": None})
+
+
+def _coerce(kind: str, value: Any) -> Any:
+    """Store values the way PostgREST returns them (JSON scalars, ISO strings)."""
+    if value is None:
+        return None
+    if kind == "int":
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            raise _error("22P02", f"invalid input syntax for type integer: \"{value}\"")
+        try:
+            return int(value)
+        except ValueError:
+            raise _error("22P02", f"invalid input syntax for type integer: \"{value}\"")
+    if kind == "timestamp":
+        if isinstance(value, datetime):
+            return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).isoformat()
+        return str(value)
+    if kind == "date":
+        return value.isoformat() if isinstance(value, date) else str(value)
+    if kind == "json":
+        return json.loads(json.dumps(value))  # a private copy, as stored JSONB would be
+    return value if isinstance(value, str) else str(value)
+
+
+class _Table:
+    """Rows of one table keyed by primary key, plus unique and hash indexes."""
+
+    def __init__(self, schema: TableSchema):
+        self.schema = schema
+        self.rows: Dict[int, Dict[str, Any]] = {}
+        self.next_id = 1
+        self.unique: Dict[Tuple[str, ...], Dict[Tuple[Any, ...], int]] = {cols: {} for cols in schema.unique}
+        self.indexes: Dict[str, Dict[Any, Set[int]]] = {col: {} for col in schema.indexes}
+
+    def _index(self, row: Dict[str, Any]) -> None:
+        for cols, index in self.unique.items():
+            key = tuple(row.get(col) for col in cols)
+            if None not in key:
+                index[key] = row["id"]
+        for col, index in self.indexes.items():
+            index.setdefault(row.get(col), set()).add(row["id"])
+
+    def _unindex(self, row: Dict[str, Any]) -> None:
+        for cols, index in self.unique.items():
+            key = tuple(row.get(col) for col in cols)
+            if index.get(key) == row["id"]:
+                del index[key]
+        for col, index in self.indexes.items():
+            ids = index.get(row.get(col))
+            if ids is not None:
+                ids.discard(row["id"])
+                if not ids:
+                    del index[row.get(col)]
+
+    def conflict(self, row: Dict[str, Any], cols: Sequence[str]) -> Optional[int]:
+        """Id of the row that ``row`` collides with on ``cols``, if any."""
+        if tuple(cols) == ("id",):
+            return row.get("id") if row.get("id") in self.rows else None
+        key = tuple(row.get(col) for col in cols)
+        return self.unique.get(tuple(cols), {}).get(key)
+
+    def candidates(self, column: str, values: Iterable[Any]) -> Optional[List[int]]:
+        """Row ids for an equality/IN lookup, or ``None`` when not indexed."""
+        if column == "id":
+            return sorted(v for v in values if v in self.rows)
+        index = self.indexes.get(column)
+        if index is None:
+            return None
+        ids: Set[int] = set()
+        for value in values:
+            ids |= index.get(value, set())
+        return sorted(ids)
+
+
+class MemoryDatabase:
+    """The application tables held in process memory."""
+
+    def __init__(self, schema: Dict[str, TableSchema] = SCHEMA):
+        self.schema = schema
+        self.lock = threading.RLock()
+        self.functions: Dict[str, Callable[..., Any]] = dict(FUNCTIONS)
+        self.reset()
+
+    def reset(self) -> None:
+        with self.lock:
+            self.tables: Dict[str, _Table] = {name: _Table(schema) for name, schema in self.schema.items()}
+
+    def table(self, name: str) -> _Table:
+        table = self.tables.get(name)
+        if table is None:
+            raise _error("42P01", f'relation "public.{name}" does not exist')
+        return table
+
+    # Writes --------------------------------------------------------------
+
+    def _normalize(self, table: _Table, values: Dict[str, Any]) -> Dict[str, Any]:
+        row = {}
+        for column, value in values.items():
+            kind = table.schema.columns.get(column)
+            if kind is None:
+                raise _error("PGRST204", f"Could not find the '{column}' column of '{table.schema.name}' in the schema cache")
+            row[column] = _coerce(kind, value)
+        return row
+
+    def _check(self, table: _Table, row: Dict[str, Any], ignore_id: Optional[int] = None) -> None:
+        name = table.schema.name
+        for column in table.schema.required:
+            if row.get(column) is None:
+                raise _error("23502", f'null value in column "{column}" of relation "{name}" violates not-null constraint')
+        for column, parent in table.schema.foreign_keys.items():
+            value = row.get(column)
+            if value is not None and value not in self.tables[parent].rows:
+                raise _error(
+                    "23503",
+                    f'insert or update on table "{name}" violates foreign key constraint "fk_{name}_{column.replace("_id", "")}"',
+                    f"Key ({column})=({value}) is not present in table \"{parent}\".",
+                )
+        for cols in table.schema.unique:
+            existing = table.conflict(row, cols)
+            if existing is not None and existing != ignore_id:
+                key = ", ".join(cols)
+                values = ", ".join(str(row.get(col)) for col in cols)
+                raise _error("23505", f'duplicate key value violates unique constraint "{name}_{"_".join(cols)}_key"',
+                             f"Key ({key})=({values}) already exists.")
+
+    def insert(self, name: str, values: Dict[str, Any]) -> Dict[str, Any]:
+        return self.insert_many(name, [values])[0]
+
+    def insert_many(self, name: str, payload: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insert rows as one statement: all are checked before any is stored."""
+        table = self.table(name)
+        rows: List[Dict[str, Any]] = []
+        next_id = table.next_id
+        batch_keys: Dict[Tuple[str, ...], Set[Tuple[Any, ...]]] = {("id",): set()}
+        batch_keys.update((cols, set()) for cols in table.schema.unique)
+        for values in payload:
+            row = {column: None for column in table.schema.columns}
+            row.update(self._normalize(table, values))
+            for column, default in table.schema.defaults.items():
+                if column not in values:
+                    value = datetime.now(timezone.utc) if default is NOW else default
+                    row[column] = _coerce(table.schema.columns[column], value)
+            if row.get("id") is None:
+                row["id"] = next_id
+            elif row["id"] in table.rows:
+                raise _error("23505", f'duplicate key value violates unique constraint "{name}_pkey"',
+                             f"Key (id)=({row['id']}) already exists.")
+            self._check(table, row)
+            # Rows of the same statement collide with each other too
+            for cols, seen in batch_keys.items():
+                key = tuple(row.get(col) for col in cols)
+                if None in key:
+                    continue
+                if key in seen:
+                    constraint = f"{name}_pkey" if cols == ("id",) else f"{name}_{'_'.join(cols)}_key"
+                    raise _error("23505", f'duplicate key value violates unique constraint "{constraint}"',
+                                 f"Key ({', '.join(cols)})=({', '.join(map(str, key))}) already exists.")
+                seen.add(key)
+            next_id = max(next_id, row["id"] + 1)
+            rows.append(row)
+        for row in rows:
+            table.rows[row["id"]] = row
+            table._index(row)
+        table.next_id = next_id
+        return rows
+
+    def update(self, name: str, row_id: int, values: Dict[str, Any]) -> Dict[str, Any]:
+        table = self.table(name)
+        current = table.rows[row_id]
+        row = {**current, **self._normalize(table, values)}
+        if row["id"] != row_id:
+            raise _error("0A000", "changing primary keys is not supported by the memory backend")
+        self._check(table, row, ignore_id=row_id)
+        table._unindex(current)
+        table.rows[row_id] = row
+        table._index(row)
+        return row
+
+    def delete(self, name: str, row_id: int) -> Dict[str, Any]:
+        """Delete a row and, like ON DELETE CASCADE, every row referencing it."""
+        table = self.table(name)
+        row = table.rows.pop(row_id)
+        table._unindex(row)
+        for child_name, child in self.tables.items():
+            for column, parent in child.schema.foreign_keys.items():
+                if parent != name:
+                    continue
+                child_ids = child.candidates(column, [row_id])
+                if child_ids is None:
+                    child_ids = [cid for cid, r in child.rows.items() if r.get(column) == row_id]
+                for child_id in child_ids:
+                    if child_id in child.rows:
+                        self.delete(child_name, child_id)
+        return row
+
+    # Bulk load / dump ----------------------------------------------------
+
+    def load(self, data: Dict[str, List[Dict[str, Any]]]) -> None:
+        """Insert rows per table, parents first (keys are table names)."""
+        with self.lock:
+            for name in self.schema:
+                for row in data.get(name, []):
+                    self.insert(name, row)
+
+    def load_file(self, path: str) -> None:
+        with open(path) as f:
+            self.load(json.load(f))
+
+    def dump(self) -> Dict[str, List[Dict[str, Any]]]:
+        with self.lock:
+            return {name: [dict(row) for row in table.rows.values()] for name, table in self.tables.items()}
+
+    def register_function(self, name: str, fn: Callable[..., Any]) -> None:
+        """Make ``fn(db, **params)`` callable through ``client.rpc(name, params)``."""
+        self.functions[name] = fn
+
+
+def _update_evaluation_scores(
+    db: MemoryDatabase,
+    p_evaluation_id: int,
+    p_total_score: Optional[int] = None,
+    p_comments: Optional[str] = None,
+    p_scores: Optional[List[Dict[str, Any]]] = None,
+) -> Optional[Dict[str, Any]]:
+    """Mirror of ``update_evaluation_scores`` in docs/SETUP_DATABASE.sql."""
+    evaluations = db.table("evaluations")
+    if p_evaluation_id not in evaluations.rows:
+        return None
+    scores_table = db.table("evaluation_scores")
+    wanted: Dict[int, int] = {}
+    for entry in p_scores or ():
+        criterion_id = _coerce("int", entry.get("criterion_id"))
+        if criterion_id not in db.tables["form_criteria"].rows:
+            # Checked up front so a failure leaves nothing half-applied.
+            raise _error(
+                "23503",
+                'insert or update on table "evaluation_scores" violates foreign key constraint "fk_evaluation_scores_criterion"',
+                f"Key (criterion_id)=({criterion_id}) is not present in table \"form_criteria\".",
+            )
+        wanted[criterion_id] = _coerce("int", entry.get("score"))
+    if None in wanted.values():
+        raise _error("23502", 'null value in column "score" of relation "evaluation_scores" violates not-null constraint')
+
+    changes = {}
+    if p_total_score is not None:
+        changes["total_score"] = p_total_score
+    if p_comments is not None:
+        changes["comments"] = p_comments
+    evaluation = db.update("evaluations", p_evaluation_id, changes)
+
+    if p_scores is not None:
+        existing = {
+            scores_table.rows[i]["criterion_id"]: scores_table.rows[i]
+            for i in scores_table.candidates("evaluation_id", [p_evaluation_id])
+        }
+        for criterion_id, row in existing.items():
+            if criterion_id not in wanted:
+                db.delete("evaluation_scores", row["id"])
+            elif row["score"] != wanted[criterion_id]:
+                db.update("evaluation_scores", row["id"], {"score": wanted[criterion_id]})
+        for criterion_id, score in wanted.items():
+            if criterion_id not in existing:
+                db.insert("evaluation_scores", {"evaluation_id": p_evaluation_id, "criterion_id": criterion_id, "score": score})
+
+    scores = [scores_table.rows[i] for i in scores_table.candidates("evaluation_id", [p_evaluation_id])]
+    return {**evaluation, "scores": [dict(row) for row in sorted(scores, key=lambda row: row["id"])]}
+
+
+def _merge_evaluation_drafts(db: MemoryDatabase, p_drafts: List[Dict[str, Any]]) -> int:
+    """Mirror of ``merge_evaluation_drafts`` in docs/SETUP_DATABASE.sql."""
+    drafts = db.table("evaluation_drafts")
+    evaluations = db.table("evaluations")
+    key_fields = ("form_id", "evaluator_id", "evaluatee_id")
+    writes, submitted = [], []
+    for entry in p_drafts:
+        key = tuple(_coerce("int", entry.get(field)) for field in key_fields)
+        existing_id = drafts.unique[key_fields].get(key)
+        if evaluations.unique[key_fields].get(key) is not None:
+            if existing_id is not None:
+                submitted.append(existing_id)
+            continue
+        stored = drafts.rows[existing_id] if existing_id is not None else {}
+        scores = {**(stored.get("scores") or {}), **(entry.get("scores") or {})}
+        for criterion_id in entry.get("cleared") or ():
+            scores.pop(criterion_id, None)
+        values = dict(zip(key_fields, key), scores=scores)
+        for column in ("team_id", "comments"):
+            values[column] = entry[column] if entry.get(column) is not None else stored.get(column)
+        updated_at = _coerce("timestamp", entry.get("updated_at"))
+        values["updated_at"] = max(filter(None, (updated_at, stored.get("updated_at"))), default=None)
+        row = {**stored, **db._normalize(drafts, values)}
+        # Checked up front so a failure leaves nothing half-applied.
+        db._check(drafts, row, ignore_id=existing_id)
+        writes.append((existing_id, values))
+    for existing_id, values in writes:
+        if existing_id is None:
+            db.insert("evaluation_drafts", {k: v for k, v in values.items() if v is not None})
+        else:
+            db.update("evaluation_drafts", existing_id, values)
+    for draft_id in submitted:
+        db.delete("evaluation_drafts", draft_id)
+    return len(writes)
+
+
+def _criterion_usage_counts(db: MemoryDatabase, p_form_id: int) -> List[Dict[str, Any]]:
+    """Mirror of ``criterion_usage_counts`` in docs/SETUP_DATABASE.sql."""
+    criteria = db.table("form_criteria").candidates("form_id", [_coerce("int", p_form_id)])
+    scores = db.table("evaluation_scores")
+    return [
+        {"criterion_id": criterion_id, "usage_count": len(scores.candidates("criterion_id", [criterion_id]))}
+        for criterion_id in criteria
+    ]
+
+
+FUNCTIONS: Dict[str, Callable[..., Any]] = {
+    "criterion_usage_counts": _criterion_usage_counts,
+    "merge_evaluation_drafts": _merge_evaluation_drafts,
+    "update_evaluation_scores": _update_evaluation_scores,
+}
+
+
+@dataclass
+class MemoryResponse:
+    """Mirrors postgrest's ``APIResponse``."""
+
+    data: Any
+    count: Optional[int] = None
+
+
+_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "eq": lambda a, b: a is not None and a == b,
+    "neq": lambda a, b: a is not None and a != b,
+    "gt": lambda a, b: a is not None and a > b,
+    "gte": lambda a, b: a is not None and a >= b,
+    "lt": lambda a, b: a is not None and a < b,
+    "lte": lambda a, b: a is not None and a <= b,
+    "in": lambda a, b: a in b,
+    "is": lambda a, b: a is b,
+}
+
+
+class MemoryQuery:
+    """Chainable query on one table, executed against a ``MemoryDatabase``."""
+
+    def __init__(self, db: MemoryDatabase, name: str):
+        self.db = db
+        self.name = name
+        self._action = "select"
+        self._columns: Optional[List[str]] = None
+        self._payload: Any = None
+        self._on_conflict: Optional[Tuple[str, ...]] = None
+        self._ignore_duplicates = False
+        self._count: Optional[str] = None
+        self._head = False
+        self._filters: List[Tuple[str, str, Any]] = []
+        self._order: List[Tuple[str, bool, bool]] = []
+        self._offset = 0
+        self._limit: Optional[int] = None
+        self._single: Optional[str] = None
+
+    # Actions -------------------------------------------------------------
+
+    def select(self, *columns: str, count: Optional[str] = None, head: bool = False) -> "MemoryQuery":
+        names = [c.strip() for part in (columns or ("*",)) for c in part.split(",") if c.strip()]
+        if any("(" in c or ":" in c for c in names):
+            raise _error("PGRST100", "embedded resources are not supported by the memory backend")
+        self._columns = None if "*" in names else names
+        self._count = count
+        self._head = head
+        return self
+
+    def insert(self, json: Any, *, count: Optional[str] = None, upsert: bool = False, **_: Any) -> "MemoryQuery":
+        self._action = "upsert" if upsert else "insert"
+        self._payload = json
+        self._count = count
+        return self
+
+    def upsert(self, json: Any, *, on_conflict: str = "", ignore_duplicates: bool = False,
+               count: Optional[str] = None, **_: Any) -> "MemoryQuery":
+        self._action = "upsert"
+        self._payload = json
+        self._on_conflict = tuple(c.strip() for c in on_conflict.split(",") if c.strip()) or None
+        self._ignore_duplicates = ignore_duplicates
+        self._count = count
+        return self
+
+    def update(self, json: Dict[str, Any], *, count: Optional[str] = None, **_: Any) -> "MemoryQuery":
+        self._action = "update"
+        self._payload = json
+        self._count = count
+        return self
+
+    def delete(self, *, count: Optional[str] = None, **_: Any) -> "MemoryQuery":
+        self._action = "delete"
+        self._count = count
+        return self
+
+    # Filters and modifiers ----------------------------------------------
+
+    def _filter(self, column: str, operator: str, value: Any) -> "MemoryQuery":
+        self._filters.append((column, operator, value))
+        return self
+
+    def eq(self, column: str, value: Any) -> "MemoryQuery":
+        return self._filter(column, "eq", value)
+
+    def neq(self, column: str, value: Any) -> "MemoryQuery":
+        return self._filter(column, "neq", value)
+
+    def gt(self, column: str, value: Any) -> "MemoryQuery":
+        return self._filter(column, "gt", value)
+
+    def gte(self, column: str, value: Any) -> "MemoryQuery":
+        return self._filter(column, "gte", value)
+
+    def lt(self, column: str, value: Any) -> "MemoryQuery":
+        return self._filter(column, "lt", value)
+
+    def lte(self, column: str, value: Any) -> "MemoryQuery":
+        return self._filter(column, "lte", value)
+
+    def in_(self, column: str, values: Iterable[Any]) -> "MemoryQuery":
+        return self._filter(column, "in", list(values))
+
+    def is_(self, column: str, value: Any) -> "MemoryQuery":
+        return self._filter(column, "is", None if value in (None, "null") else value)
+
+    def order(self, column: str, *, desc: bool = False, nullsfirst: bool = False, **_: Any) -> "MemoryQuery":
+        self._order.append((column, desc, nullsfirst))
+        return self
+
+    def limit(self, size: int, **_: Any) -> "MemoryQuery":
+        self._limit = size
+        return self
+
+    def range(self, start: int, end: int, **_: Any) -> "MemoryQuery":
+        self._offset = start
+        self._limit = end - start + 1
+        return self
+
+    def single(self) -> "MemoryQuery":
+        self._single = "single"
+        return self
+
+    def maybe_single(self) -> "MemoryQuery":
+        self._single = "maybe"
+        return self
+
+    # Execution -----------------------------------------------------------
+
+    def _matching_ids(self, table: _Table) -> List[int]:
+        schema = table.schema
+        filters = []
+        for column, operator, value in self._filters:
+            kind = schema.columns.get(column)
+            if kind is None:
+                raise _error("42703", f"column {self.name}.{column} does not exist")
+            if operator == "in":
+                value = [_coerce(kind, v) for v in value]
+            elif operator != "is":
+                value = _coerce(kind, value)
+            filters.append((column, operator, value))
+
+        ids = None
+        for column, operator, value in filters:
+            if operator in ("eq", "in"):
+                ids = table.candidates(column, value if operator == "in" else [value])
+                if ids is not None:
+                    break
+        if ids is None:
+            ids = list(table.rows)
+
+        return [
+            row_id for row_id in ids
+            if all(_OPERATORS[op](table.rows[row_id].get(col), val) for col, op, val in filters)
+        ]
+
+    def _sorted(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        for column, desc, nullsfirst in reversed(self._order):
+            present = [r for r in rows if r.get(column) is not None]
+            missing = [r for r in rows if r.get(column) is None]
+            present.sort(key=lambda r: r[column], reverse=desc)
+            # PostgreSQL default: NULLS LAST for ASC, NULLS FIRST for DESC
+            rows = missing + present if (nullsfirst or desc) else present + missing
+        return rows
+
+    def _project(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        if self._columns is None:
+            return dict(row)
+        missing = [c for c in self._columns if c not in row]
+        if missing:
+            raise _error("42703", f"column {self.name}.{missing[0]} does not exist")
+        return {column: row[column] for column in self._columns}
+
+    def execute(self) -> MemoryResponse:
+        with self.db.lock:
+            table = self.db.table(self.name)
+            if self._action == "select":
+                rows = [table.rows[i] for i in self._matching_ids(table)]
+            elif self._action == "insert":
+                rows = self.db.insert_many(self.name, self._rows_payload())
+            elif self._action == "upsert":
+                rows = self._upsert(table)
+            elif self._action == "update":
+                rows = [self.db.update(self.name, i, self._payload) for i in self._matching_ids(table)]
+            else:
+                rows = [self.db.delete(self.name, i) for i in self._matching_ids(table)]
+
+            total = len(rows) if self._count else None
+            rows = self._sorted(rows) if self._order else rows
+            if self._offset or self._limit is not None:
+                end = None if self._limit is None else self._offset + self._limit
+                rows = rows[self._offset:end]
+            data = [] if self._head else [self._project(row) for row in rows]
+
+        if self._single is not None:
+            if len(data) == 1:
+                return MemoryResponse(data[0], total)
+            if self._single == "maybe" and not data:
+                return MemoryResponse(None, total)
+            raise _error("PGRST116", "JSON object requested, multiple (or no) rows returned",
+                         f"The result contains {len(data)} rows")
+        return MemoryResponse(data, total)
+
+    def _rows_payload(self) -> List[Dict[str, Any]]:
+        return self._payload if isinstance(self._payload, list) else [self._payload]
+
+    def _upsert(self, table: _Table) -> List[Dict[str, Any]]:
+        conflict_cols = self._on_conflict or ("id",)
+        rows = []
+        for values in self._rows_payload():
+            existing = table.conflict(self.db._normalize(table, values), conflict_cols)
+            if existing is None:
+                rows.append(self.db.insert(self.name, values))
+            elif not self._ignore_duplicates:
+                rows.append(self.db.update(self.name, existing, values))
+        return rows
+
+
+class MemoryRPC:
+    """Deferred call of a function registered with ``register_function``."""
+
+    def __init__(self, db: MemoryDatabase, name: str, params: Dict[str, Any]):
+        self.db = db
+        self.name = name
+        self.params = params
+
+    def execute(self) -> MemoryResponse:
+        fn = self.db.functions.get(self.name)
+        if fn is None:
+            raise _error("PGRST202", f"Could not find the function public.{self.name} in the schema cache")
+        with self.db.lock:
+            return MemoryResponse(fn(self.db, **self.params))
+
+
+class MemoryClient:
+    """Drop-in for the parts of ``supabase.Client`` the application uses."""
+
+    def __init__(self, db: Optional[MemoryDatabase] = None):
+        self.db = db or MemoryDatabase()
+
+    def table(self, name: str) -> MemoryQuery:
+        return MemoryQuery(self.db, name)
+
+    from_ = table
+
+    def rpc(self, fn: str, params: Optional[Dict[str, Any]] = None, *args: Any, **kwargs: Any) -> MemoryRPC:
+        return MemoryRPC(self.db, fn, params or {})
+
+
+__all__ = ["APIError", "MemoryClient", "MemoryDatabase", "MemoryResponse", "SCHEMA", "TableSchema"]
@@ -0,0 +1,39 @@
+"""Single-statement update and delete helpers for the routers.
+
+PostgREST answers an UPDATE or DELETE with the affected rows (``RETURNING *``),
+so a handler does not need to select a row first to learn whether it exists:
+an empty result means nothing matched, which these helpers turn into a 404.
+That is one round trip instead of two, and there is no window between the
+existence check and the write.
+"""
+from typing import Any, Dict
+
+from fastapi import HTTPException, status
+
+from app.core.supabase import supabase
+
+
+def match_filters(query, filters: Dict[str, Any]):
+    """Add an equality filter to ``query`` per item of ``filters``."""
+    for column, value in filters.items():
+        query = query.eq(column, value)
+    return query
+
+
+def update_one(table: str, values: Dict[str, Any], not_found: str, **filters: Any) -> Dict[str, Any]:
+    """Update the row matching ``filters`` (equality); returns it, or raises 404 with ``not_found``."""
+    result = match_filters(supabase.table(table).update(values), filters).execute()
+    if not result.data:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found)
+    return result.data[0]
+
+
+def delete_one(table: str, not_found: str, **filters: Any) -> Dict[str, Any]:
+    """Delete the row matching ``filters`` (equality); returns it, or raises 404 with ``not_found``."""
+    result = match_filters(supabase.table(table).delete(), filters).execute()
+    if not result.data:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found)
+    return result.data[0]
+
+
+__all__ = ["delete_one", "match_filters", "update_one"]
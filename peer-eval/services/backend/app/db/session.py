@@ -3,23 +3,28 @@ from typing import AsyncGenerator
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from app.core.config import settings
+from app.core.instrumentation import instrument_engine
 
-# Create async engine
-engine = create_async_engine(
-    settings.ASYNC_DATABASE_URL,
-    echo=settings.DEBUG,
-    future=True,
-    pool_pre_ping=True,
-)
+# Create async engine (none for the offline memory backend)
+engine = None
+AsyncSessionLocal = None
+if settings.ASYNC_DATABASE_URL:
+    engine = create_async_engine(
+        settings.ASYNC_DATABASE_URL,
+        echo=settings.DEBUG,
+        future=True,
+        pool_pre_ping=True,
+    )
+    instrument_engine(engine)
 
-# Session factory
-AsyncSessionLocal = async_sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autocommit=False,
-    autoflush=False,
-)
+    # Session factory
+    AsyncSessionLocal = async_sessionmaker(
+        engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False,
+    )
 
 # Base class for ORM models
 Base = declarative_base()
@@ -33,6 +38,8 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         async def read_items(db: AsyncSession = Depends(get_db)):
             ...
     """
+    if AsyncSessionLocal is None:
+        raise RuntimeError("No database configured (ASYNC_DATABASE_URL is not set)")
     async with AsyncSessionLocal() as session:
         try:
             yield session
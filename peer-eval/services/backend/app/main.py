@@ -1,27 +1,65 @@
 """FastAPI application entry point."""
+import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
-from app.core.config import settings
+from app.core.config import DEFAULT_KEYS, settings
+from app.core.admission import AdmissionMiddleware, ConcurrencyGate, Rate, RateLimiter
+from app.core.compression import CompressionMiddleware
+from app.core.idempotency import IdempotencyMiddleware, IdempotencyStore
+from app.core.instrumentation import QueryCountMiddleware, ServerTimingMiddleware
+from app.core.metrics import MetricsMiddleware, render_metrics
+from app.core.passwords import passwords
+from app.core.profiling import ProfilingMiddleware, profile_store
+from app.core.responses import default_response_class
+from app.core.security import admin_key_configured
+from app.core.traffic import TrafficCaptureMiddleware, TrafficLog
 from app.api.v1 import api_router
 from app.db import engine
+from app.services.drafts import draft_buffer
+from app.services.jobs import report_jobs
+from app.services.membership import membership_listener
+
+logging.basicConfig(
+    level=settings.LOG_LEVEL,
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+)
+logger = logging.getLogger("app")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan - startup and shutdown events."""
     # Startup
-    print("🚀 Starting Peer Evaluation API...")
-    print(f"📊 Environment: {settings.ENV}")
-    print(f"🔗 Supabase URL: {settings.SUPABASE_URL}")
-    print(f"🗄️  Database connected: {bool(engine)}")
+    logger.info("🚀 Starting Peer Evaluation API...")
+    logger.info("📊 Environment: %s", settings.ENV)
+    if settings.SECRET_KEY in DEFAULT_KEYS:
+        logger.warning("SECRET_KEY is a placeholder: access tokens can be forged (allowed in development only)")
+    logger.info("🔗 Data backend: %s", settings.DATA_BACKEND)
+    if settings.DATA_BACKEND == "supabase":
+        logger.info("🔗 Supabase URL: %s", settings.SUPABASE_URL)
+    logger.info("🗄️  Database connected: %s", bool(engine))
+    report_jobs.start()
+    passwords.start()
+    draft_buffer.start()
+    if membership_listener is not None:
+        membership_listener.start()
     
     yield
     
     # Shutdown
-    print("👋 Shutting down Peer Evaluation API...")
-    await engine.dispose()
+    logger.info("👋 Shutting down Peer Evaluation API...")
+    if membership_listener is not None:
+        await membership_listener.shutdown()
+    draft_buffer.shutdown()
+    report_jobs.shutdown()
+    passwords.shutdown()
+    if traffic_log is not None:
+        traffic_log.close()
+    if engine is not None:
+        await engine.dispose()
 
 
 # Create FastAPI application
@@ -32,8 +70,16 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     lifespan=lifespan,
+    default_response_class=default_response_class,
 )
 
+# Idempotency-Key replay (innermost, so stored responses are uncompressed and replays run no queries)
+if settings.IDEMPOTENCY_ENABLED:
+    app.add_middleware(
+        IdempotencyMiddleware,
+        store=IdempotencyStore(settings.IDEMPOTENCY_MAX_ENTRIES, settings.IDEMPOTENCY_TTL_SECONDS),
+    )
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -43,6 +89,67 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Phase timings for browser devtools (inside compression, so it is not counted)
+if settings.SERVER_TIMING_ENABLED:
+    app.add_middleware(ServerTimingMiddleware, timing_allow_origin=", ".join(settings.ALLOWED_ORIGINS))
+
+# Response compression (gzip/brotli) for large payloads
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    )
+
+# Per-request DB call count (debug header + N+1 warning log)
+app.add_middleware(
+    QueryCountMiddleware,
+    expose_header=settings.DEBUG if settings.QUERY_COUNT_HEADER is None else settings.QUERY_COUNT_HEADER,
+    log_threshold=settings.QUERY_COUNT_LOG_THRESHOLD,
+)
+
+# Per-user rate limits and the report concurrency cap (inside metrics, so 429s are counted)
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(
+        AdmissionMiddleware,
+        limiter=RateLimiter({
+            "auth": Rate(settings.RATE_LIMIT_AUTH_PER_MINUTE, settings.RATE_LIMIT_AUTH_BURST),
+            "write": Rate(settings.RATE_LIMIT_WRITE_PER_MINUTE, settings.RATE_LIMIT_WRITE_BURST),
+            "read": Rate(settings.RATE_LIMIT_READ_PER_MINUTE, settings.RATE_LIMIT_READ_BURST),
+            "report": Rate(settings.RATE_LIMIT_REPORT_PER_MINUTE, settings.RATE_LIMIT_REPORT_BURST),
+        }),
+        report_gate=ConcurrencyGate(
+            settings.REPORT_MAX_CONCURRENCY,
+            settings.REPORT_MAX_QUEUED,
+            settings.REPORT_QUEUE_TIMEOUT_SECONDS,
+        ) if settings.REPORT_MAX_CONCURRENCY > 0 else None,
+    )
+
+# Request metrics (outermost, so latency includes compression)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# On-demand profiling of single requests (X-Profile: <ADMIN_KEY>)
+if settings.PROFILING_ENABLED and not admin_key_configured():
+    logger.warning("Request profiling is off: ADMIN_KEY is not configured")
+elif settings.PROFILING_ENABLED:
+    app.add_middleware(
+        ProfilingMiddleware,
+        store=profile_store,
+        sample_interval=settings.PROFILE_SAMPLE_INTERVAL,
+    )
+
+# Sanitized request traces for load-test replay (benchmarks/replay.py)
+traffic_log = TrafficLog(settings.TRAFFIC_CAPTURE_PATH) if settings.TRAFFIC_CAPTURE_PATH else None
+if traffic_log is not None:
+    app.add_middleware(
+        TrafficCaptureMiddleware,
+        log=traffic_log,
+        sample_rate=settings.TRAFFIC_CAPTURE_SAMPLE_RATE,
+        max_body=settings.TRAFFIC_CAPTURE_MAX_BODY,
+    )
+
 # Include API router
 app.include_router(api_router, prefix="/api")
 
@@ -69,6 +176,14 @@ async def health_check():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics for this worker process."""
+    if not settings.METRICS_ENABLED:
+        return PlainTextResponse("metrics disabled\n", status_code=404)
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -0,0 +1,173 @@
+"""Columnar (Parquet / Arrow IPC) export of evaluation scores for analytics.
+
+Each score row is joined with its evaluation, criterion and team and written
+with typed integer and timestamp columns, partitioned Hive-style by project
+and form::
+
+    {output_dir}/project_id=1/form_id=3/part-0.parquet
+
+Rows are read from a server-side cursor ordered by partition, converted to
+Arrow record batches of ``batch_size`` rows and appended to the current
+partition's writer, so at most one batch and one open writer are held in
+memory regardless of the term's size. ``pyarrow`` is an optional dependency.
+"""
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency
+    pa = None
+
+EXPORT_FORMATS = ("parquet", "arrow")
+
+SCORES_QUERY = """
+    SELECT t.project_id, e.form_id,
+           s.id AS score_id, s.evaluation_id, e.team_id, s.criterion_id,
+           e.evaluator_id, e.evaluatee_id,
+           s.score, c.max_points, c.order_index, e.total_score,
+           e.submitted_at, s.created_at AS scored_at
+    FROM evaluation_scores s
+    JOIN evaluations e ON e.id = s.evaluation_id
+    JOIN form_criteria c ON c.id = s.criterion_id
+    JOIN teams t ON t.id = e.team_id
+    {where}
+    ORDER BY t.project_id, e.form_id, s.id
+"""
+
+class AnalyticsExportError(Exception):
+    """Raised when an export cannot be performed."""
+
+
+def pyarrow_available() -> bool:
+    return pa is not None
+
+
+def scores_schema() -> "pa.Schema":
+    timestamp = pa.timestamp("us", tz="UTC")
+    return pa.schema([
+        ("project_id", pa.int64()),
+        ("form_id", pa.int64()),
+        ("score_id", pa.int64()),
+        ("evaluation_id", pa.int64()),
+        ("team_id", pa.int64()),
+        ("criterion_id", pa.int64()),
+        ("evaluator_id", pa.int64()),
+        ("evaluatee_id", pa.int64()),
+        ("score", pa.int32()),
+        ("max_points", pa.int32()),
+        ("order_index", pa.int32()),
+        ("total_score", pa.int32()),
+        ("submitted_at", timestamp),
+        ("scored_at", timestamp),
+    ])
+
+
+class _PartitionWriter:
+    """Writes batches for one (project, form) partition at a time."""
+
+    def __init__(self, output_dir: Path, format: str, schema: "pa.Schema"):
+        self.output_dir = output_dir
+        self.format = format
+        self.schema = schema
+        self.key = None
+        self._writer = None
+        self._sink = None
+        self.files: List[Dict[str, Any]] = []
+
+    def write(self, key: tuple, batch: "pa.RecordBatch") -> None:
+        if key != self.key:
+            self.close()
+            self._open(key)
+        self._writer.write_batch(batch)
+        self.files[-1]["rows"] += batch.num_rows
+
+    def _open(self, key: tuple) -> None:
+        project_id, form_id = key
+        directory = self.output_dir / f"project_id={project_id}" / f"form_id={form_id}"
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"part-0.{self.format}"
+        if self.format == "parquet":
+            self._writer = pq.ParquetWriter(str(path), self.schema, compression="zstd")
+        else:
+            self._sink = pa.OSFile(str(path), "wb")
+            self._writer = pa.ipc.new_file(self._sink, self.schema)
+        self.key = key
+        self.files.append({"path": str(path), "project_id": project_id, "form_id": form_id, "rows": 0})
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._sink is not None:
+            self._sink.close()
+            self._sink = None
+        self.key = None
+
+
+def _to_batches(rows: Sequence[Sequence[Any]], schema: "pa.Schema"):
+    """Split rows (sorted by partition) into one record batch per partition run."""
+    start = 0
+    for end in range(1, len(rows) + 1):
+        if end == len(rows) or rows[end][0:2] != rows[start][0:2]:
+            run = rows[start:end]
+            columns = list(zip(*run))
+            arrays = [pa.array(column, type=field.type) for column, field in zip(columns, schema)]
+            yield (run[0][0], run[0][1]), pa.RecordBatch.from_arrays(arrays, schema=schema)
+            start = end
+
+
+async def export_scores(
+    output_dir: str,
+    project_id: Optional[int] = None,
+    format: str = "parquet",
+    batch_size: int = 100_000,
+) -> Dict[str, Any]:
+    """Export evaluation scores to partitioned Parquet or Arrow IPC files."""
+    if pa is None:
+        raise AnalyticsExportError("pyarrow is not installed; run `pip install pyarrow` to enable analytics exports")
+    if format not in EXPORT_FORMATS:
+        raise AnalyticsExportError(f"Unsupported format '{format}'. Use one of: {', '.join(EXPORT_FORMATS)}")
+    if not settings.ASYNC_DATABASE_URL:
+        raise AnalyticsExportError("Analytics exports require a Postgres database (ASYNC_DATABASE_URL)")
+
+    started = time.perf_counter()
+    schema = scores_schema()
+    writer = _PartitionWriter(Path(output_dir), format, schema)
+    params = {"project_id": project_id} if project_id else {}
+    query = text(SCORES_QUERY.format(where="WHERE t.project_id = :project_id" if project_id else ""))
+
+    # Exports run from the CLI or on a job-runner thread with its own event
+    # loop, so they use a dedicated unpooled engine rather than the app's pool.
+    engine = create_async_engine(settings.ASYNC_DATABASE_URL, poolclass=NullPool)
+    total_rows = 0
+    try:
+        async with engine.connect() as conn:
+            result = await conn.stream(query, params, execution_options={"yield_per": batch_size})
+            async for rows in result.partitions(batch_size):
+                for key, batch in _to_batches(rows, schema):
+                    writer.write(key, batch)
+                total_rows += len(rows)
+    finally:
+        writer.close()
+        await engine.dispose()
+
+    return {
+        "output_dir": str(output_dir),
+        "format": format,
+        "rows": total_rows,
+        "files": writer.files,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+__all__ = ["AnalyticsExportError", "EXPORT_FORMATS", "export_scores", "pyarrow_available", "scores_schema"]
@@ -0,0 +1,479 @@
+"""Deterministic synthetic datasets shaped like a course term.
+
+``SyntheticDataset`` generates rows for the eight tables of
+``docs/SETUP_DATABASE.sql`` with explicit ids. The layout (team sizes, rubric
+lengths, per-student ability and per-evaluator leniency) is drawn up front
+from the seed, so every table can be produced independently and in any
+order while staying consistent; the same spec and seed always produce the
+same rows.
+
+Shape of the data:
+
+* team sizes vary between ``team_size_min`` and ``team_size_max``;
+* rubrics have ``criteria_min``..``criteria_max`` criteria whose points add
+  up to the form's ``max_score``;
+* a score reflects the evaluatee's ability plus the evaluator's leniency and
+  some noise, so averages differ between students as they do in real terms;
+* submissions cluster in the hours before each form's deadline and a
+  ``late_fraction`` arrive after it.
+
+Every user's password is ``DEFAULT_PASSWORD``, stored as a bcrypt hash with
+``password_rounds`` and a salt derived from the seed.
+
+Each team member evaluates every other member on every form of the team's
+project (a full peer grid).
+
+Writers: ``write_csv`` (one file per table), ``write_sql`` (a psql script of
+``COPY ... FROM stdin`` blocks), ``write_json`` (a ``MEMORY_SEED_FILE`` for
+the memory backend) and ``copy_to_database`` (binary COPY through asyncpg).
+"""
+import csv
+import itertools
+import json
+import random
+import time
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import bcrypt
+
+from app.db.memory import SCHEMA
+
+TABLE_ORDER = (
+    "users",
+    "projects",
+    "teams",
+    "team_members",
+    "evaluation_forms",
+    "form_criteria",
+    "evaluations",
+    "evaluation_scores",
+)
+
+DEFAULT_PASSWORD = "password"
+TERM_START = datetime(2024, 1, 15, 9, 0, tzinfo=timezone.utc)
+TERM_WEEKS = 14
+_BCRYPT_ALPHABET = "./ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
+
+
+@dataclass
+class DatasetSpec:
+    projects: int = 50
+    teams_per_project: int = 40
+    team_size_min: int = 5
+    team_size_max: int = 5
+    instructors: int = 10
+    forms_per_project: int = 1
+    criteria_min: int = 5
+    criteria_max: int = 5
+    max_score: int = 100
+    late_fraction: float = 0.05
+
+    @property
+    def teams(self) -> int:
+        return self.projects * self.teams_per_project
+
+
+SCALES = {
+    "small": DatasetSpec(projects=3, teams_per_project=10, team_size_min=4, team_size_max=4, instructors=2),
+    "course": DatasetSpec(),
+    # ~1.2M evaluation scores: 5,000 teams of 4-6, two forms with 4-8 criteria
+    "term": DatasetSpec(projects=100, teams_per_project=50, team_size_min=4, team_size_max=6, instructors=25,
+                        forms_per_project=2, criteria_min=4, criteria_max=8),
+}
+
+
+def _clamp(value: float, low: float, high: float) -> float:
+    return low if value < low else high if value > high else value
+
+
+class SyntheticDataset:
+    """Row generators for one spec and seed (ids start at 1 in every table)."""
+
+    def __init__(self, spec: DatasetSpec, seed: int = 42, password_rounds: int = 12):
+        self.spec = spec
+        self.seed = seed
+        layout = self._rng("layout")
+
+        salt = self._rng("password")
+        self.password_hash = bcrypt.hashpw(DEFAULT_PASSWORD.encode(), (
+            f"$2b${password_rounds:02d}$"
+            + "".join(salt.choice(_BCRYPT_ALPHABET) for _ in range(21))
+            + salt.choice(".Oeu")  # the last salt character only carries 2 bits
+        ).encode("ascii")).decode("ascii")
+
+        self.team_sizes = [layout.randint(spec.team_size_min, spec.team_size_max) for _ in range(spec.teams)]
+        # First student id of each team; students are numbered after instructors.
+        self.team_offsets = list(itertools.accumulate([spec.instructors + 1] + self.team_sizes[:-1]))
+        self.students = sum(self.team_sizes)
+
+        forms = spec.projects * spec.forms_per_project
+        self.criteria_counts = [layout.randint(spec.criteria_min, spec.criteria_max) for _ in range(forms)]
+        self.criteria_offsets = list(itertools.accumulate([1] + self.criteria_counts[:-1]))
+
+        people = self._rng("people")
+        users = spec.instructors + self.students
+        self.ability = [_clamp(people.gauss(0.78, 0.1), 0.3, 1.0) for _ in range(users + 1)]
+        self.leniency = [people.gauss(0.0, 0.05) for _ in range(users + 1)]
+
+    def _rng(self, purpose: str) -> random.Random:
+        return random.Random(f"{self.seed}:{purpose}")
+
+    # Id layout -----------------------------------------------------------
+
+    def team_ids(self, project_id: int) -> range:
+        first = (project_id - 1) * self.spec.teams_per_project + 1
+        return range(first, first + self.spec.teams_per_project)
+
+    def form_ids(self, project_id: int) -> range:
+        first = (project_id - 1) * self.spec.forms_per_project + 1
+        return range(first, first + self.spec.forms_per_project)
+
+    def criterion_ids(self, form_id: int) -> range:
+        first = self.criteria_offsets[form_id - 1]
+        return range(first, first + self.criteria_counts[form_id - 1])
+
+    def members(self, team_id: int) -> List[int]:
+        first = self.team_offsets[team_id - 1]
+        return list(range(first, first + self.team_sizes[team_id - 1]))
+
+    def criterion_points(self, form_id: int) -> List[int]:
+        """Points per criterion, summing to the form's max_score."""
+        count = self.criteria_counts[form_id - 1]
+        base, extra = divmod(self.spec.max_score, count)
+        return [base + (1 if index < extra else 0) for index in range(count)]
+
+    def deadline(self, form_id: int) -> datetime:
+        number = (form_id - 1) % self.spec.forms_per_project + 1
+        week = TERM_WEEKS * number // (self.spec.forms_per_project + 1)
+        return TERM_START + timedelta(weeks=week, hours=14)
+
+    def summary(self) -> Dict[str, Any]:
+        evaluations = self.spec.forms_per_project * sum(size * (size - 1) for size in self.team_sizes)
+        scores = 0
+        for team_index, size in enumerate(self.team_sizes):
+            project_id = team_index // self.spec.teams_per_project + 1
+            criteria = sum(self.criteria_counts[form_id - 1] for form_id in self.form_ids(project_id))
+            scores += size * (size - 1) * criteria
+        return {
+            **asdict(self.spec),
+            "seed": self.seed,
+            "users": self.spec.instructors + self.students,
+            "teams": self.spec.teams,
+            "evaluations": evaluations,
+            "evaluation_scores": scores,
+        }
+
+    # Tables --------------------------------------------------------------
+
+    def users(self) -> Iterator[Dict[str, Any]]:
+        for user_id in range(1, self.spec.instructors + self.students + 1):
+            instructor = user_id <= self.spec.instructors
+            yield {
+                "id": user_id,
+                "email": f"{'instructor' if instructor else 'student'}{user_id}@example.edu",
+                "password_hash": self.password_hash,
+                "name": f"{'Instructor' if instructor else 'Student'} {user_id}",
+                "role": "instructor" if instructor else "student",
+                "created_at": TERM_START.isoformat(),
+                "updated_at": TERM_START.isoformat(),
+            }
+
+    def projects(self) -> Iterator[Dict[str, Any]]:
+        for project_id in range(1, self.spec.projects + 1):
+            yield {
+                "id": project_id,
+                "title": f"Project {project_id}",
+                "description": "Synthetic project",
+                "instructor_id": (project_id - 1) % self.spec.instructors + 1,
+                "start_date": TERM_START.date().isoformat(),
+                "end_date": (TERM_START + timedelta(weeks=TERM_WEEKS)).date().isoformat(),
+                "status": "active",
+                "created_at": TERM_START.isoformat(),
+                "updated_at": TERM_START.isoformat(),
+            }
+
+    def teams(self) -> Iterator[Dict[str, Any]]:
+        for project_id in range(1, self.spec.projects + 1):
+            for team_id in self.team_ids(project_id):
+                yield {
+                    "id": team_id,
+                    "project_id": project_id,
+                    "name": f"Team {team_id}",
+                    "created_at": TERM_START.isoformat(),
+                    "updated_at": TERM_START.isoformat(),
+                }
+
+    def team_members(self) -> Iterator[Dict[str, Any]]:
+        member_id = 0
+        for team_id in range(1, self.spec.teams + 1):
+            for user_id in self.members(team_id):
+                member_id += 1
+                yield {"id": member_id, "team_id": team_id, "user_id": user_id, "joined_at": TERM_START.isoformat()}
+
+    def evaluation_forms(self) -> Iterator[Dict[str, Any]]:
+        for project_id in range(1, self.spec.projects + 1):
+            for number, form_id in enumerate(self.form_ids(project_id), start=1):
+                yield {
+                    "id": form_id,
+                    "project_id": project_id,
+                    "title": f"Peer review {number}",
+                    "description": f"Due {self.deadline(form_id).date().isoformat()}",
+                    "max_score": self.spec.max_score,
+                    "created_at": TERM_START.isoformat(),
+                    "updated_at": TERM_START.isoformat(),
+                }
+
+    def form_criteria(self) -> Iterator[Dict[str, Any]]:
+        for form_id in range(1, len(self.criteria_counts) + 1):
+            points = self.criterion_points(form_id)
+            for order_index, criterion_id in enumerate(self.criterion_ids(form_id)):
+                yield {
+                    "id": criterion_id,
+                    "form_id": form_id,
+                    "text": f"Criterion {order_index + 1}",
+                    "max_points": points[order_index],
+                    "order_index": order_index,
+                    "created_at": TERM_START.isoformat(),
+                }
+
+    def _submitted_at(self, rng: random.Random, deadline: datetime) -> datetime:
+        """Skewed towards the deadline; ``late_fraction`` arrive after it."""
+        if rng.random() < self.spec.late_fraction:
+            return deadline + timedelta(hours=rng.expovariate(1 / 6))
+        return deadline - timedelta(hours=min(rng.expovariate(1 / 18), 24 * 7))
+
+    def _peer_grid(self) -> Iterator[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        """Evaluations with their scores, in id order."""
+        rng = self._rng("evaluations")
+        ability, leniency = self.ability, self.leniency
+        evaluation_id = score_id = 0
+        for project_id in range(1, self.spec.projects + 1):
+            for form_id in self.form_ids(project_id):
+                criteria = list(zip(self.criterion_ids(form_id), self.criterion_points(form_id)))
+                deadline = self.deadline(form_id)
+                for team_id in self.team_ids(project_id):
+                    members = self.members(team_id)
+                    for evaluator_id in members:
+                        for evaluatee_id in members:
+                            if evaluator_id == evaluatee_id:
+                                continue
+                            evaluation_id += 1
+                            submitted_at = self._submitted_at(rng, deadline).isoformat()
+                            quality = ability[evaluatee_id] + leniency[evaluator_id]
+                            scores = []
+                            for criterion_id, max_points in criteria:
+                                score_id += 1
+                                score = round(max_points * _clamp(rng.gauss(quality, 0.08), 0.0, 1.0))
+                                scores.append({
+                                    "id": score_id,
+                                    "evaluation_id": evaluation_id,
+                                    "criterion_id": criterion_id,
+                                    "score": score,
+                                    "created_at": submitted_at,
+                                })
+                            yield {
+                                "id": evaluation_id,
+                                "form_id": form_id,
+                                "evaluator_id": evaluator_id,
+                                "evaluatee_id": evaluatee_id,
+                                "team_id": team_id,
+                                "total_score": sum(s["score"] for s in scores),
+                                "comments": None,
+                                "submitted_at": submitted_at,
+                            }, scores
+
+    def evaluations(self) -> Iterator[Dict[str, Any]]:
+        for evaluation, _ in self._peer_grid():
+            yield evaluation
+
+    def evaluation_scores(self) -> Iterator[Dict[str, Any]]:
+        for _, scores in self._peer_grid():
+            yield from scores
+
+    def rows(self, table: str) -> Iterator[Dict[str, Any]]:
+        return getattr(self, table)()
+
+    def tables(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Every table materialized, parents first (for the memory backend)."""
+        return {table: list(self.rows(table)) for table in TABLE_ORDER}
+
+
+# Writers -------------------------------------------------------------------
+
+def columns(table: str) -> List[str]:
+    return list(SCHEMA[table].columns)
+
+
+def _timed(write: Callable[[str], int], progress: Optional[Callable[[str, int, float], None]]) -> Dict[str, int]:
+    counts = {}
+    for table in TABLE_ORDER:
+        started = time.perf_counter()
+        counts[table] = write(table)
+        if progress:
+            progress(table, counts[table], time.perf_counter() - started)
+    return counts
+
+
+def write_csv(dataset: SyntheticDataset, output_dir: str, progress=None) -> Dict[str, int]:
+    """One ``{table}.csv`` per table with a header row (empty field = NULL)."""
+    directory = Path(output_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    def write(table: str) -> int:
+        cols = columns(table)
+        count = 0
+        with open(directory / f"{table}.csv", "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(cols)
+            for row in dataset.rows(table):
+                writer.writerow([row[c] for c in cols])
+                count += 1
+        return count
+
+    return _timed(write, progress)
+
+
+def _copy_text(value: Any) -> str:
+    if value is None:
+        return "\\N"
+    text = str(value)
+    if "\\" in text or "\t" in text or "\n" in text or "\r" in text:
+        text = text.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+    return text
+
+
+def write_sql(dataset: SyntheticDataset, path: str, truncate: bool = False, progress=None) -> Dict[str, int]:
+    """A psql script loading every table with ``COPY ... FROM stdin``.
+
+    Run with ``psql "$DATABASE_URL" -f dataset.sql``; sequences are advanced
+    past the generated ids at the end.
+    """
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with open(target, "w") as f:
+        f.write("BEGIN;\n")
+        if truncate:
+            f.write(f"TRUNCATE {', '.join(TABLE_ORDER)} RESTART IDENTITY CASCADE;\n")
+
+        def write(table: str) -> int:
+            cols = columns(table)
+            f.write(f"COPY {table} ({', '.join(cols)}) FROM stdin;\n")
+            count = 0
+            for row in dataset.rows(table):
+                f.write("\t".join(_copy_text(row[c]) for c in cols) + "\n")
+                count += 1
+            f.write("\\.\n")
+            return count
+
+        counts = _timed(write, progress)
+        for table in TABLE_ORDER:
+            f.write(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 1)) FROM {table};\n")
+        f.write("COMMIT;\n")
+    return counts
+
+
+def write_json(dataset: SyntheticDataset, path: str, progress=None) -> Dict[str, int]:
+    """``{table: [rows]}`` as loaded by ``MEMORY_SEED_FILE``, streamed row by row."""
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with open(target, "w") as f:
+        f.write("{")
+
+        def write(table: str) -> int:
+            f.write(("" if table == TABLE_ORDER[0] else ",") + f"\n{json.dumps(table)}: [")
+            count = 0
+            for row in dataset.rows(table):
+                f.write(("," if count else "") + "\n  " + json.dumps(row, separators=(",", ":")))
+                count += 1
+            f.write("\n]")
+            return count
+
+        counts = _timed(write, progress)
+        f.write("\n}\n")
+    return counts
+
+
+def _to_record(table: str) -> Callable[[Dict[str, Any]], Tuple[Any, ...]]:
+    """Row dict -> tuple with Python types for asyncpg's binary COPY."""
+    converters = []
+    for column, kind in SCHEMA[table].columns.items():
+        if kind == "timestamp":
+            converters.append((column, datetime.fromisoformat))
+        elif kind == "date":
+            converters.append((column, date.fromisoformat))
+        else:
+            converters.append((column, None))
+
+    def convert(row: Dict[str, Any]) -> Tuple[Any, ...]:
+        return tuple(
+            row[column] if fn is None or row[column] is None else fn(row[column])
+            for column, fn in converters
+        )
+
+    return convert
+
+
+def _batches(rows: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(rows)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+async def copy_to_database(
+    dataset: SyntheticDataset,
+    dsn: str,
+    truncate: bool = False,
+    batch_size: int = 50_000,
+    progress=None,
+) -> Dict[str, int]:
+    """Load the dataset into Postgres with binary COPY, in one transaction."""
+    import asyncpg
+
+    conn = await asyncpg.connect(dsn.replace("postgresql+asyncpg://", "postgresql://"))
+    try:
+        async with conn.transaction():
+            if truncate:
+                await conn.execute(f"TRUNCATE {', '.join(TABLE_ORDER)} RESTART IDENTITY CASCADE")
+            counts = {}
+            for table in TABLE_ORDER:
+                started = time.perf_counter()
+                convert = _to_record(table)
+                count = 0
+                for batch in _batches(map(convert, dataset.rows(table)), batch_size):
+                    await conn.copy_records_to_table(table, records=batch, columns=columns(table))
+                    count += len(batch)
+                counts[table] = count
+                await conn.execute(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 1)) FROM {table}"
+                )
+                if progress:
+                    progress(table, count, time.perf_counter() - started)
+    finally:
+        await conn.close()
+    return counts
+
+
+def load_memory(dataset: SyntheticDataset, db: Any) -> None:
+    """Replace the contents of a ``MemoryDatabase`` with the dataset."""
+    db.reset()
+    db.load(dataset.tables())
+
+
+__all__ = [
+    "DEFAULT_PASSWORD",
+    "DatasetSpec",
+    "SCALES",
+    "SyntheticDataset",
+    "TABLE_ORDER",
+    "copy_to_database",
+    "load_memory",
+    "write_csv",
+    "write_json",
+    "write_sql",
+]
@@ -0,0 +1,358 @@
+"""Write-behind buffer for evaluation draft autosave.
+
+Autosaves arrive every few seconds while a student fills in a rubric. Each
+save is a partial change (some criterion scores, maybe the comments) for one
+(form, evaluator, evaluatee) draft. ``DraftBuffer`` coalesces the changes in
+memory and a background thread writes them to ``evaluation_drafts`` in one
+batch every ``DRAFT_FLUSH_INTERVAL_SECONDS``, or sooner once
+``DRAFT_MAX_PENDING`` drafts are waiting. The batch is merged into the stored
+drafts by the ``merge_evaluation_drafts`` function (docs/SETUP_DATABASE.sql)
+in a single ``INSERT ... ON CONFLICT DO UPDATE``, score by score, so saves
+for the same draft handled by different workers do not overwrite each other.
+
+Durability: every change is appended to this process's journal in
+``DRAFT_JOURNAL_DIR`` before the request returns (``DRAFT_JOURNAL_FSYNC``
+also fsyncs it). After each successful flush the journal is compacted to
+what is still pending. Journals are named after the process's boot id (see
+app/core/boot.py), never its PID, so a restarted container cannot reuse a
+dead worker's journal. On start, journals whose owner no longer holds its
+lock are claimed, replayed and flushed, so a worker restart loses nothing;
+without a journal at most one flush interval of autosaves is at risk.
+
+Submitting the evaluation discards its draft (buffered changes included).
+A discard never waits for a flush: if the draft is in the batch being
+written, it leaves a tombstone and the flusher deletes the draft again once
+the batch has landed. Drafts buffered elsewhere for an evaluation that has
+been submitted are dropped by the merge.
+"""
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core import boot
+from app.core.config import settings
+from app.core.supabase import supabase
+
+logger = logging.getLogger("app.drafts")
+
+DraftKey = Tuple[int, int, int]  # (form_id, evaluator_id, evaluatee_id)
+KEY_FIELDS = ("form_id", "evaluator_id", "evaluatee_id")
+# Rows the database rejects outright (missing parent, NULL, bad type) are dropped, not retried.
+PERMANENT_ERRORS = {"23502", "23503", "22P02"}
+
+
+def _key(change: Dict[str, Any]) -> DraftKey:
+    return tuple(int(change[field]) for field in KEY_FIELDS)
+
+
+def _merge(base: Optional[Dict[str, Any]], change: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply ``change`` on top of ``base``; a ``None`` score clears that criterion."""
+    merged = dict(base) if base else {field: change[field] for field in KEY_FIELDS}
+    merged["scores"] = {**(base or {}).get("scores", {}), **change.get("scores", {})}
+    if change.get("team_id") is not None:
+        merged["team_id"] = change["team_id"]
+    if "comments" in change:
+        merged["comments"] = change["comments"]
+    merged["updated_at"] = change["updated_at"]
+    return merged
+
+
+def _payload(draft: Dict[str, Any]) -> Dict[str, Any]:
+    """Argument row for ``merge_evaluation_drafts``: set and cleared scores apart."""
+    row = {field: draft[field] for field in KEY_FIELDS}
+    row["scores"] = {cid: score for cid, score in draft["scores"].items() if score is not None}
+    row["cleared"] = [cid for cid, score in draft["scores"].items() if score is None]
+    for field in ("team_id", "comments", "updated_at"):
+        row[field] = draft.get(field)
+    return row
+
+
+def _stored(draft: Dict[str, Any]) -> Dict[str, Any]:
+    """Row for ``evaluation_drafts``: cleared scores removed."""
+    row = {field: draft[field] for field in KEY_FIELDS}
+    row["scores"] = {cid: score for cid, score in draft["scores"].items() if score is not None}
+    for field in ("team_id", "comments", "updated_at"):
+        if field in draft:
+            row[field] = draft[field]
+    return row
+
+
+class DraftBuffer:
+    """Coalesces draft changes in memory and flushes them in batches."""
+
+    def __init__(
+        self,
+        flush_interval: float = 5.0,
+        max_pending: int = 500,
+        journal_dir: Optional[str] = None,
+        fsync: bool = False,
+    ):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.journal_dir = Path(journal_dir) if journal_dir else None
+        self.fsync = fsync
+        self._pending: Dict[DraftKey, Dict[str, Any]] = {}
+        self._in_flight: Set[DraftKey] = set()  # keys of the batch being written
+        self._tombstones: Set[DraftKey] = set()  # of those, discarded meanwhile
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._journal = None
+
+    # Lifecycle -----------------------------------------------------------
+
+    def start(self) -> None:
+        """Open the journal, recover orphaned journals and start the flusher."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="draft-flush", daemon=True)
+            if self.journal_dir:
+                self.journal_dir.mkdir(parents=True, exist_ok=True)
+                boot.hold(self.journal_dir)
+                claimed = self._recover()
+                self._compact()
+                # Only now are the recovered changes in our own journal.
+                for path in claimed:
+                    path.unlink(missing_ok=True)
+        self._thread.start()
+
+    def shutdown(self) -> None:
+        """Stop the flusher and write whatever is still buffered."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        thread.join()
+        self._thread = None
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error("Draft flush at shutdown failed, %d drafts stay in the journal: %s", len(self._pending), e)
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+    # Public API ----------------------------------------------------------
+
+    def save(
+        self,
+        form_id: int,
+        evaluator_id: int,
+        evaluatee_id: int,
+        scores: Dict[int, Optional[int]],
+        comments: Optional[str] = None,
+        team_id: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Buffer a partial change; returns the buffered (not yet flushed) draft."""
+        self.start()
+        change: Dict[str, Any] = {
+            "form_id": form_id,
+            "evaluator_id": evaluator_id,
+            "evaluatee_id": evaluatee_id,
+            "team_id": team_id,
+            "scores": {str(criterion_id): score for criterion_id, score in scores.items()},
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }
+        if comments is not None:
+            change["comments"] = comments
+        key = _key(change)
+        with self._lock:
+            self._append(change)
+            draft = self._pending[key] = _merge(self._pending.get(key), change)
+            pending = len(self._pending)
+        if pending >= self.max_pending:
+            self._wake.set()
+        return dict(draft)
+
+    def get(self, form_id: int, evaluator_id: int, evaluatee_id: int) -> Optional[Dict[str, Any]]:
+        """The stored draft with buffered changes applied, or ``None``."""
+        result = (
+            supabase.table("evaluation_drafts").select("*")
+            .eq("form_id", form_id).eq("evaluator_id", evaluator_id).eq("evaluatee_id", evaluatee_id)
+            .execute()
+        )
+        stored = result.data[0] if result.data else None
+        with self._lock:
+            pending = self._pending.get((form_id, evaluator_id, evaluatee_id))
+        if pending is None:
+            return stored
+        draft = _stored(_merge(stored, pending))
+        if stored:
+            draft["id"] = stored["id"]
+        return draft
+
+    def discard(self, form_id: int, evaluator_id: int, evaluatee_id: int) -> None:
+        """Drop buffered changes and the stored draft (after submit, or on request)."""
+        key = (form_id, evaluator_id, evaluatee_id)
+        with self._lock:
+            self._pending.pop(key, None)
+            if key in self._in_flight:
+                self._tombstones.add(key)  # the flusher deletes it again after writing
+            self._append({**dict(zip(KEY_FIELDS, key)), "discard": True})
+        self._delete(key)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def flush(self) -> int:
+        """Write all buffered drafts now; returns how many were written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._in_flight = set(batch)
+            if not batch:
+                return 0
+            try:
+                written = self._write(batch)
+            except Exception:
+                with self._lock:
+                    discarded, self._tombstones, self._in_flight = self._tombstones, set(), set()
+                    # Keep newer changes that arrived during the failed flush on top.
+                    for key, draft in batch.items():
+                        if key in discarded:
+                            continue
+                        newer = self._pending.get(key)
+                        self._pending[key] = _merge(draft, newer) if newer else draft
+                raise
+            with self._lock:
+                discarded, self._tombstones, self._in_flight = self._tombstones, set(), set()
+            for key in discarded:
+                try:
+                    self._delete(key)
+                except Exception as e:
+                    logger.error("Discarded draft %s was written back and could not be deleted: %s", key, e)
+            with self._lock:
+                self._compact()
+            return written
+
+    # Internals -----------------------------------------------------------
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning("Draft flush failed, retrying in %.0f s: %s", self.flush_interval, e)
+
+    def _write(self, batch: Dict[DraftKey, Dict[str, Any]]) -> int:
+        rows = [_payload(draft) for draft in batch.values()]
+        try:
+            return supabase.rpc("merge_evaluation_drafts", {"p_drafts": rows}).execute().data or 0
+        except Exception as e:
+            if getattr(e, "code", None) not in PERMANENT_ERRORS:
+                raise
+        # One bad row (e.g. a draft for a deleted form) must not block the rest.
+        written = 0
+        for row in rows:
+            try:
+                written += supabase.rpc("merge_evaluation_drafts", {"p_drafts": [row]}).execute().data or 0
+            except Exception as e:
+                if getattr(e, "code", None) not in PERMANENT_ERRORS:
+                    raise
+                logger.warning("Dropping draft %s: %s", _key(row), getattr(e, "message", e))
+        return written
+
+    def _delete(self, key: DraftKey) -> None:
+        form_id, evaluator_id, evaluatee_id = key
+        (
+            supabase.table("evaluation_drafts").delete()
+            .eq("form_id", form_id).eq("evaluator_id", evaluator_id).eq("evaluatee_id", evaluatee_id)
+            .execute()
+        )
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        """Journal one change (caller holds ``_lock``)."""
+        if self._journal is None:
+            return
+        self._journal.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+
+    def _journal_path(self) -> Path:
+        return self.journal_dir / f"drafts-{boot.BOOT_ID}.jsonl"
+
+    def _compact(self) -> None:
+        """Rewrite this process's journal to the pending drafts (caller holds ``_lock``)."""
+        if not self.journal_dir:
+            return
+        path = self._journal_path()
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            for draft in self._pending.values():
+                f.write(json.dumps(draft, separators=(",", ":")) + "\n")
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        if self._journal is not None:
+            self._journal.close()
+        os.replace(tmp, path)
+        self._journal = open(path, "a")
+
+    def _recover(self) -> List[Path]:
+        """Replay journals left by processes that are no longer running; returns the claimed files."""
+        recovered, claimed_paths = 0, []
+        # Journals, and journals claimed by a worker that died while recovering them
+        for path in sorted(self.journal_dir.glob("drafts-*.jsonl*")):
+            name, _, claimer = path.name.partition(".claimed-")
+            if not name.endswith(".jsonl"):
+                continue
+            owner = claimer or name[len("drafts-"):-len(".jsonl")]
+            if boot.running(self.journal_dir, owner):
+                continue
+            claimed = path.with_name(f"{name}.claimed-{boot.BOOT_ID}")
+            try:
+                os.rename(path, claimed)  # another worker may be recovering the same file
+            except OSError:
+                continue
+            recovered += self._replay(self._read(claimed))
+            claimed_paths.append(claimed)
+        if recovered:
+            logger.info("Recovered %d draft changes from journals of stopped workers", recovered)
+            self._wake.set()
+        return claimed_paths
+
+    def _read(self, path: Path) -> Iterable[Dict[str, Any]]:
+        with open(path) as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-write.
+                    logger.warning("Skipping unreadable line in %s", path)
+
+    def _replay(self, records: Iterable[Dict[str, Any]]) -> int:
+        count = 0
+        for record in records:
+            key = _key(record)
+            if record.get("discard"):
+                self._pending.pop(key, None)
+            else:
+                self._pending[key] = _merge(self._pending.get(key), record)
+            count += 1
+        return count
+
+
+draft_buffer = DraftBuffer(
+    flush_interval=settings.DRAFT_FLUSH_INTERVAL_SECONDS,
+    max_pending=settings.DRAFT_MAX_PENDING,
+    journal_dir=settings.DRAFT_JOURNAL_DIR,
+    fsync=settings.DRAFT_JOURNAL_FSYNC,
+)
+
+__all__ = ["DraftBuffer", "draft_buffer"]
@@ -0,0 +1,133 @@
+"""In-process broadcast hub for live submission progress (Server-Sent Events).
+
+One hub exists per worker process. Subscribers are plain ``asyncio.Queue``
+objects grouped by project, so an idle subscriber costs one queue and one
+suspended coroutine - nothing polls the database. Evaluation endpoints call
+``publish`` after their writes succeed and every subscriber of the project
+receives the event.
+"""
+import asyncio
+import json
+from collections import defaultdict
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+from app.core.config import settings
+from app.core.supabase import supabase
+
+
+class ProjectEventHub:
+    """Fan-out of evaluation events to SSE subscribers, keyed by project."""
+
+    def __init__(self, queue_size: int = 100, keepalive_seconds: float = 15.0):
+        self.queue_size = queue_size
+        self.keepalive_seconds = keepalive_seconds
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = defaultdict(set)
+        # Per-project count of submitted evaluations, seeded once per project
+        # on first subscription and then maintained from published events.
+        self._counts: Dict[int, int] = {}
+        # team_id -> project_id; teams never move between projects.
+        self._team_projects: Dict[int, int] = {}
+
+    def has_subscribers(self, project_id: Optional[int] = None) -> bool:
+        """Whether anyone is listening (to a given project, or at all)."""
+        if project_id is None:
+            return any(self._subscribers.values())
+        return bool(self._subscribers.get(project_id))
+
+    def subscriber_count(self, project_id: int) -> int:
+        return len(self._subscribers.get(project_id, ()))
+
+    def remember_team(self, team_id: int, project_id: int) -> None:
+        """Record a team's project so later events need no lookup."""
+        self._team_projects[team_id] = project_id
+
+    def project_for_team(self, team_id: int) -> Optional[int]:
+        """Resolve a team's project, querying only when someone is subscribed."""
+        if team_id in self._team_projects:
+            return self._team_projects[team_id]
+        if not self.has_subscribers():
+            return None
+        team = supabase.table("teams").select("project_id").eq("id", team_id).execute()
+        if not team.data:
+            return None
+        project_id = team.data[0]["project_id"]
+        self._team_projects[team_id] = project_id
+        return project_id
+
+    def _seed_count(self, project_id: int) -> int:
+        """Count the project's evaluations once, when the first client subscribes."""
+        if project_id in self._counts:
+            return self._counts[project_id]
+        teams = supabase.table("teams").select("id").eq("project_id", project_id).execute()
+        team_ids = [t["id"] for t in teams.data] if teams.data else []
+        for team_id in team_ids:
+            self._team_projects[team_id] = project_id
+        count = 0
+        if team_ids:
+            evaluations = supabase.table("evaluations").select("id", count="exact").in_("team_id", team_ids).execute()
+            count = evaluations.count if evaluations.count is not None else len(evaluations.data)
+        self._counts[project_id] = count
+        return count
+
+    def publish(self, project_id: Optional[int], event: str, data: Dict[str, Any], delta: int = 0) -> None:
+        """Broadcast an event to every subscriber of ``project_id``.
+
+        ``delta`` adjusts the project's submitted-evaluation count (+1 on
+        submit, -1 on delete). Without subscribers this is a no-op.
+        """
+        if project_id is None or not self._subscribers.get(project_id):
+            # Nobody is listening; drop the count so it is re-seeded fresh
+            # by the next subscriber instead of drifting.
+            if project_id is not None:
+                self._counts.pop(project_id, None)
+            return
+
+        if project_id in self._counts:
+            self._counts[project_id] += delta
+        payload = dict(data)
+        payload["project_id"] = project_id
+        payload["submitted_count"] = self._counts.get(project_id)
+        message = _format_sse(event, payload)
+
+        for queue in list(self._subscribers[project_id]):
+            if queue.full():
+                # Slow consumer: drop its oldest event rather than block writers.
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+            queue.put_nowait(message)
+
+    async def subscribe(self, project_id: int) -> AsyncIterator[str]:
+        """Yield SSE-formatted messages for a project until the client leaves."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[project_id].add(queue)
+        try:
+            count = self._seed_count(project_id)
+            yield _format_sse("progress", {"project_id": project_id, "submitted_count": count})
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=self.keepalive_seconds)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing the idle connection.
+                    yield ": keepalive\n\n"
+                    continue
+                yield message
+        finally:
+            self._subscribers[project_id].discard(queue)
+            if not self._subscribers[project_id]:
+                del self._subscribers[project_id]
+                self._counts.pop(project_id, None)
+
+
+def _format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Encode one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+event_hub = ProjectEventHub(
+    queue_size=settings.EVENT_STREAM_QUEUE_SIZE,
+    keepalive_seconds=settings.EVENT_STREAM_KEEPALIVE_SECONDS,
+)
+
+__all__ = ["ProjectEventHub", "event_hub"]
@@ -0,0 +1,225 @@
+"""In-process background job runner for expensive reports.
+
+Jobs run on a bounded thread pool so report generation (which issues
+blocking Supabase calls) stays off the request path. Finished results are
+kept for a TTL; when ``persist_dir`` is set each job is also written to a
+JSON file so its status survives a restart and is visible to every worker
+on the same host. No external broker is involved.
+
+Each job records the ``BOOT_ID`` of the process running it. On start, jobs
+still queued or running under a process that is gone (see ``app.core.boot``)
+are marked failed, so a restart never leaves them pending forever.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import HTTPException
+
+from app.core import boot
+from app.core.config import settings
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+UNFINISHED = (QUEUED, RUNNING)
+
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are already queued or running."""
+
+
+class JobRunner:
+    """Bounded worker pool with result retention and optional local persistence."""
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        max_pending: int = 50,
+        result_ttl_seconds: float = 3600,
+        persist_dir: Optional[str] = None,
+    ):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.result_ttl_seconds = result_ttl_seconds
+        self.persist_dir = Path(persist_dir) if persist_dir else None
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    # Lifecycle -----------------------------------------------------------
+
+    def start(self) -> None:
+        """Create the worker pool and clean up jobs left by earlier processes."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="report-job")
+        if self.persist_dir:
+            self.persist_dir.mkdir(parents=True, exist_ok=True)
+            boot.hold(self.persist_dir)
+            self._recover()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    # Public API ----------------------------------------------------------
+
+    def submit(self, kind: str, params: Dict[str, Any], fn: Callable[..., Awaitable[Any]], *args: Any) -> Dict[str, Any]:
+        """Queue ``fn(*args)`` (a coroutine function) and return the job record."""
+        self.start()
+        self._prune()
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if job["status"] in UNFINISHED)
+            if pending >= self.max_pending:
+                raise JobQueueFull(f"{pending} report jobs already pending")
+            job = {
+                "id": uuid.uuid4().hex,
+                "kind": kind,
+                "params": params,
+                "status": QUEUED,
+                "result": None,
+                "error": None,
+                "created_at": _now(),
+                "started_at": None,
+                "finished_at": None,
+                "expires_at": None,
+                "boot": boot.BOOT_ID,
+            }
+            self._jobs[job["id"]] = job
+        self._persist(job)
+        self._executor.submit(self._run, job["id"], fn, args)
+        return _public(job)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a job record, falling back to the persisted copy."""
+        self._prune()
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            job = self._load(job_id)
+        return _public(job) if job else None
+
+    # Internals -----------------------------------------------------------
+
+    def _run(self, job_id: str, fn: Callable[..., Awaitable[Any]], args: tuple) -> None:
+        self._update(job_id, status=RUNNING, started_at=_now())
+        try:
+            # Report handlers are coroutines; each worker thread runs its own loop.
+            result = asyncio.run(fn(*args))
+        except HTTPException as e:
+            self._finish(job_id, FAILED, error=str(e.detail))
+        except Exception as e:
+            self._finish(job_id, FAILED, error=str(e))
+        else:
+            self._finish(job_id, SUCCEEDED, result=result)
+
+    def _finish(self, job_id: str, status: str, result: Any = None, error: Optional[str] = None) -> None:
+        self._update(
+            job_id,
+            status=status,
+            result=result,
+            error=error,
+            finished_at=_now(),
+            expires_at=time.time() + self.result_ttl_seconds,
+        )
+
+    def _update(self, job_id: str, **fields: Any) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.update(fields)
+        self._persist(job)
+
+    def _prune(self) -> None:
+        """Drop finished jobs whose retention period has passed."""
+        now = time.time()
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job["expires_at"] is not None and job["expires_at"] <= now
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+        for job_id in expired:
+            self._remove(job_id)
+
+    def _recover(self) -> None:
+        """Expire old job files and fail jobs orphaned by a stopped process."""
+        now = time.time()
+        for path in self.persist_dir.glob("*.json"):
+            try:
+                job = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            if job.get("expires_at") is not None and job["expires_at"] <= now:
+                path.unlink(missing_ok=True)
+            elif job.get("status") in UNFINISHED and not boot.running(self.persist_dir, job.get("boot")):
+                job.update(
+                    status=FAILED,
+                    error="Interrupted by worker restart",
+                    finished_at=_now(),
+                    expires_at=now + self.result_ttl_seconds,
+                )
+                self._write(path, job)
+
+    def _path(self, job_id: str) -> Optional[Path]:
+        if not self.persist_dir or not job_id.isalnum():
+            return None
+        return self.persist_dir / f"{job_id}.json"
+
+    def _persist(self, job: Dict[str, Any]) -> None:
+        path = self._path(job["id"])
+        if path is not None:
+            self._write(path, job)
+
+    def _write(self, path: Path, job: Dict[str, Any]) -> None:
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(job, default=str))
+        os.replace(tmp, path)
+
+    def _load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        path = self._path(job_id)
+        if path is None or not path.exists():
+            return None
+        try:
+            job = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+        if job.get("expires_at") is not None and job["expires_at"] <= time.time():
+            path.unlink(missing_ok=True)
+            return None
+        return job
+
+    def _remove(self, job_id: str) -> None:
+        path = self._path(job_id)
+        if path is not None:
+            path.unlink(missing_ok=True)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _public(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Strip internal bookkeeping from a job record."""
+    return {key: value for key, value in job.items() if key not in ("boot", "pid")}
+
+
+report_jobs = JobRunner(
+    max_workers=settings.REPORT_JOB_WORKERS,
+    max_pending=settings.REPORT_JOB_MAX_PENDING,
+    result_ttl_seconds=settings.REPORT_JOB_RESULT_TTL_SECONDS,
+    persist_dir=settings.REPORT_JOBS_DIR,
+)
+
+__all__ = ["JobRunner", "JobQueueFull", "report_jobs"]
@@ -0,0 +1,251 @@
+"""In-process index of team membership.
+
+Membership checks (is this user on this team?) are the most frequent query
+in the system. ``MembershipIndex`` keeps a team -> members map per worker,
+so a check is a set lookup. A project's teams and members
+are loaded together (two queries) the first time one of its teams is
+needed, and reloaded after ``MEMBERSHIP_INDEX_TTL_SECONDS``.
+
+A set is trusted when it lets a request through; before refusing one
+(not a member, already a member) callers ``recheck`` the database.
+
+The team endpoints update the index after their writes succeed. Writes
+made by other workers (or anything else touching the tables) reach it
+through Postgres: triggers on ``teams`` and ``team_members`` (see
+docs/SETUP_DATABASE.sql) ``pg_notify`` the ``membership_changed`` channel
+after commit, and ``MembershipListener`` drops the affected project so it
+is reloaded on next use. The same channel carries ``form:<id>`` for edits
+of evaluation forms and their criteria, which drop the form's compiled
+validator (app/services/validators.py). LISTEN needs a session connection, so
+``ASYNC_DATABASE_URL`` must not point at a transaction-mode pooler. While
+the listener is disconnected the whole index (and every validator) is
+dropped and the TTLs bound how stale they can get. The memory backend is single-process and needs no
+listener.
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, FrozenSet, Iterable, Optional, Set
+
+from app.core.config import settings
+from app.core.metrics import record_cache
+from app.core.supabase import supabase
+from app.services.validators import FormValidatorCache, form_validators
+
+logger = logging.getLogger("app.membership")
+
+CHANNEL = "membership_changed"
+
+
+class MembershipIndex:
+    """team -> member ids, loaded lazily per project."""
+
+    def __init__(self, ttl: float = 300.0):
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._loaded: Dict[int, float] = {}  # project_id -> expires at
+        self._project_teams: Dict[int, Set[int]] = {}
+        self._team_project: Dict[int, int] = {}
+        self._members: Dict[int, Set[int]] = {}
+
+    # Lookups -------------------------------------------------------------
+
+    def project_of(self, team_id: int) -> Optional[int]:
+        """The team's project, or ``None`` if the team does not exist."""
+        with self._lock:
+            project_id = self._team_project.get(team_id)
+            if project_id is not None and self._fresh(project_id):
+                return project_id
+        team = supabase.table("teams").select("project_id").eq("id", team_id).execute()
+        if not team.data:
+            return None
+        project_id = team.data[0]["project_id"]
+        # A team this worker does not know yet means its project view is behind
+        self._ensure(project_id, reload=True)
+        return project_id
+
+    def members(self, team_id: int) -> Optional[FrozenSet[int]]:
+        """Member user ids of the team, or ``None`` if the team does not exist."""
+        if self.project_of(team_id) is None:
+            return None
+        with self._lock:
+            return frozenset(self._members.get(team_id, ()))
+
+    def recheck(self, team_id: int, user_id: int) -> bool:
+        """Whether the user is on the team, read from the database; corrects the index.
+
+        For answers that refuse a request: without the listener a set can be
+        behind writes made through other workers until the TTL expires.
+        """
+        rows = supabase.table("team_members").select("id").eq("team_id", team_id).eq("user_id", user_id).execute()
+        member = bool(rows.data)
+        if member:
+            self.add(team_id, [user_id])
+        else:
+            self.remove(team_id, user_id)
+        return member
+
+    # Updates from the team endpoints --------------------------------------
+
+    def add(self, team_id: int, user_ids: Iterable[int]) -> None:
+        with self._lock:
+            if team_id not in self._members:
+                return  # project not loaded here; it will be read fresh
+            self._members[team_id].update(user_ids)
+
+    def remove(self, team_id: int, user_id: int) -> None:
+        with self._lock:
+            self._members.get(team_id, set()).discard(user_id)
+
+    def replace(self, team_id: int, user_ids: Iterable[int]) -> None:
+        with self._lock:
+            if team_id in self._members:
+                self._members[team_id] = set(user_ids)
+
+    def team_created(self, team_id: int, project_id: int, user_ids: Iterable[int]) -> None:
+        with self._lock:
+            if project_id not in self._loaded:
+                return
+            self._project_teams[project_id].add(team_id)
+            self._team_project[team_id] = project_id
+            self._members[team_id] = set()
+            self.add(team_id, user_ids)
+
+    def team_deleted(self, team_id: int) -> None:
+        with self._lock:
+            self._members.pop(team_id, None)
+            project_id = self._team_project.pop(team_id, None)
+            if project_id is not None:
+                self._project_teams.get(project_id, set()).discard(team_id)
+
+    def user_deleted(self, user_id: int) -> None:
+        with self._lock:
+            for members in self._members.values():
+                members.discard(user_id)
+
+    def invalidate_project(self, project_id: int) -> None:
+        """Forget a project; it is reloaded on next use."""
+        with self._lock:
+            self._loaded.pop(project_id, None)
+            for team_id in self._project_teams.pop(project_id, ()):
+                self._team_project.pop(team_id, None)
+                self._members.pop(team_id, None)
+
+    def invalidate_team(self, team_id: int) -> None:
+        with self._lock:
+            project_id = self._team_project.get(team_id)
+            if project_id is not None:
+                self.invalidate_project(project_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._loaded.clear()
+            self._project_teams.clear()
+            self._team_project.clear()
+            self._members.clear()
+
+    # Loading -------------------------------------------------------------
+
+    def _fresh(self, project_id: int) -> bool:
+        return self._loaded.get(project_id, 0) > time.monotonic()
+
+    def _ensure(self, project_id: int, reload: bool = False) -> None:
+        with self._lock:
+            hit = not reload and self._fresh(project_id)
+        record_cache("team_membership", hit)
+        if hit:
+            return
+        teams = supabase.table("teams").select("id").eq("project_id", project_id).execute()
+        team_ids = [team["id"] for team in teams.data or []]
+        members: Dict[int, Set[int]] = {team_id: set() for team_id in team_ids}
+        if team_ids:
+            rows = supabase.table("team_members").select("team_id, user_id").in_("team_id", team_ids).execute()
+            for row in rows.data or []:
+                members[row["team_id"]].add(row["user_id"])
+        with self._lock:
+            self.invalidate_project(project_id)
+            self._loaded[project_id] = time.monotonic() + self.ttl
+            self._project_teams[project_id] = set(team_ids)
+            for team_id, user_ids in members.items():
+                self._team_project[team_id] = project_id
+                self._members[team_id] = user_ids
+
+
+class MembershipListener:
+    """LISTENs on ``membership_changed`` and invalidates the index and the form validators."""
+
+    def __init__(
+        self,
+        index: MembershipIndex,
+        dsn: str,
+        validators: Optional[FormValidatorCache] = None,
+        retry_seconds: float = 5.0,
+    ):
+        self.index = index
+        self.validators = validators
+        self.dsn = dsn.replace("postgresql+asyncpg://", "postgresql://")
+        self.retry_seconds = retry_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def shutdown(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        kind, _, value = payload.partition(":")
+        if not value.isdigit():
+            return
+        if kind == "project":
+            self.index.invalidate_project(int(value))
+        elif kind == "team":
+            self.index.invalidate_team(int(value))
+        elif kind == "form" and self.validators is not None:
+            self.validators.invalidate(int(value))
+
+    def _clear(self) -> None:
+        self.index.clear()
+        if self.validators is not None:
+            self.validators.clear()
+
+    async def _run(self) -> None:
+        import asyncpg
+
+        while True:
+            closed = asyncio.Event()
+            try:
+                connection = await asyncpg.connect(self.dsn)
+            except (OSError, asyncpg.PostgresError) as e:
+                logger.warning("Membership listener cannot connect, retrying in %.0f s: %s", self.retry_seconds, e)
+                await asyncio.sleep(self.retry_seconds)
+                continue
+            try:
+                connection.add_termination_listener(lambda _: closed.set())
+                await connection.add_listener(CHANNEL, self._on_notify)
+                # Changes made before LISTEN took effect were missed.
+                self._clear()
+                await closed.wait()
+                logger.warning("Membership listener disconnected, reconnecting")
+            finally:
+                self._clear()
+                if not connection.is_closed():
+                    await connection.close()
+
+
+team_membership = MembershipIndex(ttl=settings.MEMBERSHIP_INDEX_TTL_SECONDS)
+membership_listener = (
+    MembershipListener(team_membership, settings.ASYNC_DATABASE_URL, form_validators)
+    if settings.DATA_BACKEND == "supabase" and settings.ASYNC_DATABASE_URL
+    else None
+)
+
+__all__ = ["MembershipIndex", "MembershipListener", "membership_listener", "team_membership"]
@@ -0,0 +1,216 @@
+"""Frozen report snapshots for closed projects.
+
+When a project's status moves away from ``active`` its project, team, form
+and member reports are materialized into gzip-compressed JSON files. Report
+endpoints serve those files (read through ``mmap``) instead of recomputing,
+until the project is reopened, deleted, or one of its rows is written again.
+
+Layout under ``REPORT_SNAPSHOT_DIR``::
+
+    projects/{id}.json.gz   teams/{id}.json.gz   forms/{id}.json.gz
+    users/{id}.json.gz      manifests/{project_id}.json
+"""
+import gzip
+import json
+import mmap
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from app.core.config import settings
+from app.core.metrics import record_cache
+from app.core.supabase import supabase
+
+
+class SnapshotStore:
+    """Compressed on-disk report snapshots keyed by report kind and id."""
+
+    def __init__(self, root: str, enabled: bool = True, compresslevel: int = 6):
+        self.root = Path(root)
+        self.enabled = enabled
+        self.compresslevel = compresslevel
+
+    def _path(self, kind: str, key: int) -> Path:
+        return self.root / kind / f"{int(key)}.json.gz"
+
+    def _manifest_path(self, project_id: int) -> Path:
+        return self.root / "manifests" / f"{int(project_id)}.json"
+
+    # Reading -------------------------------------------------------------
+
+    def _load(self, kind: str, key: int) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        path = self._path(kind, key)
+        try:
+            with open(path, "rb") as f:
+                # Map the compressed file instead of copying it into a buffer;
+                # pages are shared between workers through the OS page cache.
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    return json.loads(gzip.decompress(mapped))
+        except (FileNotFoundError, ValueError, OSError, EOFError):
+            return None
+
+    def read(self, kind: str, key: int) -> Optional[Dict[str, Any]]:
+        """Return the stored endpoint response for a report, if snapshotted."""
+        snapshot = self._load(kind, key)
+        record_cache("report_snapshots", snapshot is not None)
+        if snapshot is None:
+            return None
+        response = snapshot["response"]
+        response["snapshot"] = {
+            "project_id": snapshot["project_id"],
+            "created_at": snapshot["created_at"],
+        }
+        return response
+
+    # Writing -------------------------------------------------------------
+
+    def write(self, kind: str, key: int, project_id: int, response: Dict[str, Any]) -> None:
+        path = self._path(kind, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        snapshot = {
+            "project_id": project_id,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "response": response,
+        }
+        data = gzip.compress(json.dumps(snapshot, default=str).encode(), compresslevel=self.compresslevel)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def write_manifest(self, project_id: int, entries: Dict[str, List[int]]) -> None:
+        path = self._manifest_path(project_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(entries))
+        os.replace(tmp, path)
+
+    def add_to_manifest(self, project_id: int, kind: str, keys: Iterable[int]) -> None:
+        """List snapshots under another project too, so invalidating it discards them."""
+        try:
+            entries = json.loads(self._manifest_path(project_id).read_text())
+        except (FileNotFoundError, ValueError):
+            entries = {}
+        entries[kind] = sorted(set(entries.get(kind, [])) | set(keys))
+        self.write_manifest(project_id, entries)
+
+    # Invalidation --------------------------------------------------------
+
+    def has_project(self, project_id: int) -> bool:
+        return self.enabled and self._manifest_path(project_id).exists()
+
+    def discard(self, kind: str, keys: Iterable[int]) -> None:
+        for key in keys:
+            self._path(kind, key).unlink(missing_ok=True)
+
+    def invalidate_project(self, project_id: int) -> bool:
+        """Delete every snapshot written for a project. Returns True if any existed."""
+        manifest_path = self._manifest_path(project_id)
+        try:
+            manifest = json.loads(manifest_path.read_text())
+        except (FileNotFoundError, ValueError):
+            manifest = None
+        self.discard("projects", [project_id])
+        if manifest is None:
+            return False
+        for kind in ("teams", "forms", "users"):
+            self.discard(kind, manifest.get(kind, []))
+        manifest_path.unlink(missing_ok=True)
+        return True
+
+    def invalidate_for(self, kind: str, key: int) -> bool:
+        """Invalidate the project that a team or form snapshot belongs to.
+
+        Costs a single ``stat`` when the entity was never snapshotted.
+        """
+        if not self.enabled or not self._path(kind, key).exists():
+            return False
+        snapshot = self._load(kind, key)
+        if snapshot is None:
+            self.discard(kind, [key])
+            return False
+        return self.invalidate_project(snapshot["project_id"])
+
+
+async def materialize_project(project_id: int) -> Dict[str, Any]:
+    """Compute and store every report for a closed project.
+
+    Runs on the background job pool. If the project is reopened while the
+    reports are being computed the partial snapshot is discarded.
+    """
+    from app.api.v1 import reports
+
+    store = report_snapshots
+    store.invalidate_project(project_id)
+
+    project_response = await reports.get_project_report(project_id)
+    project_report = project_response["report"]
+    team_ids = [t["team"]["id"] for t in project_report["teams"] if t.get("team")]
+    member_ids = sorted({m["member"]["id"] for t in project_report["teams"] for m in t["members"]})
+
+    forms = supabase.table("evaluation_forms").select("id").eq("project_id", project_id).execute()
+    form_ids = [f["id"] for f in forms.data] if forms.data else []
+
+    # User reports span every team a user belongs to, so they are only frozen
+    # for members whose teams all belong to closed projects.
+    user_projects = _closed_projects_of(member_ids)
+    user_ids = [user_id for user_id in member_ids if user_id in user_projects]
+
+    # The manifests go first so an interrupted run can still be invalidated.
+    # A user report also holds the user's other closed projects, so it is
+    # listed in their manifests as well: reopening or editing any of them
+    # must discard it.
+    manifest = {"teams": team_ids, "forms": form_ids, "users": user_ids}
+    store.write_manifest(project_id, manifest)
+    other_projects: Dict[int, List[int]] = {}
+    for user_id in user_ids:
+        for other_id in user_projects[user_id] - {project_id}:
+            other_projects.setdefault(other_id, []).append(user_id)
+    for other_id, ids in other_projects.items():
+        store.add_to_manifest(other_id, "users", ids)
+    store.write("projects", project_id, project_id, project_response)
+    for team_id in team_ids:
+        store.write("teams", team_id, project_id, await reports.get_team_report(team_id))
+    for form_id in form_ids:
+        store.write("forms", form_id, project_id, await reports.get_form_report(form_id))
+    for user_id in user_ids:
+        store.write("users", user_id, project_id, await reports.get_user_report(user_id))
+
+    project = supabase.table("projects").select("status").eq("id", project_id).execute()
+    if not project.data or project.data[0]["status"] == "active":
+        store.invalidate_project(project_id)
+        return {"project_id": project_id, "discarded": True}
+
+    return {"project_id": project_id, **{kind: len(ids) for kind, ids in manifest.items()}}
+
+
+def _closed_projects_of(user_ids: List[int]) -> Dict[int, Set[int]]:
+    """Projects of each user whose teams all belong to closed projects; others are left out."""
+    if not user_ids:
+        return {}
+    memberships = supabase.table("team_members").select("user_id, team_id").in_("user_id", user_ids).execute()
+    team_ids = list({m["team_id"] for m in memberships.data})
+    teams = supabase.table("teams").select("id, project_id").in_("id", team_ids).execute() if team_ids else None
+    team_projects = {t["id"]: t["project_id"] for t in teams.data} if teams else {}
+    project_ids = list(set(team_projects.values()))
+    projects = supabase.table("projects").select("id, status").in_("id", project_ids).execute() if project_ids else None
+    active_projects = {p["id"] for p in projects.data if p["status"] == "active"} if projects else set()
+
+    projects_of: Dict[int, Set[int]] = {user_id: set() for user_id in user_ids}
+    for m in memberships.data:
+        projects_of[m["user_id"]].add(team_projects.get(m["team_id"]))
+    return {
+        user_id: {p for p in project_ids if p is not None}
+        for user_id, project_ids in projects_of.items()
+        if not project_ids & active_projects
+    }
+
+
+report_snapshots = SnapshotStore(
+    settings.REPORT_SNAPSHOT_DIR,
+    enabled=settings.REPORT_SNAPSHOTS_ENABLED,
+)
+
+__all__ = ["SnapshotStore", "materialize_project", "report_snapshots"]
@@ -0,0 +1,126 @@
+"""How many evaluations use a form, and how many scores use a criterion.
+
+``get_form`` shows a form's usage count, and deleting a form or criterion is
+refused while it is in use. Neither needs the rows themselves:
+
+* ``count_where`` asks PostgREST for an exact count only (``head=True``),
+  so the response has no rows whatever the count;
+* ``exists_where`` fetches at most one id - the delete guards only need to
+  know whether *any* row matches.
+
+``UsageCounters`` keeps the counts for display per worker: seeded by a
+count query (all of a form's criteria at once, grouped by the
+``criterion_usage_counts`` function), adjusted in place by the evaluation endpoints of this worker
+(submit +1, delete -1), dropped when an edit or cascade makes them unknown,
+and re-counted after ``USAGE_COUNT_TTL_SECONDS`` so writes on other workers
+show up. Guards never trust the cache; they always check the database.
+"""
+import threading
+import time
+from typing import Any, Dict, Iterable, Tuple
+
+from app.core.config import settings
+from app.core.metrics import record_cache
+from app.core.supabase import supabase
+from app.db.mutations import match_filters
+
+
+def count_where(table: str, **filters: Any) -> int:
+    """Exact number of rows matching ``filters`` (equality), without fetching them."""
+    result = match_filters(supabase.table(table).select("id", count="exact", head=True), filters).execute()
+    return result.count or 0
+
+
+def exists_where(table: str, **filters: Any) -> bool:
+    """Whether any row matches ``filters`` (equality); transfers at most one id."""
+    result = match_filters(supabase.table(table).select("id"), filters).limit(1).execute()
+    return bool(result.data)
+
+
+class UsageCounters:
+    """Per-worker evaluation counts per form and score counts per criterion."""
+
+    def __init__(self, ttl: float = 60.0):
+        self.ttl = ttl
+        self._forms: Dict[int, Tuple[int, float]] = {}  # form_id -> (count, expires at)
+        self._criteria: Dict[int, Tuple[int, int, float]] = {}  # criterion_id -> (form_id, count, expires at)
+        self._lock = threading.Lock()
+
+    def form_usage(self, form_id: int) -> int:
+        """Evaluations submitted with ``form_id``."""
+        with self._lock:
+            cached = self._forms.get(form_id)
+        hit = cached is not None and cached[1] > time.monotonic()
+        record_cache("usage_counts", hit)
+        if hit:
+            return cached[0]
+        count = count_where("evaluations", form_id=form_id)
+        self.set_form(form_id, count)
+        return count
+
+    def criteria_usage(self, form_id: int, criterion_ids: Iterable[int]) -> Dict[int, int]:
+        """Scores given per criterion of ``form_id``; one query for all on a miss."""
+        criterion_ids = list(criterion_ids)
+        now = time.monotonic()
+        with self._lock:
+            cached = {c: self._criteria.get(c) for c in criterion_ids}
+        hit = all(entry is not None and entry[2] > now for entry in cached.values())
+        record_cache("usage_counts", hit)
+        if hit:
+            return {c: entry[1] for c, entry in cached.items()}
+        result = supabase.rpc("criterion_usage_counts", {"p_form_id": form_id}).execute()
+        counts = {row["criterion_id"]: row["usage_count"] for row in result.data or []}
+        for criterion_id, count in counts.items():
+            self.set_criterion(criterion_id, form_id, count)
+        return {c: counts.get(c, 0) for c in criterion_ids}
+
+    def set_form(self, form_id: int, count: int) -> None:
+        with self._lock:
+            self._forms[form_id] = (count, time.monotonic() + self.ttl)
+
+    def set_criterion(self, criterion_id: int, form_id: int, count: int) -> None:
+        with self._lock:
+            self._criteria[criterion_id] = (form_id, count, time.monotonic() + self.ttl)
+
+    def evaluation_added(self, form_id: int, criterion_ids: Iterable[int], delta: int = 1) -> None:
+        """Adjust cached counts after an evaluation with scores for ``criterion_ids`` is added."""
+        with self._lock:
+            if form_id in self._forms:
+                count, expires_at = self._forms[form_id]
+                self._forms[form_id] = (max(0, count + delta), expires_at)
+            for criterion_id in criterion_ids:
+                if criterion_id in self._criteria:
+                    owner, count, expires_at = self._criteria[criterion_id]
+                    self._criteria[criterion_id] = (owner, max(0, count + delta), expires_at)
+
+    def evaluation_removed(self, form_id: int) -> None:
+        """Adjust cached counts after an evaluation of ``form_id`` is deleted.
+
+        Its scores went with it by cascade; which criteria they used is not
+        known here, so the form's criterion counts are dropped instead.
+        """
+        self.evaluation_added(form_id, (), delta=-1)
+        self.forget_form(form_id, keep_form=True)
+
+    def forget_form(self, form_id: int, keep_form: bool = False) -> None:
+        """Drop the cached counts of ``form_id`` and its criteria."""
+        with self._lock:
+            if not keep_form:
+                self._forms.pop(form_id, None)
+            for criterion_id in [c for c, (owner, _, _) in self._criteria.items() if owner == form_id]:
+                del self._criteria[criterion_id]
+
+    def forget_criterion(self, criterion_id: int) -> None:
+        with self._lock:
+            self._criteria.pop(criterion_id, None)
+
+    def clear(self) -> None:
+        """Drop everything (after cascading deletes of teams, projects or users)."""
+        with self._lock:
+            self._forms.clear()
+            self._criteria.clear()
+
+
+usage_counters = UsageCounters(ttl=settings.USAGE_COUNT_TTL_SECONDS)
+
+__all__ = ["UsageCounters", "count_where", "exists_where", "usage_counters"]
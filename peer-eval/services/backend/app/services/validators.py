@@ -0,0 +1,136 @@
+"""Precompiled submission validators, one per evaluation form.
+
+A ``FormValidator`` holds what a submission is checked against - the
+criterion ids of the form with their ``max_points``, and the form's
+``max_score`` - so ``submit_evaluation`` validates a submission in memory
+in O(criteria): every criterion scored exactly once, each score within
+``0..max_points``, and ``total_score`` equal to the sum of the scores and
+no more than ``max_score``.
+
+``form_validators`` caches them per worker; ``update_evaluation`` uses them
+too. The form and criterion write endpoints invalidate the form's entry.
+Edits made through another worker arrive as ``form:<id>`` notifications
+on the membership listener's channel (app/services/membership.py); without
+the listener, entries expire after ``FORM_VALIDATOR_TTL_SECONDS``. Until
+then a stale validator can
+accept a score for a criterion deleted elsewhere. The score's foreign key
+refuses it, and the evaluation endpoints then remove what they wrote,
+invalidate the entry and validate again.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import record_cache
+from app.core.supabase import supabase
+
+
+@dataclass(frozen=True)
+class FormValidator:
+    form_id: int
+    max_score: int
+    max_points: Dict[int, int]  # criterion id -> max points
+
+    def error(self, scores: Iterable[Tuple[int, int]], total_score: int) -> Optional[str]:
+        """Why ``(criterion_id, score)`` pairs and ``total_score`` are invalid, or ``None``."""
+        seen = set()
+        total = 0
+        for criterion_id, score in scores:
+            error = self._score_error(criterion_id, score)
+            if error:
+                return error
+            if criterion_id in seen:
+                return f"Criterion {criterion_id} is scored more than once"
+            seen.add(criterion_id)
+            total += score
+        if len(seen) != len(self.max_points):
+            missing = sorted(set(self.max_points) - seen)
+            return f"Missing scores for criteria {', '.join(map(str, missing))}"
+        if total_score != total:
+            return f"total_score ({total_score}) does not match the sum of the scores ({total})"
+        if total_score > self.max_score:
+            return f"total_score ({total_score}) exceeds the form's max_score ({self.max_score})"
+        return None
+
+    def partial_error(self, scores: Iterable[Tuple[int, Optional[int]]]) -> Optional[str]:
+        """Like ``error`` for a draft: any subset of criteria, ``None`` clears a score."""
+        for criterion_id, score in scores:
+            error = self._score_error(criterion_id, score)
+            if error:
+                return error
+        return None
+
+    def _score_error(self, criterion_id: int, score: Optional[int]) -> Optional[str]:
+        max_points = self.max_points.get(criterion_id)
+        if max_points is None:
+            return f"Criterion {criterion_id} does not belong to this form"
+        if score is not None and not 0 <= score <= max_points:
+            return f"Score for criterion {criterion_id} must be between 0 and {max_points}"
+        return None
+
+
+def compile_validator(form_id: int) -> Optional[FormValidator]:
+    """Build the validator for ``form_id`` from the database; ``None`` if the form does not exist."""
+    form = supabase.table("evaluation_forms").select("id, max_score").eq("id", form_id).execute()
+    if not form.data:
+        return None
+    criteria = supabase.table("form_criteria").select("id, max_points").eq("form_id", form_id).execute()
+    return FormValidator(
+        form_id=form_id,
+        max_score=form.data[0]["max_score"],
+        max_points={c["id"]: c["max_points"] for c in criteria.data or []},
+    )
+
+
+class FormValidatorCache:
+    """LRU of compiled validators by form id, with a TTL."""
+
+    def __init__(self, max_size: int = 1024, ttl: float = 60.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[int, Tuple[FormValidator, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0  # bumped by every invalidation
+
+    def get(self, form_id: int) -> Optional[FormValidator]:
+        """The form's validator, compiled on a miss; ``None`` if the form does not exist."""
+        with self._lock:
+            entry = self._entries.get(form_id)
+            hit = entry is not None and entry[1] > time.monotonic()
+            if hit:
+                self._entries.move_to_end(form_id)
+            generation = self._generation
+        record_cache("form_validators", hit)
+        if hit:
+            return entry[0]
+        validator = compile_validator(form_id)
+        if validator is not None and self.max_size > 0:
+            with self._lock:
+                if generation != self._generation:
+                    return validator  # invalidated while compiling; may already be stale
+                self._entries[form_id] = (validator, time.monotonic() + self.ttl)
+                self._entries.move_to_end(form_id)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return validator
+
+    def invalidate(self, form_id: int) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(form_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
+form_validators = FormValidatorCache(
+    max_size=settings.FORM_VALIDATOR_CACHE_SIZE,
+    ttl=settings.FORM_VALIDATOR_TTL_SECONDS,
+)
+
+__all__ = ["FormValidator", "FormValidatorCache", "compile_validator", "form_validators"]
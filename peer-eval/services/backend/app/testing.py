@@ -0,0 +1,89 @@
+"""Test helpers: database call counting and an N+1 guard fixture for pytest.
+
+Enable the fixtures from a ``conftest.py`` (as ``tests/conftest.py`` does)::
+
+    pytest_plugins = ["app.testing"]
+
+and bound the calls an endpoint may make::
+
+    def test_list_teams(client, max_queries):
+        with max_queries(3):
+            client.get("/api/v1/teams/", params={"project_id": 1})
+
+Calls are counted through the same listener used by ``/metrics``, so both the
+Supabase client and the SQLAlchemy engine are covered, including calls made
+on the TestClient's server thread.
+"""
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+import pytest
+
+from app.core.instrumentation import (
+    RequestStats,
+    add_db_call_listener,
+    remove_db_call_listener,
+)
+
+
+class QueryCounter:
+    """Collects every database call made while active."""
+
+    def __init__(self):
+        self.calls: List[Tuple[str, str, float]] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, stats: Optional[RequestStats], table: str, operation: str, seconds: float) -> None:
+        with self._lock:
+            self.calls.append((table, operation, seconds))
+
+    @property
+    def count(self) -> int:
+        return len(self.calls)
+
+    def summary(self) -> str:
+        """One line per table/operation, most frequent first."""
+        totals = {}
+        for table, operation, _ in self.calls:
+            totals[(table, operation)] = totals.get((table, operation), 0) + 1
+        ordered = sorted(totals.items(), key=lambda item: -item[1])
+        return "\n".join(f"  {count:4d} x {operation} {table}" for (table, operation), count in ordered)
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryCounter]:
+    """Count database calls made inside the ``with`` block."""
+    counter = QueryCounter()
+    add_db_call_listener(counter)
+    try:
+        yield counter
+    finally:
+        remove_db_call_listener(counter)
+
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[QueryCounter]:
+    """Fail if the ``with`` block makes more than ``limit`` database calls."""
+    with count_queries() as counter:
+        yield counter
+    if counter.count > limit:
+        raise AssertionError(
+            f"Expected at most {limit} database calls, got {counter.count}:\n{counter.summary()}"
+        )
+
+
+@pytest.fixture
+def query_counter() -> Iterator[QueryCounter]:
+    """Counts database calls for the whole test."""
+    with count_queries() as counter:
+        yield counter
+
+
+@pytest.fixture
+def max_queries():
+    """Returns ``assert_max_queries`` for bounding calls per endpoint."""
+    return assert_max_queries
+
+
+__all__ = ["QueryCounter", "assert_max_queries", "count_queries", "max_queries", "query_counter"]
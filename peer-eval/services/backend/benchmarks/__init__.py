@@ -0,0 +1,5 @@
+"""Performance benchmarks for the backend.
+
+Run from ``services/backend`` so the ``app`` package is importable, e.g.
+``python -m benchmarks.bench_serialization``.
+"""
@@ -0,0 +1,306 @@
+"""Latency, throughput and query counts for every router at course scale.
+
+The API runs in-process (``httpx.ASGITransport``) on the in-memory data
+backend, seeded with a deterministic synthetic dataset, so runs are
+reproducible and need no services. Each scenario is requested ``--requests``
+times sequentially for latency percentiles and data-access call counts, then
+with ``--concurrency`` clients for throughput.
+
+    python -m benchmarks.bench_endpoints --scale small
+    python -m benchmarks.bench_endpoints --output bench/$(git rev-parse --short HEAD).json
+    python -m benchmarks.bench_endpoints --compare bench/main.json --threshold 0.2
+
+With ``--compare`` the run fails (exit status 1) when a scenario's median
+latency grows by more than ``--threshold`` relative to the baseline, or it
+issues more database calls than before.
+"""
+import os
+
+# Must be set before the application (and its settings) are imported.
+os.environ.setdefault("DATA_BACKEND", "memory")
+os.environ.setdefault("QUERY_COUNT_HEADER", "true")
+os.environ.setdefault("QUERY_COUNT_LOG_THRESHOLD", "0")
+os.environ.setdefault("REPORT_SNAPSHOTS_ENABLED", "false")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")  # one client issues every request
+# Cheap bcrypt so auth scenarios measure the endpoint, not the hash (see bench_passwords).
+os.environ.setdefault("PASSWORD_HASH_ROUNDS", "4")
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from app.services.datagen import DEFAULT_PASSWORD, SCALES, DatasetSpec, SyntheticDataset, load_memory
+
+QUERY_COUNT_HEADER = "x-db-query-count"
+
+
+@dataclass
+class Scenario:
+    router: str
+    name: str
+    method: str
+    path: str
+    json: Optional[Callable[[int], Any]] = None  # request body for iteration i
+    teardown: Optional[Callable[[httpx.AsyncClient, httpx.Response], Awaitable[None]]] = None
+    expect: int = 200
+    concurrent: bool = True  # mutating scenarios with teardown run sequentially only
+    params: Dict[str, Any] = field(default_factory=dict)
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def _bearer(dataset: SyntheticDataset, user_id: int) -> Dict[str, str]:
+    from app.core.security import create_access_token
+
+    user = next(row for row in dataset.users() if row["id"] == user_id)
+    token, _ = create_access_token(user)
+    return {"Authorization": f"Bearer {token}"}
+
+
+def build_scenarios(dataset: SyntheticDataset, bench_form: Dict[str, Any]) -> List[Scenario]:
+    """One or more scenarios per router, using ids that exist in the dataset."""
+    project_id = 1
+    team_id = dataset.team_ids(project_id)[0]
+    member_ids = dataset.members(team_id)
+    student_id = member_ids[0]
+    form_id = dataset.form_ids(project_id)[0]
+
+    async def delete_created_user(client: httpx.AsyncClient, response: httpx.Response) -> None:
+        if response.status_code == 201:
+            await client.delete(f"/api/v1/users/{response.json()['id']}")
+
+    async def delete_created_evaluation(client: httpx.AsyncClient, response: httpx.Response) -> None:
+        if response.status_code == 201:
+            await client.delete(f"/api/v1/evaluations/{response.json()['evaluation']['id']}")
+
+    def evaluation_body(i: int) -> Dict[str, Any]:
+        scores = [{"criterion_id": c["id"], "score": c["max_points"] // 2} for c in bench_form["criteria"]]
+        return {
+            "form_id": bench_form["id"],
+            "evaluator_id": member_ids[0],
+            "evaluatee_id": member_ids[1],
+            "team_id": team_id,
+            "total_score": sum(s["score"] for s in scores),
+            "scores": scores,
+            "comments": f"benchmark {i}",
+        }
+
+    scenarios = [
+        Scenario("auth", "login", "POST", "/api/v1/auth/login",
+                 json=lambda i: {"email": f"student{student_id}@example.edu", "password": DEFAULT_PASSWORD}),
+        Scenario("auth", "register", "POST", "/api/v1/auth/register",
+                 json=lambda i: {"email": f"bench{i}@example.edu", "password": "pw", "name": f"Bench {i}"},
+                 teardown=delete_created_user, expect=201, concurrent=False),
+        Scenario("auth", "me", "GET", "/api/v1/auth/me", headers=_bearer(dataset, student_id)),
+        Scenario("users", "list_users", "GET", "/api/v1/users/"),
+        Scenario("users", "get_user", "GET", f"/api/v1/users/{student_id}"),
+        Scenario("projects", "list_projects", "GET", "/api/v1/projects/"),
+        Scenario("projects", "get_project", "GET", f"/api/v1/projects/{project_id}"),
+        Scenario("teams", "list_teams", "GET", "/api/v1/teams/", params={"project_id": project_id}),
+        Scenario("teams", "get_team", "GET", f"/api/v1/teams/{team_id}"),
+        Scenario("forms", "list_forms", "GET", "/api/v1/forms/", params={"project_id": project_id}),
+        Scenario("forms", "get_form", "GET", f"/api/v1/forms/{form_id}"),
+        Scenario("evaluations", "list_evaluations", "GET", "/api/v1/evaluations/", params={"team_id": team_id}),
+        Scenario("evaluations", "get_evaluation", "GET", "/api/v1/evaluations/1"),
+        Scenario("evaluations", "submit_evaluation", "POST", "/api/v1/evaluations/",
+                 json=evaluation_body, teardown=delete_created_evaluation,
+                 expect=201, concurrent=False),
+        Scenario("evaluations", "update_evaluation", "PUT", "/api/v1/evaluations/1",
+                 json=lambda i: {"comments": f"updated {i}"}),
+        Scenario("reports", "project_report", "GET", f"/api/v1/reports/project/{project_id}"),
+        Scenario("reports", "team_report", "GET", f"/api/v1/reports/team/{team_id}"),
+        Scenario("reports", "user_report", "GET", f"/api/v1/reports/user/{student_id}"),
+        Scenario("reports", "form_report", "GET", f"/api/v1/reports/evaluation-form/{form_id}"),
+    ]
+    return scenarios
+
+
+async def _create_bench_form(client: httpx.AsyncClient) -> Dict[str, Any]:
+    """A form with no evaluations, so submit_evaluation can create and delete one."""
+    response = await client.post("/api/v1/forms/", json={
+        "project_id": 1,
+        "title": "Benchmark form",
+        "max_score": 100,
+        "criteria": [
+            {"text": "Contribution", "max_points": 50, "order_index": 0},
+            {"text": "Communication", "max_points": 50, "order_index": 1},
+        ],
+    })
+    response.raise_for_status()
+    return response.json()["form"]
+
+
+async def _request(client: httpx.AsyncClient, scenario: Scenario, i: int) -> httpx.Response:
+    return await client.request(
+        scenario.method,
+        scenario.path,
+        params=scenario.params or None,
+        headers=scenario.headers or None,
+        json=scenario.json(i) if scenario.json else None,
+    )
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, requests: int, concurrency: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    queries: List[int] = []
+    statuses: Dict[str, int] = {}
+    errors = 0
+
+    for i in range(requests):
+        started = time.perf_counter()
+        response = await _request(client, scenario, i)
+        latencies.append((time.perf_counter() - started) * 1000)
+        statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+        if response.status_code != scenario.expect:
+            errors += 1
+        if QUERY_COUNT_HEADER in response.headers:
+            queries.append(int(response.headers[QUERY_COUNT_HEADER]))
+        if scenario.teardown:
+            await scenario.teardown(client, response)
+
+    throughput = None
+    if scenario.concurrent and concurrency > 1:
+        counter = iter(range(requests, requests * 2))
+
+        async def worker() -> None:
+            for i in counter:
+                await _request(client, scenario, i)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        throughput = round(requests / (time.perf_counter() - started), 1)
+
+    return {
+        "router": scenario.router,
+        "method": scenario.method,
+        "path": scenario.path,
+        "requests": requests,
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(_percentile(latencies, 95), 3),
+        "p99_ms": round(_percentile(latencies, 99), 3),
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        "throughput_rps": throughput,
+        "queries": max(queries) if queries else None,
+        "statuses": statuses,
+        "errors": errors,
+    }
+
+
+async def run(spec: DatasetSpec, seed: int, requests: int, concurrency: int, only: Optional[List[str]]) -> Dict[str, Any]:
+    from app.core.config import settings
+    from app.core.supabase import supabase
+    from app.main import app
+
+    dataset = SyntheticDataset(spec, seed, settings.PASSWORD_HASH_ROUNDS)
+    print(f"Seeding dataset: {dataset.summary()}", flush=True)
+    started = time.perf_counter()
+    load_memory(dataset, supabase.db)
+    seed_seconds = time.perf_counter() - started
+    print(f"Seeded in {seed_seconds:.2f} s", flush=True)
+
+    transport = httpx.ASGITransport(app=app)
+    results: Dict[str, Any] = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        scenarios = build_scenarios(dataset, await _create_bench_form(client))
+        for scenario in scenarios:
+            if only and scenario.name not in only and scenario.router not in only:
+                continue
+            results[scenario.name] = await run_scenario(client, scenario, requests, concurrency)
+            print(_format_row(scenario.name, results[scenario.name]), flush=True)
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "seed": seed,
+            "dataset": dataset.summary(),
+            "seed_seconds": round(seed_seconds, 2),
+            "requests": requests,
+            "concurrency": concurrency,
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Regressions of ``current`` against ``baseline`` (median latency and query count)."""
+    failures = []
+    for name, result in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if before is None:
+            continue
+        limit = before["p50_ms"] * (1 + threshold)
+        if result["p50_ms"] > limit:
+            failures.append(f"{name}: p50 {result['p50_ms']:.2f} ms > {limit:.2f} ms (baseline {before['p50_ms']:.2f} ms)")
+        if result["queries"] is not None and before.get("queries") is not None and result["queries"] > before["queries"]:
+            failures.append(f"{name}: {result['queries']} database calls > baseline {before['queries']}")
+    return failures
+
+
+def _format_row(name: str, result: Dict[str, Any]) -> str:
+    rps = f"{result['throughput_rps']:>8.1f} rps" if result["throughput_rps"] else " " * 12
+    queries = f"{result['queries']:>6} q" if result["queries"] is not None else " " * 8
+    errors = f"  {result['errors']} errors" if result["errors"] else ""
+    return (f"  {result['router']:<12}{name:<20} p50 {result['p50_ms']:>9.2f} ms  p95 {result['p95_ms']:>9.2f} ms  "
+            f"p99 {result['p99_ms']:>9.2f} ms  {rps}{queries}{errors}")
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="course", help="dataset size preset")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--requests", type=int, default=20, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent clients for the throughput pass")
+    parser.add_argument("--only", action="append", help="run only these scenarios or routers (repeatable)")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--compare", help="baseline results JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed median latency growth (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(SCALES[args.scale], args.seed, args.requests, args.concurrency, args.only))
+
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        failures = compare(report, baseline, args.threshold)
+        for failure in failures:
+            print(f"✗ {failure}", file=sys.stderr)
+        if failures:
+            sys.exit(1)
+        print(f"✓ No regressions against {args.compare} (threshold {args.threshold:.0%})")
+
+
+if __name__ == "__main__":
+    main()
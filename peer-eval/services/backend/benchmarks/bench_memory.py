@@ -0,0 +1,94 @@
+"""Peak memory of the report endpoints, with an optional assertion.
+
+Each report is requested in-process (``httpx.ASGITransport``, no server)
+under ``tracemalloc`` against whatever data backend the settings point to,
+and the peak traced allocation is compared with ``--max-peak-mb``. The
+process exits with status 1 when any report exceeds the limit, so the
+check can gate CI.
+
+    python -m benchmarks.bench_memory --report project:1 --report team:12
+    python -m benchmarks.bench_memory --report project:1 --max-peak-mb 150 --output memory.json
+"""
+import argparse
+import asyncio
+import json
+import sys
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from app.core.memtrace import trace_allocations
+
+REPORT_PATHS = {
+    "project": "/api/v1/reports/project/{id}",
+    "team": "/api/v1/reports/team/{id}",
+    "user": "/api/v1/reports/user/{id}",
+    "form": "/api/v1/reports/evaluation-form/{id}",
+}
+
+
+def report_path(spec: str) -> str:
+    """``project:1`` -> ``/api/v1/reports/project/1``."""
+    kind, _, report_id = spec.partition(":")
+    if kind not in REPORT_PATHS or not report_id.isdigit():
+        raise argparse.ArgumentTypeError(f"expected one of {', '.join(REPORT_PATHS)} followed by :<id>, got '{spec}'")
+    return REPORT_PATHS[kind].format(id=report_id)
+
+
+async def measure_peak(app: Any, path: str, top: int = 10) -> Dict[str, Any]:
+    """Request ``path`` once under tracemalloc and return the trace summary."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        with trace_allocations(top=top) as trace:
+            response = await client.get(path)
+    return {"path": path, "status_code": response.status_code, "response_bytes": len(response.content), **trace}
+
+
+def check_peaks(results: List[Dict[str, Any]], max_peak_mb: Optional[float]) -> List[str]:
+    """Return a failure message for every result above ``max_peak_mb``."""
+    if max_peak_mb is None:
+        return []
+    return [
+        f"{result['path']}: peak {result['peak_mb']:.1f} MB exceeds {max_peak_mb:.1f} MB"
+        for result in results
+        if result["peak_mb"] > max_peak_mb
+    ]
+
+
+async def _run(paths: List[str], top: int) -> List[Dict[str, Any]]:
+    from app.main import app
+
+    return [await measure_peak(app, path, top) for path in paths]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--report", dest="paths", type=report_path, action="append", required=True,
+                        help="report to measure, e.g. project:1, team:3, user:7, form:2 (repeatable)")
+    parser.add_argument("--max-peak-mb", type=float, help="fail when a report's peak allocation exceeds this")
+    parser.add_argument("--top", type=int, default=10, help="allocation sites to report per request")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = asyncio.run(_run(args.paths, args.top))
+
+    for result in results:
+        print(f"\n== {result['path']} ({result['status_code']}, {result['response_bytes']:,} bytes) ==")
+        print(f"  peak {result['peak_mb']:>9.2f} MB   retained {result['retained_mb']:>8.2f} MB   {result['seconds']:.2f} s")
+        for site in result["top_sites"][:5]:
+            print(f"  {site['size_kb']:>10.1f} KB  {site['file']}:{site['line']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    failures = check_peaks(results, args.max_peak_mb)
+    for failure in failures:
+        print(f"✗ {failure}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
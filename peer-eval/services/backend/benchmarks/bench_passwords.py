@@ -0,0 +1,131 @@
+"""Sustained logins per second on one API worker.
+
+Runs the app in-process on the memory backend with users whose passwords are
+bcrypt-hashed at ``--rounds``, then keeps ``--concurrency`` clients logging in
+for ``--duration`` seconds. Alongside throughput and latency it reports event
+loop lag (how late a 10 ms timer fires), which stays near zero while hashing
+runs in the process pool instead of on the loop.
+
+    python -m benchmarks.bench_passwords
+    python -m benchmarks.bench_passwords --rounds 10 --workers 4 --concurrency 64 --output logins.json
+"""
+import argparse
+import os
+import sys
+
+
+def _configure(argv) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt work factor")
+    parser.add_argument("--workers", type=int, default=2, help="password hashing processes")
+    parser.add_argument("--concurrency", type=int, default=32, help="clients logging in at once")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of sustained load")
+    parser.add_argument("--users", type=int, default=100, help="distinct accounts to log in as")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+    # Must be set before the application (and its settings) are imported.
+    os.environ.setdefault("DATA_BACKEND", "memory")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ["PASSWORD_HASH_ROUNDS"] = str(args.rounds)
+    os.environ["PASSWORD_HASH_WORKERS"] = str(args.workers)
+    return args
+
+
+async def _loop_lag(stop, samples) -> None:
+    import asyncio
+    import time
+
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        samples.append((time.perf_counter() - started - 0.01) * 1000)
+
+
+async def run(args: argparse.Namespace):
+    import asyncio
+    import time
+
+    import httpx
+
+    from app.core.passwords import hash_password_sync, passwords
+    from app.core.supabase import supabase
+    from app.main import app
+
+    password = "correct horse battery staple"
+    password_hash = hash_password_sync(password, args.rounds)
+    supabase.db.reset()
+    supabase.db.load({"users": [
+        {"id": i, "email": f"user{i}@example.edu", "password_hash": password_hash, "name": f"User {i}", "role": "student"}
+        for i in range(1, args.users + 1)
+    ]})
+
+    passwords.start()
+    latencies, statuses, lag = [], {}, []
+    stop = asyncio.Event()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        # Warm the pool (process start-up is not part of the steady state).
+        await client.post("/api/v1/auth/login", json={"email": "user1@example.edu", "password": password})
+        deadline = time.perf_counter() + args.duration
+
+        async def worker(n: int) -> None:
+            i = n
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                response = await client.post("/api/v1/auth/login", json={
+                    "email": f"user{i % args.users + 1}@example.edu", "password": password,
+                })
+                latencies.append((time.perf_counter() - started) * 1000)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                i += args.concurrency
+
+        started = time.perf_counter()
+        probe = asyncio.create_task(_loop_lag(stop, lag))
+        await asyncio.gather(*(worker(n) for n in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await probe
+    passwords.shutdown()
+    return latencies, statuses, lag, elapsed
+
+
+def main(argv=None) -> None:
+    args = _configure(argv)
+
+    import asyncio
+    import json
+    import statistics
+
+    from benchmarks.bench_endpoints import _percentile
+
+    latencies, statuses, lag, elapsed = asyncio.run(run(args))
+    ok = statuses.get(200, 0)
+    result = {
+        "rounds": args.rounds,
+        "workers": args.workers,
+        "concurrency": args.concurrency,
+        "seconds": round(elapsed, 2),
+        "logins": ok,
+        "logins_per_second": round(ok / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 1),
+        "p95_ms": round(_percentile(latencies, 95), 1),
+        "p99_ms": round(_percentile(latencies, 99), 1),
+        "statuses": {str(code): count for code, count in statuses.items()},
+        "loop_lag_p99_ms": round(_percentile(lag, 99), 2) if lag else None,
+        "loop_lag_max_ms": round(max(lag), 2) if lag else None,
+    }
+    print(f"bcrypt cost {args.rounds}, {args.workers} hashing processes, {args.concurrency} clients")
+    print(f"  {result['logins_per_second']:.1f} logins/s ({ok} in {result['seconds']} s)"
+          f"  p50 {result['p50_ms']} ms  p95 {result['p95_ms']} ms  p99 {result['p99_ms']} ms")
+    print(f"  event loop lag p99 {result['loop_lag_p99_ms']} ms, max {result['loop_lag_max_ms']} ms")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.output}")
+    if ok != len(latencies):
+        print(f"✗ {len(latencies) - ok} logins failed: {result['statuses']}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""Benchmark JSON encoding and compressed size of report-shaped payloads.
+
+Compares FastAPI's default path (``jsonable_encoder`` + stdlib ``json``)
+with ``FastJSONResponse`` (orjson when installed) and reports the bytes on
+the wire uncompressed, gzip and brotli at the levels used by
+``CompressionMiddleware``.
+
+    python -m benchmarks.bench_serialization --teams 200 --repeat 5
+    python -m benchmarks.bench_serialization --output serialization.json
+"""
+import argparse
+import gzip
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+from app.core.responses import FastJSONResponse, orjson
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+
+def project_report_payload(teams: int = 200, members: int = 5, seed: int = 1) -> Dict[str, Any]:
+    """Build a payload shaped like ``get_project_report`` for a full peer grid."""
+    rng = random.Random(seed)
+    base = datetime(2024, 4, 1, tzinfo=timezone.utc)
+    user_id = evaluation_id = 0
+    team_reports = []
+    for team_id in range(1, teams + 1):
+        team_members = []
+        for _ in range(members):
+            user_id += 1
+            team_members.append({"id": user_id, "name": f"Student {user_id}", "email": f"student{user_id}@example.edu"})
+        member_stats = []
+        all_scores: List[int] = []
+        for member in team_members:
+            evaluations = []
+            for evaluator in team_members:
+                if evaluator["id"] == member["id"]:
+                    continue
+                evaluation_id += 1
+                score = rng.randint(50, 100)
+                all_scores.append(score)
+                evaluations.append({
+                    "id": evaluation_id,
+                    "form_id": 1,
+                    "evaluator_id": evaluator["id"],
+                    "evaluatee_id": member["id"],
+                    "team_id": team_id,
+                    "total_score": score,
+                    "comments": "Consistently contributed to design reviews and testing.",
+                    "submitted_at": base + timedelta(minutes=evaluation_id),
+                })
+            scores = [e["total_score"] for e in evaluations]
+            member_stats.append({
+                "member": member,
+                "evaluations_received": len(evaluations),
+                "average_score": round(sum(scores) / len(scores), 2) if scores else 0,
+                "evaluations": evaluations,
+            })
+        team_reports.append({
+            "team": {"id": team_id, "project_id": 1, "name": f"Team {team_id}", "created_at": base, "updated_at": base},
+            "members": member_stats,
+            "statistics": {
+                "total_members": len(team_members),
+                "total_evaluations": len(all_scores),
+                "average_score": round(sum(all_scores) / len(all_scores), 2) if all_scores else 0,
+                "all_scores": all_scores,
+            },
+        })
+    return {
+        "report": {
+            "project": {"id": 1, "title": "Capstone", "status": "active", "instructor_id": 1, "created_at": base},
+            "teams": team_reports,
+            "overall_statistics": {"total_teams": teams, "total_evaluations": evaluation_id},
+        },
+        "message": "Project report generated successfully",
+    }
+
+
+def evaluation_list_payload(evaluations: int = 5000, criteria: int = 6, seed: int = 2) -> Dict[str, Any]:
+    """Build a payload shaped like ``list_evaluations``."""
+    rng = random.Random(seed)
+    base = datetime(2024, 4, 1, tzinfo=timezone.utc)
+    rows = []
+    for evaluation_id in range(1, evaluations + 1):
+        scores = [
+            {
+                "id": evaluation_id * criteria + c,
+                "evaluation_id": evaluation_id,
+                "criterion_id": c + 1,
+                "score": rng.randint(0, 20),
+                "created_at": base,
+                "criterion": {"id": c + 1, "form_id": 1, "text": f"Criterion {c + 1}", "max_points": 20, "order_index": c},
+            }
+            for c in range(criteria)
+        ]
+        rows.append({
+            "id": evaluation_id,
+            "form_id": 1,
+            "evaluator_id": evaluation_id,
+            "evaluatee_id": evaluation_id + 1,
+            "team_id": evaluation_id // 4 + 1,
+            "total_score": sum(s["score"] for s in scores),
+            "comments": None,
+            "submitted_at": base + timedelta(seconds=evaluation_id),
+            "evaluator": {"id": evaluation_id, "name": f"Student {evaluation_id}", "email": f"s{evaluation_id}@example.edu"},
+            "evaluatee": {"id": evaluation_id + 1, "name": f"Student {evaluation_id + 1}", "email": f"s{evaluation_id + 1}@example.edu"},
+            "team": {"id": evaluation_id // 4 + 1, "name": "Team"},
+            "form": {"id": 1, "title": "Midterm peer review"},
+            "scores": scores,
+        })
+    return {"evaluations": rows, "count": len(rows), "message": "Evaluations retrieved successfully"}
+
+
+def _time(fn: Callable[[], bytes], repeat: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"min_ms": round(min(samples), 2), "median_ms": round(statistics.median(samples), 2)}
+
+
+def bench_payload(name: str, payload: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    # Supabase returns timestamps as ISO strings; mirror that for the wire-size
+    # comparison so both encoders produce the same document.
+    wire_payload = jsonable_encoder(payload)
+    stdlib_body = JSONResponse(content=wire_payload).body
+    fast_body = FastJSONResponse(content=wire_payload).body
+
+    result: Dict[str, Any] = {
+        "payload": name,
+        "encode": {
+            "jsonable_encoder+json": _time(lambda: JSONResponse(content=jsonable_encoder(payload)).body, repeat),
+            "json": _time(lambda: JSONResponse(content=wire_payload).body, repeat),
+            "fast_json" + ("(orjson)" if orjson else "(stdlib)"): _time(lambda: FastJSONResponse(content=payload).body, repeat),
+        },
+        "bytes": {
+            "stdlib": len(stdlib_body),
+            "fast_json": len(fast_body),
+            "gzip-6": len(gzip.compress(fast_body, compresslevel=6)),
+        },
+        "compress": {
+            "gzip-6": _time(lambda: gzip.compress(fast_body, compresslevel=6), repeat),
+        },
+    }
+    if brotli is not None:
+        result["bytes"]["br-4"] = len(brotli.compress(fast_body, quality=4))
+        result["compress"]["br-4"] = _time(lambda: brotli.compress(fast_body, quality=4), repeat)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--teams", type=int, default=200, help="teams in the project report payload")
+    parser.add_argument("--members", type=int, default=5, help="members per team")
+    parser.add_argument("--evaluations", type=int, default=5000, help="rows in the evaluation list payload")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = [
+        bench_payload("project_report", project_report_payload(args.teams, args.members), args.repeat),
+        bench_payload("evaluation_list", evaluation_list_payload(args.evaluations), args.repeat),
+    ]
+
+    for result in results:
+        print(f"\n== {result['payload']} ==")
+        for encoder, timing in result["encode"].items():
+            print(f"  encode {encoder:<28} median {timing['median_ms']:>9.2f} ms   min {timing['min_ms']:>9.2f} ms")
+        for codec, timing in result["compress"].items():
+            print(f"  compress {codec:<26} median {timing['median_ms']:>9.2f} ms")
+        for codec, size in result["bytes"].items():
+            print(f"  bytes {codec:<29} {size:>12,}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""Replay captured traffic against a running instance.
+
+Plays back a ``TRAFFIC_CAPTURE_PATH`` file (see ``app/core/traffic.py``)
+preserving the captured inter-arrival times, compressed by ``--speed``, with
+at most ``--concurrency`` requests in flight. Reports latency percentiles,
+error rates and status mismatches per route, plus how far the replay fell
+behind schedule (a sign that the target, or the client, is saturated).
+
+    python -m benchmarks.replay traffic.jsonl --target http://localhost:8000
+    python -m benchmarks.replay traffic.jsonl --speed 10 --concurrency 64 --output replay.json
+    python -m benchmarks.replay traffic.jsonl --speed 20 --route /api/v1/evaluations/ --max-error-rate 0.01
+
+Replay against the dataset the capture was taken on (or the same
+``app.cli generate`` seed), so captured ids still exist. Strings in captured
+bodies are masked, so requests keyed on them (logins, registrations) are
+expected to fail and are reported as such.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+import httpx
+
+
+def load_capture(path: str, routes: Optional[List[str]] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Captured records in arrival order, optionally filtered by route template."""
+    records = []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if routes and record["route"] not in routes:
+                continue
+            records.append(record)
+    records.sort(key=lambda record: record["ts"])
+    return records[:limit] if limit else records
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def _body(record: Dict[str, Any]) -> Any:
+    body = record.get("body")
+    # Placeholders for bodies that were not captured ({"_bytes": n}, ...).
+    if isinstance(body, dict) and body and all(key.startswith("_") for key in body):
+        return None
+    return body
+
+
+async def replay(
+    records: List[Dict[str, Any]],
+    target: str,
+    speed: float = 1.0,
+    concurrency: int = 32,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: float = 30.0,
+) -> List[Dict[str, Any]]:
+    """Send every record at its scaled offset; returns one result per request."""
+    if not records:
+        return []
+    semaphore = asyncio.Semaphore(concurrency)
+    results: List[Dict[str, Any]] = []
+    first = records[0]["ts"]
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=target, headers=headers, timeout=timeout, limits=limits) as client:
+
+        async def send(record: Dict[str, Any], due: float) -> None:
+            async with semaphore:
+                started = time.perf_counter()
+                result = {
+                    "route": f"{record['method']} {record['route']}",
+                    "captured_status": record.get("status"),
+                    "lag_ms": (started - due) * 1000,
+                }
+                try:
+                    response = await client.request(
+                        record["method"],
+                        record["path"],
+                        params=record.get("query") or None,
+                        json=_body(record),
+                    )
+                    await response.aread()
+                    result["status"] = response.status_code
+                except httpx.HTTPError as e:
+                    result["status"] = None
+                    result["error"] = type(e).__name__
+                result["latency_ms"] = (time.perf_counter() - started) * 1000
+                results.append(result)
+
+        tasks = []
+        origin = time.perf_counter()
+        for record in records:
+            due = origin + (record["ts"] - first) / speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(send(record, due)))
+        await asyncio.gather(*tasks)
+    return results
+
+
+def summarize(results: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Per-route latency percentiles and error rates (5xx and transport errors)."""
+    by_route: Dict[str, List[Dict[str, Any]]] = {}
+    for result in results:
+        by_route.setdefault(result["route"], []).append(result)
+
+    summary = {}
+    for route, items in sorted(by_route.items(), key=lambda item: -len(item[1])):
+        latencies = [item["latency_ms"] for item in items]
+        errors = sum(1 for item in items if item["status"] is None or item["status"] >= 500)
+        client_errors = sum(1 for item in items if item["status"] is not None and 400 <= item["status"] < 500)
+        mismatched = sum(
+            1 for item in items
+            if item["captured_status"] is not None and item["status"] != item["captured_status"]
+        )
+        statuses: Dict[str, int] = {}
+        for item in items:
+            key = str(item["status"] or item.get("error"))
+            statuses[key] = statuses.get(key, 0) + 1
+        summary[route] = {
+            "requests": len(items),
+            "p50_ms": round(statistics.median(latencies), 3),
+            "p95_ms": round(_percentile(latencies, 95), 3),
+            "p99_ms": round(_percentile(latencies, 99), 3),
+            "max_ms": round(max(latencies), 3),
+            "error_rate": round(errors / len(items), 4),
+            "client_error_rate": round(client_errors / len(items), 4),
+            "status_mismatches": mismatched,
+            "max_lag_ms": round(max(item["lag_ms"] for item in items), 3),
+            "statuses": statuses,
+        }
+    return summary
+
+
+def _format_row(route: str, row: Dict[str, Any]) -> str:
+    return (
+        f"  {route:<52} {row['requests']:>7}  p50 {row['p50_ms']:>9.2f}  p95 {row['p95_ms']:>9.2f}  "
+        f"p99 {row['p99_ms']:>9.2f} ms  5xx {row['error_rate']:>7.2%}  4xx {row['client_error_rate']:>7.2%}"
+    )
+
+
+def _header(value: str) -> tuple:
+    name, sep, content = value.partition(":")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"expected 'Name: value', got '{value}'")
+    return name.strip(), content.strip()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("capture", help="JSONL written by TRAFFIC_CAPTURE_PATH")
+    parser.add_argument("--target", default="http://localhost:8000", help="base URL of the instance to load")
+    parser.add_argument("--speed", type=float, default=1.0, help="time compression, e.g. 1 (real time) to 20")
+    parser.add_argument("--concurrency", type=int, default=32, help="maximum requests in flight")
+    parser.add_argument("--route", action="append", help="only replay this route template (repeatable)")
+    parser.add_argument("--limit", type=int, help="replay only the first N requests")
+    parser.add_argument("--header", type=_header, action="append", default=[], help="extra header 'Name: value'")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    parser.add_argument("--output", help="write the per-route summary as JSON to this path")
+    parser.add_argument("--max-error-rate", type=float, help="exit 1 when any route's 5xx/transport error rate exceeds this")
+    args = parser.parse_args()
+    if args.speed <= 0 or args.concurrency < 1:
+        parser.error("--speed must be positive and --concurrency at least 1")
+
+    records = load_capture(args.capture, args.route, args.limit)
+    if not records:
+        parser.error(f"no requests to replay in {args.capture}")
+    captured_seconds = records[-1]["ts"] - records[0]["ts"]
+    print(f"Replaying {len(records):,} requests spanning {captured_seconds:.1f} s at {args.speed:g}x "
+          f"against {args.target} (concurrency {args.concurrency})", flush=True)
+
+    started = time.perf_counter()
+    results = asyncio.run(replay(records, args.target, args.speed, args.concurrency, dict(args.header), args.timeout))
+    elapsed = time.perf_counter() - started
+    summary = summarize(results)
+
+    for route, row in summary.items():
+        print(_format_row(route, row))
+    overall = summarize({**result, "route": "all"} for result in results)["all"]
+    print(_format_row("all", overall))
+    print(f"Finished in {elapsed:.1f} s ({len(results) / elapsed:.1f} rps), max lag {overall['max_lag_ms']:.0f} ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "meta": {
+                    "capture": args.capture,
+                    "target": args.target,
+                    "speed": args.speed,
+                    "concurrency": args.concurrency,
+                    "requests": len(results),
+                    "seconds": round(elapsed, 2),
+                },
+                "overall": overall,
+                "routes": summary,
+            }, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.max_error_rate is not None:
+        failures = [route for route, row in summary.items() if row["error_rate"] > args.max_error_rate]
+        for route in failures:
+            print(f"✗ {route}: error rate {summary[route]['error_rate']:.2%} exceeds {args.max_error_rate:.2%}",
+                  file=sys.stderr)
+        if failures:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
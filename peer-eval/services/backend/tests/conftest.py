@@ -0,0 +1,36 @@
+"""The API on the in-memory data backend, seeded with a small synthetic dataset."""
+import os
+
+# Must be set before the application (and its settings) are imported.
+os.environ["DATA_BACKEND"] = "memory"
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")  # one client issues every request
+os.environ.setdefault("REPORT_SNAPSHOTS_ENABLED", "false")
+os.environ.setdefault("DRAFT_JOURNAL_DIR", "")
+os.environ.setdefault("QUERY_COUNT_HEADER", "true")
+os.environ.setdefault("QUERY_COUNT_LOG_THRESHOLD", "0")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.supabase import supabase
+from app.services.datagen import SCALES, SyntheticDataset, load_memory
+
+pytest_plugins = ["app.testing"]
+
+
+@pytest.fixture(scope="session")
+def dataset() -> SyntheticDataset:
+    """3 projects of 10 teams of 4 students, with submitted evaluations."""
+    dataset = SyntheticDataset(SCALES["small"], password_rounds=4)
+    load_memory(dataset, supabase.db)
+    return dataset
+
+
+@pytest.fixture(scope="session")
+def client(dataset) -> TestClient:
+    from app.main import app
+
+    # Not entered as a context manager: the lifespan (job pool, password
+    # processes, draft flusher) is not needed for these requests.
+    return TestClient(app)
@@ -0,0 +1,89 @@
+"""Admission control: route classes, token buckets and the report gate."""
+import asyncio
+
+import pytest
+from starlette.responses import PlainTextResponse
+from starlette.testclient import TestClient
+
+from app.core import admission
+from app.core.admission import (
+    AUTH, READ, REPORT, WRITE, AdmissionMiddleware, ConcurrencyGate, Rate, RateLimiter, route_class,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(admission.time, "monotonic", clock)
+    return clock
+
+
+@pytest.mark.parametrize("method, path, expected", [
+    ("POST", "/api/v1/auth/login", AUTH),
+    ("POST", "/api/v1/auth/register/", AUTH),
+    ("POST", "/api/v1/auth/logout", WRITE),
+    ("POST", "/api/v1/evaluations/", WRITE),
+    ("GET", "/api/v1/reports/team/1", REPORT),
+    ("GET", "/api/v1/reports/jobs/abc", READ),
+    ("GET", "/api/v1/admin/metrics", None),
+    ("GET", "/health", None),
+])
+def test_route_class(method, path, expected):
+    assert route_class({"method": method, "path": path}) == expected
+
+
+def test_bucket_allows_burst_then_refills(clock):
+    limiter = RateLimiter({WRITE: Rate(per_minute=60, burst=3)})
+    assert [limiter.acquire(WRITE, "ip:a") for _ in range(3)] == [0, 0, 0]
+    assert limiter.acquire(WRITE, "ip:a") == pytest.approx(1.0)
+    # Other callers and other classes have their own buckets
+    assert limiter.acquire(WRITE, "ip:b") == 0
+    assert limiter.acquire(READ, "ip:a") == 0  # no rate configured
+
+    clock.now += 0.5
+    assert limiter.acquire(WRITE, "ip:a") == pytest.approx(0.5)
+    clock.now += 0.5
+    assert limiter.acquire(WRITE, "ip:a") == 0
+    clock.now += 60  # refills up to the burst, not beyond
+    assert [limiter.acquire(WRITE, "ip:a") > 0 for _ in range(4)] == [False, False, False, True]
+
+
+async def _ok(scope, receive, send):
+    await PlainTextResponse("ok")(scope, receive, send)
+
+
+def test_rejections_carry_retry_after(clock):
+    limiter = RateLimiter({WRITE: Rate(per_minute=6, burst=1), AUTH: Rate(per_minute=600, burst=100)})
+    client = TestClient(AdmissionMiddleware(_ok, limiter))
+    assert client.post("/api/v1/evaluations/").status_code == 200
+    response = client.post("/api/v1/evaluations/")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "10"
+    # Logins from the same address draw on their own bucket
+    assert all(client.post("/api/v1/auth/login").status_code == 200 for _ in range(50))
+
+
+def test_gate_queues_up_to_the_limit_then_turns_away():
+    async def scenario():
+        gate = ConcurrencyGate(limit=1, max_queued=1, timeout=0.2)
+        assert await gate.acquire()
+        queued = asyncio.ensure_future(gate.acquire())
+        await asyncio.sleep(0)
+        assert gate.waiting == 1
+        assert not await gate.acquire()  # queue full: turned away at once
+        gate.release()
+        assert await queued  # the waiter got the slot
+        assert not await gate.acquire()  # times out while the slot is held
+        gate.release()
+        assert await gate.acquire()
+        gate.release()
+
+    asyncio.run(scenario())
@@ -0,0 +1,204 @@
+"""Draft autosave: write-behind buffer, merge function and journal recovery."""
+import json
+import os
+import threading
+
+import pytest
+
+from app.core import boot
+from app.core.supabase import supabase
+from app.services.drafts import DraftBuffer
+from app.services.membership import team_membership
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+API = "/api/v1"
+
+
+@pytest.fixture
+def pair(dataset):
+    """(form_id, evaluator_id, evaluatee_id, team_id) with no evaluation: a new student and a teammate."""
+    db = supabase.db
+    team_id = dataset.team_ids(1)[0]
+    student = db.insert("users", {"email": "drafts@example.edu", "name": "Draft Tester", "role": "student"})
+    db.insert("team_members", {"team_id": team_id, "user_id": student["id"]})
+    team_membership.add(team_id, [student["id"]])
+    yield dataset.form_ids(1)[0], student["id"], dataset.members(team_id)[0], team_id
+    db.delete("users", student["id"])  # with its membership and drafts
+    team_membership.user_deleted(student["id"])
+
+
+@pytest.fixture
+def criteria(dataset, pair):
+    return list(dataset.criterion_ids(pair[0]))
+
+
+@pytest.fixture
+def make_buffer():
+    buffers = []
+
+    def make(**kwargs) -> DraftBuffer:
+        buffer = DraftBuffer(flush_interval=3600, **kwargs)
+        buffers.append(buffer)
+        return buffer
+
+    yield make
+    for buffer in buffers:
+        buffer.shutdown()
+
+
+def _stored(form_id, evaluator_id, evaluatee_id):
+    rows = (
+        supabase.table("evaluation_drafts").select("*")
+        .eq("form_id", form_id).eq("evaluator_id", evaluator_id).eq("evaluatee_id", evaluatee_id)
+        .execute().data
+    )
+    return rows[0] if rows else None
+
+
+def test_saves_coalesce_into_one_write(make_buffer, pair, criteria):
+    form_id, evaluator, evaluatee, team_id = pair
+    buffer = make_buffer()
+    buffer.save(form_id, evaluator, evaluatee, {criteria[0]: 3}, team_id=team_id)
+    buffer.save(form_id, evaluator, evaluatee, {criteria[1]: 4}, comments="Good")
+    buffer.save(form_id, evaluator, evaluatee, {criteria[0]: 5})
+    assert buffer.pending == 1
+    assert buffer.flush() == 1
+
+    stored = _stored(form_id, evaluator, evaluatee)
+    assert stored["scores"] == {str(criteria[0]): 5, str(criteria[1]): 4}
+    assert stored["comments"] == "Good"
+    assert stored["team_id"] == team_id
+
+
+def test_none_clears_a_score(make_buffer, pair, criteria):
+    form_id, evaluator, evaluatee, _ = pair
+    buffer = make_buffer()
+    buffer.save(form_id, evaluator, evaluatee, {criteria[0]: 5, criteria[1]: 6})
+    buffer.flush()
+    buffer.save(form_id, evaluator, evaluatee, {criteria[1]: None})
+    assert buffer.get(form_id, evaluator, evaluatee)["scores"] == {str(criteria[0]): 5}
+    buffer.flush()
+    assert _stored(form_id, evaluator, evaluatee)["scores"] == {str(criteria[0]): 5}
+
+
+def test_changes_from_two_workers_merge(make_buffer, pair, criteria):
+    form_id, evaluator, evaluatee, _ = pair
+    first, second = make_buffer(), make_buffer()
+    first.save(form_id, evaluator, evaluatee, {criteria[0]: 1}, comments="kept")
+    second.save(form_id, evaluator, evaluatee, {criteria[1]: 2})
+    first.flush()
+    second.flush()
+    stored = _stored(form_id, evaluator, evaluatee)
+    assert stored["scores"] == {str(criteria[0]): 1, str(criteria[1]): 2}
+    assert stored["comments"] == "kept"
+
+
+def test_discard_during_flush_does_not_wait_and_is_not_written_back(make_buffer, pair, criteria, monkeypatch):
+    form_id, evaluator, evaluatee, _ = pair
+    buffer = make_buffer()
+    buffer.save(form_id, evaluator, evaluatee, {criteria[0]: 5})
+
+    writing, release = threading.Event(), threading.Event()
+    rpc = supabase.rpc
+
+    def slow_rpc(*args, **kwargs):
+        writing.set()
+        release.wait(5)
+        return rpc(*args, **kwargs)
+
+    monkeypatch.setattr(supabase, "rpc", slow_rpc)
+    flusher = threading.Thread(target=buffer.flush)
+    flusher.start()
+    try:
+        assert writing.wait(5)
+        discarding = threading.Thread(target=buffer.discard, args=(form_id, evaluator, evaluatee))
+        discarding.start()
+        discarding.join(2)
+        assert not discarding.is_alive(), "discard waited for the flush"
+    finally:
+        release.set()
+        flusher.join()
+    assert _stored(form_id, evaluator, evaluatee) is None
+    assert buffer.get(form_id, evaluator, evaluatee) is None
+
+
+def test_draft_of_submitted_evaluation_is_dropped(make_buffer, dataset):
+    evaluation = next(iter(supabase.db.table("evaluations").rows.values()))
+    key = (evaluation["form_id"], evaluation["evaluator_id"], evaluation["evaluatee_id"])
+    supabase.table("evaluation_drafts").insert({**dict(zip(("form_id", "evaluator_id", "evaluatee_id"), key)),
+                                                "scores": {"1": 1}}).execute()
+    buffer = make_buffer()
+    buffer.save(*key, {dataset.criterion_ids(key[0])[0]: 2})
+    assert buffer.flush() == 0
+    assert _stored(*key) is None
+
+
+def _journal(path, records):
+    with open(path, "w") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+        f.write('{"form_id": 1, "evalu')  # torn by the crash
+
+
+def test_recovers_journal_of_another_boot(make_buffer, pair, criteria, tmp_path):
+    form_id, evaluator, evaluatee, team_id = pair
+    key = {"form_id": form_id, "evaluator_id": evaluator, "evaluatee_id": evaluatee}
+    other = {"form_id": form_id, "evaluator_id": evaluatee, "evaluatee_id": evaluator}
+    now = "2026-01-01T00:00:00+00:00"
+    _journal(tmp_path / "drafts-0123abcd.jsonl", [
+        {**key, "team_id": team_id, "scores": {str(criteria[0]): 4}, "updated_at": now},
+        {**key, "scores": {str(criteria[1]): 2}, "comments": "from the journal", "updated_at": now},
+        {**other, "scores": {str(criteria[0]): 1}, "updated_at": now},
+        {**other, "discard": True},
+    ])
+
+    buffer = make_buffer(journal_dir=str(tmp_path))
+    buffer.start()  # replays into our own journal, then wakes the flusher
+    assert not list(tmp_path.glob("drafts-0123abcd.*"))
+    assert (tmp_path / f"drafts-{boot.BOOT_ID}.jsonl").exists()
+
+    buffer.flush()
+    assert buffer.pending == 0
+    stored = _stored(form_id, evaluator, evaluatee)
+    assert stored["scores"] == {str(criteria[0]): 4, str(criteria[1]): 2}
+    assert stored["comments"] == "from the journal"
+    assert _stored(form_id, evaluatee, evaluator) is None
+
+
+@pytest.mark.skipif(fcntl is None, reason="boot locks need fcntl")
+def test_journal_of_a_running_worker_is_left_alone(make_buffer, pair, criteria, tmp_path):
+    form_id, evaluator, evaluatee, _ = pair
+    journal = tmp_path / "drafts-feedface.jsonl"
+    _journal(journal, [{"form_id": form_id, "evaluator_id": evaluator, "evaluatee_id": evaluatee,
+                        "scores": {str(criteria[0]): 4}, "updated_at": "2026-01-01T00:00:00+00:00"}])
+    # A sibling worker holds its boot lock (a separate open file conflicts even in-process)
+    fd = os.open(tmp_path / "feedface.lock", os.O_RDWR | os.O_CREAT)
+    fcntl.flock(fd, fcntl.LOCK_EX)
+    try:
+        buffer = make_buffer(journal_dir=str(tmp_path))
+        buffer.start()
+        assert buffer.pending == 0
+        assert journal.exists()
+    finally:
+        os.close(fd)
+
+
+def test_save_draft_rejects_drafts_that_cannot_be_stored(client, pair, criteria):
+    form_id, evaluator, evaluatee, team_id = pair
+    path = f"{API}/evaluations/drafts/{form_id}/{evaluator}/{evaluatee}"
+    score = [{"criterion_id": criteria[0], "score": 1}]
+
+    assert client.patch(f"{API}/evaluations/drafts/99999/{evaluator}/{evaluatee}", json={"scores": score}).status_code == 404
+    assert client.patch(path, json={"scores": [{"criterion_id": 99999, "score": 1}]}).status_code == 400
+    assert client.patch(path, json={"scores": [{"criterion_id": criteria[0], "score": 10**6}]}).status_code == 400
+    assert client.patch(path, json={"scores": score, "team_id": 99999}).status_code == 404
+    assert client.patch(path, json={"scores": score, "team_id": team_id + 1}).status_code == 400
+    assert client.patch(f"{API}/evaluations/drafts/{form_id}/{evaluator}/99999", json={"scores": score}).status_code == 404
+
+    response = client.patch(path, json={"scores": score, "team_id": team_id})
+    assert response.status_code == 200
+    assert client.delete(path).status_code == 200
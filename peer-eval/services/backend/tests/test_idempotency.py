@@ -0,0 +1,133 @@
+"""Idempotency-Key replay, key reuse and in-flight retries."""
+import asyncio
+import json
+
+import pytest
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.testclient import TestClient
+
+from app.core import idempotency
+from app.core.idempotency import IdempotencyMiddleware, IdempotencyStore
+
+PATH = "/api/v1/evaluations/"
+
+
+class Backend:
+    """Counts calls and answers with ``status`` (201 by default) and a fresh id."""
+
+    def __init__(self):
+        self.calls = 0
+        self.status = 201
+        self.started = asyncio.Event()
+        self.release = None
+
+    async def __call__(self, scope, receive, send):
+        self.calls += 1
+        body = await Request(scope, receive).json()
+        self.started.set()
+        if self.release is not None:
+            await self.release.wait()
+        await JSONResponse({"id": self.calls, **body}, status_code=self.status)(scope, receive, send)
+
+
+@pytest.fixture
+def backend() -> Backend:
+    return Backend()
+
+
+@pytest.fixture
+def client(backend) -> TestClient:
+    return TestClient(IdempotencyMiddleware(backend, IdempotencyStore(max_entries=10, ttl=60)))
+
+
+def _post(client, key, body, token="a"):
+    return client.post(PATH, json=body, headers={"Idempotency-Key": key, "Authorization": f"Bearer {token}"})
+
+
+def test_retry_is_replayed_byte_for_byte(client, backend):
+    first = _post(client, "k1", {"score": 3})
+    retry = _post(client, "k1", {"score": 3})
+    assert backend.calls == 1
+    assert first.status_code == retry.status_code == 201
+    assert retry.content == first.content
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+
+
+def test_keys_are_scoped_to_caller_and_route(client, backend):
+    _post(client, "k1", {"score": 3})
+    _post(client, "k1", {"score": 3}, token="b")
+    client.post("/api/v1/teams/", json={"score": 3}, headers={"Idempotency-Key": "k1", "Authorization": "Bearer a"})
+    client.post("/api/v1/projects/", json={"score": 3}, headers={"Idempotency-Key": "k1", "Authorization": "Bearer a"})
+    _post(client, "k2", {"score": 3})
+    assert backend.calls == 5
+
+
+def test_reused_key_with_another_body_is_rejected(client, backend):
+    _post(client, "k1", {"score": 3})
+    response = _post(client, "k1", {"score": 4})
+    assert response.status_code == 422
+    assert "different request body" in response.json()["detail"]
+    assert backend.calls == 1
+
+
+@pytest.mark.parametrize("status_code", [500, 503, 429, 307])
+def test_failures_are_not_stored(client, backend, status_code):
+    backend.status = status_code
+    assert _post(client, "k1", {"score": 3}).status_code == status_code
+    backend.status = 201
+    retry = _post(client, "k1", {"score": 3})
+    assert retry.status_code == 201
+    assert "Idempotent-Replayed" not in retry.headers
+    assert backend.calls == 2
+
+
+def test_invalid_key_is_rejected(client, backend):
+    assert _post(client, "x" * 256, {"score": 3}).status_code == 400
+    assert backend.calls == 0
+
+
+async def _call(app, key, body):
+    """Run one request through ``app``; returns (status, headers, body)."""
+    payload = json.dumps(body).encode()
+    scope = {
+        "type": "http", "method": "POST", "path": PATH, "query_string": b"", "client": ("10.0.0.1", 1234),
+        "headers": [(b"idempotency-key", key.encode()), (b"content-type", b"application/json")],
+    }
+    messages = iter([{"type": "http.request", "body": payload, "more_body": False}])
+    sent = []
+
+    async def receive():
+        return next(messages, {"type": "http.disconnect"})
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    return sent[0]["status"], dict(sent[0]["headers"]), b"".join(m.get("body", b"") for m in sent[1:])
+
+
+def test_retry_while_in_flight_gets_409_then_the_stored_response(backend, monkeypatch):
+    monkeypatch.setattr(idempotency, "IN_FLIGHT_TIMEOUT", 0.05)
+    app = IdempotencyMiddleware(backend, IdempotencyStore())
+
+    async def scenario():
+        backend.release = asyncio.Event()
+        first = asyncio.create_task(_call(app, "k1", {"score": 3}))
+        await backend.started.wait()
+        status, headers, _ = await _call(app, "k1", {"score": 3})
+        assert status == 409
+        assert headers[b"retry-after"] == b"1"
+
+        # A retry that is still waiting when the first one finishes gets its response
+        waiting = asyncio.create_task(_call(app, "k1", {"score": 3}))
+        await asyncio.sleep(0)
+        backend.release.set()
+        return await first, await waiting
+
+    (status, _, body), (replayed_status, headers, replayed) = asyncio.run(scenario())
+    assert status == replayed_status == 201
+    assert replayed == body
+    assert headers[b"idempotent-replayed"] == b"true"
+    assert backend.calls == 1
@@ -0,0 +1,75 @@
+"""Membership index: writes it has not seen must not refuse valid requests."""
+import pytest
+
+from app.core.supabase import supabase
+from app.services.membership import team_membership
+
+API = "/api/v1"
+
+
+@pytest.fixture
+def outsider(dataset):
+    """A student on no team, and a team whose project the index has loaded."""
+    db = supabase.db
+    team_id = dataset.team_ids(1)[0]
+    student = db.insert("users", {"email": "membership@example.edu", "name": "Late Joiner", "role": "student"})
+    assert student["id"] not in team_membership.members(team_id)
+    yield student["id"], team_id
+    db.delete("users", student["id"])  # with its memberships and evaluations
+    team_membership.user_deleted(student["id"])
+
+
+def _join_elsewhere(team_id, user_id):
+    """Add a member the way another worker would: the index is not told."""
+    return supabase.db.insert("team_members", {"team_id": team_id, "user_id": user_id})
+
+
+def _submission(dataset, evaluator_id, evaluatee_id, team_id):
+    form_id = dataset.form_ids(1)[0]
+    return {
+        "form_id": form_id,
+        "evaluator_id": evaluator_id,
+        "evaluatee_id": evaluatee_id,
+        "team_id": team_id,
+        "total_score": 0,
+        "scores": [{"criterion_id": criterion_id, "score": 0} for criterion_id in dataset.criterion_ids(form_id)],
+    }
+
+
+def test_member_added_elsewhere_can_submit(client, dataset, outsider):
+    student_id, team_id = outsider
+    teammate = dataset.members(team_id)[0]
+    response = client.post(f"{API}/evaluations/", json=_submission(dataset, student_id, teammate, team_id))
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Evaluator is not a member of this team"
+
+    _join_elsewhere(team_id, student_id)
+    response = client.post(f"{API}/evaluations/", json=_submission(dataset, student_id, teammate, team_id))
+    assert response.status_code == 201
+    assert student_id in team_membership.members(team_id)
+
+
+def test_member_added_elsewhere_can_save_drafts(client, dataset, outsider):
+    student_id, team_id = outsider
+    _join_elsewhere(team_id, student_id)
+    path = f"{API}/evaluations/drafts/{dataset.form_ids(1)[0]}/{student_id}/{dataset.members(team_id)[0]}"
+    assert client.patch(path, json={"scores": [], "team_id": team_id}).status_code == 200
+    assert client.delete(path).status_code == 200
+
+
+def test_member_removed_elsewhere_can_be_added_again(client, outsider):
+    student_id, team_id = outsider
+    assert client.post(f"{API}/teams/{team_id}/members", json={"user_id": student_id}).status_code == 201
+    membership = supabase.table("team_members").select("id").eq("team_id", team_id).eq("user_id", student_id).execute()
+    supabase.db.delete("team_members", membership.data[0]["id"])
+
+    assert client.post(f"{API}/teams/{team_id}/members", json={"user_id": student_id}).status_code == 201
+
+
+def test_member_added_elsewhere_is_already_a_member(client, outsider):
+    student_id, team_id = outsider
+    _join_elsewhere(team_id, student_id)
+    response = client.post(f"{API}/teams/{team_id}/members", json={"user_id": student_id})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "User is already a member of this team"
+    assert student_id in team_membership.members(team_id)
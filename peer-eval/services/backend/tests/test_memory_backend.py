@@ -0,0 +1,34 @@
+"""Statement semantics of the in-memory data backend."""
+import pytest
+
+from app.db.memory import APIError, MemoryClient, MemoryDatabase
+
+
+def _user(email: str, **values) -> dict:
+    return {"email": email, "name": email.split("@")[0], "role": "student", **values}
+
+
+@pytest.fixture
+def client() -> MemoryClient:
+    client = MemoryClient(MemoryDatabase())
+    client.table("users").insert(_user("a@example.edu")).execute()
+    return client
+
+
+@pytest.mark.parametrize("rows, code", [
+    ([_user("b@example.edu"), _user("a@example.edu")], "23505"),  # collides with a stored row
+    ([_user("b@example.edu"), _user("b@example.edu")], "23505"),  # collides within the statement
+    ([_user("b@example.edu"), _user("c@example.edu", id=2)], "23505"),  # same id as the first row
+    ([_user("b@example.edu"), {"email": "c@example.edu", "role": "student"}], "23502"),  # name missing
+])
+def test_failed_bulk_insert_stores_nothing(client, rows, code):
+    with pytest.raises(APIError) as error:
+        client.table("users").insert(rows).execute()
+    assert error.value.code == code
+    assert [user["email"] for user in client.table("users").select("email").execute().data] == ["a@example.edu"]
+
+
+def test_bulk_insert_stores_every_row(client):
+    result = client.table("users").insert([_user("b@example.edu"), _user("c@example.edu")]).execute()
+    assert [user["id"] for user in result.data] == [2, 3]
+    assert len(client.table("users").select("id").eq("email", "c@example.edu").execute().data) == 1
@@ -0,0 +1,17 @@
+"""Stored request profiles."""
+import os
+
+from app.core.profiling import ProfileStore
+
+
+def test_store_keeps_only_the_newest_profiles(tmp_path):
+    store = ProfileStore(str(tmp_path), max_count=2)
+    for i in range(4):
+        store.save({"id": f"p{i}", "created_at": str(i)}, {"text": b"calls", "pstats": b"stats"})
+        # Distinct mtimes regardless of filesystem timestamp resolution
+        for path in tmp_path.glob(f"p{i}.*"):
+            os.utime(path, (i, i))
+    assert [meta["id"] for meta in store.list()] == ["p3", "p2"]
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "p2.json", "p2.prof", "p2.txt", "p3.json", "p3.prof", "p3.txt",
+    ]
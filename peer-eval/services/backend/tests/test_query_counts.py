@@ -0,0 +1,77 @@
+"""Database call budgets per endpoint (N+1 guard).
+
+The listing endpoints and the project report still look up related rows one
+row at a time, so their budget is a fixed cost plus today's cost per row
+(evaluation, score, team, member). An extra lookup per row - the usual
+regression - exceeds it however large the dataset; tighten a budget when its
+endpoint is batched. Single-entity reports have a fixed budget.
+"""
+import pytest
+
+from app.core.instrumentation import QUERY_COUNT_HEADER
+from app.services.usage import usage_counters
+
+API = "/api/v1"
+
+
+def _evaluations_budget(evaluations):
+    # evaluator, evaluatee, team, form and scores per evaluation; criterion per score
+    return 1 + 5 * len(evaluations) + sum(len(e["scores"]) for e in evaluations)
+
+
+def _teams_budget(teams):
+    # members and project per team; user per member
+    return 1 + 2 * len(teams) + sum(len(t["members"]) for t in teams)
+
+
+@pytest.mark.parametrize("params", [{}, {"team_id": 1}, {"form_id": 1}, {"evaluator_id": 3}])
+def test_list_evaluations(client, query_counter, params):
+    response = client.get(f"{API}/evaluations/", params=params)
+    assert response.status_code == 200
+    evaluations = response.json()["evaluations"]
+    assert evaluations
+    budget = _evaluations_budget(evaluations)
+    assert query_counter.count <= budget, f"{query_counter.count} calls, budget {budget}:\n{query_counter.summary()}"
+
+
+@pytest.mark.parametrize("params", [{}, {"project_id": 1}])
+def test_list_teams(client, query_counter, params):
+    response = client.get(f"{API}/teams/", params=params)
+    assert response.status_code == 200
+    teams = response.json()["teams"]
+    assert teams
+    budget = _teams_budget(teams)
+    assert query_counter.count <= budget, f"{query_counter.count} calls, budget {budget}:\n{query_counter.summary()}"
+
+
+def test_project_report(client, query_counter, dataset):
+    response = client.get(f"{API}/reports/project/1")
+    assert response.status_code == 200
+    # project and teams, then the team report queries for each team
+    budget = 2 + 7 * len(dataset.team_ids(1))
+    assert query_counter.count <= budget, query_counter.summary()
+
+
+@pytest.mark.parametrize("path, limit", [
+    ("/reports/team/1", 8),
+    ("/reports/user/3", 5),
+    ("/reports/evaluation-form/1", 4),
+])
+def test_single_entity_reports(client, max_queries, path, limit):
+    with max_queries(limit):
+        response = client.get(f"{API}{path}")
+    assert response.status_code == 200
+
+
+def test_get_form_cold_cache(client, max_queries):
+    usage_counters.clear()
+    # form, project, criteria, form usage, usage of all criteria
+    with max_queries(5):
+        response = client.get(f"{API}/forms/1")
+    assert response.status_code == 200
+    assert all("usage_count" in criterion for criterion in response.json()["form"]["criteria"])
+
+
+def test_query_count_header_matches_counter(client, query_counter):
+    response = client.get(f"{API}/reports/team/1")
+    assert int(response.headers[QUERY_COUNT_HEADER]) == query_counter.count
@@ -0,0 +1,88 @@
+"""Access tokens: cached verification, revocation, expiry, and the SECRET_KEY guard."""
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.core import security
+from app.core.config import Settings
+from app.core.security import create_access_token, decode_access_token, token_cache, token_denylist
+
+API = "/api/v1"
+USER = {"id": 3, "email": "student3@example.edu", "name": "Student 3", "role": "student"}
+
+
+@pytest.fixture(autouse=True)
+def fresh_tokens():
+    token_cache.clear()
+    yield
+    token_cache.clear()
+
+
+def _bearer(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_verified_claims_are_cached():
+    token, _ = create_access_token(USER)
+    claims = decode_access_token(token)
+    assert claims["sub"] == "3"
+    assert token_cache.get(security._token_key(token)) == claims
+
+
+def test_logout_revokes_the_token(client, dataset):
+    token, _ = create_access_token(USER)
+    assert client.get(f"{API}/auth/me", headers=_bearer(token)).status_code == 200
+
+    assert client.post(f"{API}/auth/logout", headers=_bearer(token)).status_code == 200
+    response = client.get(f"{API}/auth/me", headers=_bearer(token))
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token has been revoked"
+    # Another token of the same user is unaffected
+    other, _ = create_access_token(USER)
+    assert client.get(f"{API}/auth/me", headers=_bearer(other)).status_code == 200
+
+
+def test_revocation_holds_after_the_cache_is_dropped():
+    token, _ = create_access_token(USER)
+    security.revoke_access_token(token)
+    token_cache.clear()
+    with pytest.raises(HTTPException) as error:
+        decode_access_token(token)
+    assert error.value.detail == "Token has been revoked"
+
+
+def test_denylist_forgets_entries_after_expiry():
+    token_denylist.revoke("old", time.time() - 1)
+    assert not token_denylist.is_revoked("old")
+    token_denylist.revoke("current", time.time() + 60)
+    assert token_denylist.is_revoked("current")
+
+
+def test_expired_token_found_in_cache_is_rejected(monkeypatch):
+    token, expires_in = create_access_token(USER)
+    decode_access_token(token)
+    key = security._token_key(token)
+    assert token_cache.get(key) is not None
+
+    now = time.time()
+    monkeypatch.setattr(security.time, "time", lambda: now + expires_in + 1)
+    with pytest.raises(HTTPException) as error:
+        decode_access_token(token)
+    assert error.value.status_code == 401
+    assert token_cache.get(key) is None
+
+
+def test_tampered_token_is_rejected():
+    token, _ = create_access_token(USER)
+    with pytest.raises(HTTPException) as error:
+        decode_access_token(token[:-2] + ("A" if token[-2] != "A" else "B") + token[-1])
+    assert error.value.status_code == 401
+
+
+@pytest.mark.parametrize("secret_key", ["", "change-this-in-production"])
+def test_placeholder_secret_key_is_refused_outside_development(secret_key):
+    with pytest.raises(ValueError, match="SECRET_KEY"):
+        Settings(ENV="production", SECRET_KEY=secret_key, DATA_BACKEND="memory")
+    assert Settings(ENV="development", SECRET_KEY=secret_key, DATA_BACKEND="memory").SECRET_KEY == secret_key
+    assert Settings(ENV="production", SECRET_KEY="s3cret-value", DATA_BACKEND="memory").ENV == "production"
@@ -0,0 +1,48 @@
+"""Report snapshots of closed projects and their invalidation."""
+import asyncio
+
+import pytest
+
+from app.core.supabase import supabase
+from app.services import snapshots
+from app.services.snapshots import SnapshotStore, materialize_project
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch) -> SnapshotStore:
+    store = SnapshotStore(str(tmp_path))
+    monkeypatch.setattr(snapshots, "report_snapshots", store)
+    return store
+
+
+@pytest.fixture
+def shared_member(dataset):
+    """A member of a project 2 team who also joins a project 3 team; both projects closed."""
+    db = supabase.db
+    user_id = dataset.members(dataset.team_ids(2)[0])[0]
+    membership = db.insert("team_members", {"team_id": dataset.team_ids(3)[0], "user_id": user_id})
+    for project_id in (2, 3):
+        db.update("projects", project_id, {"status": "completed"})
+    yield user_id
+    db.delete("team_members", membership["id"])
+    for project_id in (2, 3):
+        db.update("projects", project_id, {"status": "active"})
+
+
+def test_user_snapshot_is_discarded_with_any_of_its_projects(store, shared_member):
+    asyncio.run(materialize_project(3))
+    assert store.read("users", shared_member) is not None
+
+    # Project 2 was never materialized, but the user report holds its data.
+    assert store.has_project(2)
+    store.invalidate_project(2)
+    assert store.read("users", shared_member) is None
+
+
+def test_members_of_active_projects_are_not_frozen(store, dataset, shared_member):
+    supabase.db.update("projects", 2, {"status": "active"})
+    asyncio.run(materialize_project(3))
+    assert store.read("teams", dataset.team_ids(3)[0]) is not None
+    assert store.read("users", dataset.members(dataset.team_ids(3)[0])[0]) is not None
+    assert store.read("users", shared_member) is None
+    assert not store.has_project(2)
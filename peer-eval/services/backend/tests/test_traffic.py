@@ -0,0 +1,27 @@
+"""Sanitizing of captured traffic."""
+from app.core.traffic import REDACTED, _query_params, sanitize
+
+
+def test_query_values_are_masked_like_body_values():
+    query = b"name=Alice+B&email=alice%40uni.edu&team_id=12&active=true&status=closed&since=2026-01-02&id=1&id=bob"
+    assert _query_params({"query_string": query}) == {
+        "name": "xxxxx x",
+        "email": "xxxxx@xxx.xxx",
+        "team_id": "12",
+        "active": "true",
+        "status": "closed",
+        "since": "2026-01-02",
+        "id": ["1", "xxx"],
+    }
+
+
+def test_sensitive_query_values_are_redacted():
+    params = _query_params({"query_string": b"token=123&profile=admin-key&api_key=1"})
+    assert params == {"token": REDACTED, "profile": REDACTED, "api_key": REDACTED}
+
+
+def test_body_keeps_shape_numbers_and_enums():
+    body = {"email": "a@b.c", "password": "hunter2", "role": "student", "scores": [{"criterion_id": 1, "score": 8}]}
+    assert sanitize(body) == {
+        "email": "x@x.x", "password": REDACTED, "role": "student", "scores": [{"criterion_id": 1, "score": 8}],
+    }
@@ -0,0 +1,77 @@
+"""Compiled submission validators and their invalidation."""
+import pytest
+
+from app.core.supabase import supabase
+from app.services.membership import MembershipIndex, MembershipListener
+from app.services.validators import FormValidator, FormValidatorCache
+
+VALIDATOR = FormValidator(form_id=1, max_score=15, max_points={10: 5, 11: 10})
+
+
+@pytest.mark.parametrize("scores, total_score, error", [
+    ([(10, 5), (11, 10)], 15, None),
+    ([(10, 0), (11, 0)], 0, None),
+    ([(10, 5), (12, 1)], 6, "Criterion 12 does not belong to this form"),
+    ([(10, 5), (10, 5)], 10, "Criterion 10 is scored more than once"),
+    ([(10, 6), (11, 1)], 7, "Score for criterion 10 must be between 0 and 5"),
+    ([(10, -1), (11, 1)], 0, "Score for criterion 10 must be between 0 and 5"),
+    ([(10, 5)], 5, "Missing scores for criteria 11"),
+    ([], 0, "Missing scores for criteria 10, 11"),
+    ([(10, 5), (11, 10)], 14, "total_score (14) does not match the sum of the scores (15)"),
+])
+def test_error(scores, total_score, error):
+    assert VALIDATOR.error(scores, total_score) == error
+
+
+def test_total_above_max_score():
+    validator = FormValidator(form_id=1, max_score=12, max_points={10: 5, 11: 10})
+    assert validator.error([(10, 5), (11, 10)], 15) == "total_score (15) exceeds the form's max_score (12)"
+    assert validator.error([(10, 2), (11, 10)], 12) is None
+
+
+@pytest.mark.parametrize("scores, error", [
+    ([], None),
+    ([(11, 10), (10, None)], None),
+    ([(12, None)], "Criterion 12 does not belong to this form"),
+    ([(11, 11)], "Score for criterion 11 must be between 0 and 10"),
+])
+def test_partial_error(scores, error):
+    assert VALIDATOR.partial_error(scores) == error
+
+
+@pytest.fixture
+def form(dataset):
+    form_id = dataset.form_ids(1)[0]
+    yield form_id
+    for criterion in supabase.table("form_criteria").select("id").eq("form_id", form_id).execute().data:
+        if criterion["id"] not in dataset.criterion_ids(form_id):
+            supabase.db.delete("form_criteria", criterion["id"])
+
+
+def test_cache_serves_until_invalidated(form):
+    cache = FormValidatorCache(max_size=10, ttl=60)
+    before = cache.get(form)
+    assert cache.get(form) is before
+    supabase.db.insert("form_criteria", {"form_id": form, "text": "New", "max_points": 3})
+    assert cache.get(form) is before  # not seen until invalidated
+
+    cache.invalidate(form)
+    assert len(cache.get(form).max_points) == len(before.max_points) + 1
+    assert cache.get(99999) is None
+
+
+def test_notifications_invalidate_validators(form):
+    cache = FormValidatorCache(max_size=10, ttl=60)
+    listener = MembershipListener(MembershipIndex(), "postgresql://", cache)
+    before = cache.get(form)
+
+    listener._on_notify(None, 0, "membership_changed", f"form:{form}")
+    assert cache.get(form) is not before
+
+    before = cache.get(form)
+    listener._on_notify(None, 0, "membership_changed", "form:oops")
+    listener._on_notify(None, 0, "membership_changed", f"team:{form}")
+    assert cache.get(form) is before
+
+    listener._clear()  # on (re)connect
+    assert cache.get(form) is not before
@@ -9,6 +9,7 @@ import Forms from './pages/Forms';
 import Evaluations from './pages/Evaluations';
 import Reports from './pages/Reports';
 import Header from './components/Header';
+import { authAPI } from './api';
 
 function App() {
   const [user, setUser] = useState(null);
@@ -26,6 +27,10 @@ function App() {
   };
 
   const handleLogout = () => {
+    const token = localStorage.getItem('token');
+    if (token) {
+      authAPI.logout(token).catch(() => {});
+    }
     setUser(null);
     localStorage.removeItem('user');
     localStorage.removeItem('token');
@@ -19,6 +19,9 @@ api.interceptors.request.use(
   (error) => Promise.reject(error)
 );
 
+// Pass the same key when retrying a create so the server replays the first result
+const idempotent = (key) => (key ? { headers: { 'Idempotency-Key': key } } : undefined);
+
 // Response interceptor
 api.interceptors.response.use(
   (response) => response,
@@ -35,8 +38,8 @@ api.interceptors.response.use(
 export const authAPI = {
   register: (data) => api.post('/auth/register', data),
   login: (data) => api.post('/auth/login', data),
-  logout: () => api.post('/auth/logout'),
-  getCurrentUser: (userId) => api.get(`/auth/me?user_id=${userId}`),
+  logout: (token) => api.post('/auth/logout', null, { headers: { Authorization: `Bearer ${token}` } }),
+  getCurrentUser: () => api.get('/auth/me'),
 };
 
 export const usersAPI = {
@@ -58,7 +61,7 @@ export const projectsAPI = {
 export const teamsAPI = {
   list: (params) => api.get('/teams/', { params }),
   get: (id) => api.get(`/teams/${id}`),
-  create: (data) => api.post('/teams/', data),
+  create: (data, idempotencyKey) => api.post('/teams/', data, idempotent(idempotencyKey)),
   update: (id, data) => api.put(`/teams/${id}`, data),
   delete: (id) => api.delete(`/teams/${id}`),
   addMember: (teamId, data) => api.post(`/teams/${teamId}/members`, data),
@@ -79,7 +82,7 @@ export const formsAPI = {
 export const evaluationsAPI = {
   list: (params) => api.get('/evaluations/', { params }),
   get: (id) => api.get(`/evaluations/${id}`),
-  create: (data) => api.post('/evaluations/', data),
+  create: (data, idempotencyKey) => api.post('/evaluations/', data, idempotent(idempotencyKey)),
   update: (id, data) => api.put(`/evaluations/${id}`, data),
   delete: (id) => api.delete(`/evaluations/${id}`),
 };
@@ -21,6 +21,7 @@ function Login({ onLogin }) {
     try {
       const response = await authAPI.login(formData);
       const userData = response.data.user;
+      localStorage.setItem('token', response.data.access_token);
       onLogin(userData);
       navigate('/dashboard');
     } catch (err) {